@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+重定向检查
+读入每行一个路径，对 BASE_URL + 路径 发HEAD请求并跟随重定向，输出与原脚本相同表头的CSV：
+source_path,target_path,status_code,is_redirect,is_available；请求失败（超时、连接错误、重定向过多）记为CURL_ERROR
+每个主机维持有界的keep-alive连接池，服务器不支持HEAD（405/501）时改用GET；结果按输入顺序输出
+每个结果（含重定向链与错误类别）检查完立即写入SQLite状态库，CSV由状态库生成，中断后重跑不丢已检查的结果；
+未检查过的路径总是检查，已有结果的路径按 --mode 决定是否重新检查
+用法: cat paths_to_check.txt | python3 check_redirects.py > redirects.csv
+      python3 check_redirects.py charts_paths_to_check.txt -o charts_redirects.csv
+      python3 check_redirects.py paths_to_check.txt -o redirects.csv --mode failed | --mode stale --older-than 30 | --mode full
+      python3 check_redirects.py paths_to_check.txt -o redirects.csv --import-csv redirects.csv   # 以已有CSV初始化状态库
+"""
+
+import argparse
+import asyncio
+import csv
+import ssl
+import sys
+import time
+from urllib.parse import urljoin, urlsplit
+
+from redirect_store import STORE_FILE, RedirectStore
+
+BASE_URL = "https://www.omniglot.com"
+CONCURRENCY = 20             # 同时进行的检查数（与原脚本的xargs -P 20相同）
+CONNECTIONS_PER_HOST = 20    # 每个主机的连接池上限
+CONNECT_TIMEOUT = 10         # 与原脚本的 --connect-timeout 10 相同
+REQUEST_TIMEOUT = 30         # 单个路径（含全部重定向）的总时限，同 --max-time 30
+RETRIES = 3                  # 同 --retry 3：超时、连接错误与408/429/5xx重试
+MAX_REDIRECTS = 50           # curl -L 的默认上限
+USER_AGENT = "Mozilla/5.0 (compatible; omniglot-metadata-redirect-check)"
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+HEAD_UNSUPPORTED = {405, 501}
+CSV_HEADER = ['source_path', 'target_path', 'status_code', 'is_redirect', 'is_available']
+
+class RequestError(Exception):
+    """请求无法完成（对应curl非零退出码）；error_class: timeout / connect / protocol / too_many_redirects"""
+
+    def __init__(self, error_class, message):
+        super().__init__(message)
+        self.error_class = error_class
+
+def error_class(error):
+    if isinstance(error, RequestError):
+        return error.error_class
+    if isinstance(error, asyncio.TimeoutError):
+        return 'timeout'
+    if isinstance(error, (ValueError, asyncio.IncompleteReadError)):
+        return 'protocol'
+    return 'connect'
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+class ConnectionPool:
+    """按 (scheme, host, port) 分组的keep-alive连接池，每组连接数有上限"""
+
+    def __init__(self, per_host=CONNECTIONS_PER_HOST, connect_timeout=CONNECT_TIMEOUT):
+        self.per_host = per_host
+        self.connect_timeout = connect_timeout
+        self.idle = {}
+        self.slots = {}
+        self.ssl_context = ssl.create_default_context()
+        self.opened = 0
+
+    async def acquire(self, origin):
+        if origin not in self.slots:
+            self.slots[origin] = asyncio.Semaphore(self.per_host)
+            self.idle[origin] = []
+        await self.slots[origin].acquire()
+        idle = self.idle[origin]
+        if idle:
+            connection = idle.pop()
+            connection.reused = True
+            return connection
+        scheme, host, port = origin
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self.ssl_context if scheme == 'https' else None),
+                self.connect_timeout
+            )
+        except BaseException:
+            self.slots[origin].release()
+            raise
+        self.opened += 1
+        return Connection(reader, writer)
+
+    def release(self, origin, connection, reusable):
+        if reusable:
+            self.idle[origin].append(connection)
+        else:
+            connection.close()
+        self.slots[origin].release()
+
+    def close(self):
+        for idle in self.idle.values():
+            for connection in idle:
+                connection.close()
+            idle.clear()
+
+def origin_of(url):
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    return parts.scheme, parts.hostname, port
+
+async def read_body(reader, headers, method, status):
+    """读完响应体使连接可复用；返回 (响应体, 连接是否仍可复用)"""
+    if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+        return b'', True
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                # 跳过trailer直到空行
+                while (await reader.readline()).strip():
+                    pass
+                return b''.join(chunks), True
+            chunks.append((await reader.readexactly(size + 2))[:-2])
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length'])), True
+    return await reader.read(), False
+
+async def send_request(connection, method, url, extra_headers=None):
+    """在连接上发送一个请求，返回 (状态码, 小写头部字典, 响应体, 连接是否可复用)"""
+    parts = urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    extra = ''.join(f"{name}: {value}\r\n" for name, value in (extra_headers or {}).items())
+    connection.writer.write(
+        f"{method} {target} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"User-Agent: {USER_AGENT}\r\n"
+        f"Accept: */*\r\n"
+        f"{extra}"
+        f"Connection: keep-alive\r\n\r\n".encode('latin-1')
+    )
+    await connection.writer.drain()
+
+    status_line = await connection.reader.readline()
+    if not status_line:
+        raise ConnectionResetError("连接已被服务器关闭")
+    version, status, *_ = status_line.decode('latin-1').split(' ', 2)
+    status = int(status)
+    headers = {}
+    while True:
+        line = await connection.reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body, reusable = await read_body(connection.reader, headers, method, status)
+    keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+    return status, headers, body, reusable and keep_alive
+
+async def pooled_request(pool, method, url, extra_headers=None):
+    """从连接池取连接发送一个请求，返回 (状态码, 小写头部字典, 响应体)；
+    复用的空闲连接已被服务器关闭时换新连接重发（不计入重试次数）"""
+    origin = origin_of(url)
+    while True:
+        connection = await pool.acquire(origin)
+        try:
+            status, headers, body, reusable = await send_request(connection, method, url, extra_headers)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            pool.release(origin, connection, False)
+            if connection.reused:
+                continue
+            raise RequestError(error_class(e), str(e)) from e
+        except BaseException:
+            pool.release(origin, connection, False)
+            raise
+        pool.release(origin, connection, reusable)
+        return status, headers, body
+
+class RedirectChecker:
+    def __init__(self, base_url=BASE_URL, pool=None, retries=RETRIES,
+                 request_timeout=REQUEST_TIMEOUT, max_redirects=MAX_REDIRECTS):
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool or ConnectionPool()
+        self.retries = retries
+        self.request_timeout = request_timeout
+        self.max_redirects = max_redirects
+        self.requests = 0
+
+    async def request(self, method, url):
+        status, headers, _ = await pooled_request(self.pool, method, url)
+        self.requests += 1
+        return status, headers
+
+    async def fetch(self, url):
+        """HEAD请求，服务器不支持HEAD时改用GET"""
+        status, headers = await self.request('HEAD', url)
+        if status in HEAD_UNSUPPORTED:
+            status, headers = await self.request('GET', url)
+        return status, headers
+
+    async def follow(self, url):
+        """跟随重定向，返回经过的每一跳 [(URL, 状态码)]，最后一跳为最终结果"""
+        hops = []
+        for _ in range(self.max_redirects + 1):
+            status, headers = await self.fetch(url)
+            hops.append((url, status))
+            if status not in REDIRECT_STATUSES or 'location' not in headers:
+                return hops
+            url = urljoin(url, headers['location'])
+        raise RequestError('too_many_redirects', f"重定向超过 {self.max_redirects} 次")
+
+    async def resolve(self, path):
+        """含重试的完整检查：超时与连接错误重试，重试用尽仍失败则抛出RequestError；
+        408/429/5xx重试用尽后返回最后的状态码"""
+        url = self.base_url + path
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(min(2 ** (attempt - 1), 10))
+            try:
+                hops = await asyncio.wait_for(self.follow(url), self.request_timeout)
+            except (RequestError, OSError, asyncio.TimeoutError, ValueError) as e:
+                if attempt == self.retries:
+                    raise RequestError(error_class(e), str(e)) from e
+                continue
+            if hops[-1][1] not in RETRY_STATUSES or attempt == self.retries:
+                return hops
+
+    async def check(self, path):
+        """检查一个路径，返回状态库记录"""
+        record = {'path': path, 'base_url': self.base_url, 'status': None, 'final_url': None,
+                  'hops': [], 'error_class': None}
+        try:
+            record['hops'] = await self.resolve(path)
+            record['final_url'], record['status'] = record['hops'][-1]
+        except RequestError as e:
+            record['error_class'] = e.error_class
+        record['checked'] = time.time()
+        return record
+
+    async def check_all(self, paths, on_result, concurrency=CONCURRENCY):
+        """并发检查，每完成一个路径调用一次on_result(记录)"""
+        queue = asyncio.Queue()
+        for path in paths:
+            queue.put_nowait(path)
+
+        async def worker():
+            while not queue.empty():
+                on_result(await self.check(queue.get_nowait()))
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, len(paths)))))
+        finally:
+            self.pool.close()
+
+def read_paths(stream):
+    return [line.strip() for line in stream if line.strip()]
+
+def csv_row(record):
+    """状态库记录 -> 与原脚本相同的CSV行"""
+    path = record['path']
+    if record['status'] is None:
+        return [path, path, 'CURL_ERROR', 'false', 'false']
+    base_url, final_url = record['base_url'], record['final_url']
+    final_path = final_url[len(base_url):] if final_url.startswith(base_url) else final_url
+    return [
+        path,
+        final_path,
+        str(record['status']),
+        'true' if final_path != path else 'false',
+        'true' if record['status'] == 200 else 'false'
+    ]
+
+def write_csv(rows, stream):
+    writer = csv.writer(stream, lineterminator='\n')
+    writer.writerow(CSV_HEADER)
+    writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='检查路径的重定向与可用性，输出CSV')
+    parser.add_argument('input', nargs='?', help='路径列表文件（默认读标准输入）')
+    parser.add_argument('-o', '--output', help='输出CSV（默认写标准输出）')
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--connections-per-host', type=int, default=CONNECTIONS_PER_HOST)
+    parser.add_argument('--connect-timeout', type=float, default=CONNECT_TIMEOUT)
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT, help='单个路径的总时限（秒）')
+    parser.add_argument('--retries', type=int, default=RETRIES)
+    parser.add_argument('--store', default=STORE_FILE, help='SQLite状态库')
+    parser.add_argument('--mode', choices=['unseen', 'failed', 'stale', 'full'], default='unseen',
+                        help='已有结果的路径中重新检查哪些：unseen 不重查；failed 重查CURL_ERROR与408/429/5xx；'
+                             'stale 重查超过 --older-than 天的；full 全部重查')
+    parser.add_argument('--older-than', type=float, default=30, help='stale模式的天数')
+    parser.add_argument('--import-csv', metavar='CSV', help='先把已有的检查结果CSV导入状态库（已有记录的路径不覆盖）')
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            paths = read_paths(f)
+    else:
+        paths = read_paths(sys.stdin)
+
+    store = RedirectStore(args.store)
+    base_url = args.base_url.rstrip('/')
+    if args.import_csv:
+        imported = store.import_csv(args.import_csv, base_url)
+        print(f"从 {args.import_csv} 导入 {imported} 条记录", file=sys.stderr)
+    todo = store.select(base_url, paths, args.mode, args.older_than)
+
+    checker = RedirectChecker(
+        base_url,
+        ConnectionPool(args.connections_per_host, args.connect_timeout),
+        retries=args.retries,
+        request_timeout=args.timeout
+    )
+    try:
+        asyncio.run(checker.check_all(todo, store.put, args.concurrency))
+    finally:
+        store.commit()
+    records = store.records(base_url, paths)
+    store.close()
+    rows = [csv_row(records[path]) for path in paths]
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            write_csv(rows, f)
+    else:
+        write_csv(rows, sys.stdout)
+    print(f"共 {len(paths)} 个路径, 本次检查 {len(todo)} 个: {checker.requests} 个请求, "
+          f"{checker.pool.opened} 个连接", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+由重定向检查结果编译路径修正规则 path_corrections.json（供Stage1/create_final_paths.py使用）
+- 重定向边来自CSV的 source_path -> target_path；指定 --store 时再加入状态库中记录的每一跳
+- 链式重定向压缩为直达（A→B→C 记为 A→C），成环的路径不生成修正并报告
+- .php与.htm视为同一页面的别名：重定向源的另一个别名没有检查过时，也指向同一目标
+- 只保留最终目标为本站可用页面（200）的修正
+输出为 {原路径: 修正后路径} 的扁平字典，create_final_paths对每个条目只做一次字典查找；统计与环写入报告文件
+用法: python3 compile_path_corrections.py [redirects.csv charts_redirects.csv] [--store redirect_checks.sqlite3] [-o path_corrections.json] [--report 报告.json]
+"""
+
+import argparse
+import csv
+import json
+from pathlib import Path
+
+from check_redirects import BASE_URL
+from redirect_store import RedirectStore
+
+CORRECTIONS_FILE = 'path_corrections.json'
+REPORT_SUFFIX = '_report'
+ALIAS_SUFFIXES = ('.php', '.htm')
+
+def site_path(url, base_url=BASE_URL):
+    """本站URL -> 路径；站外URL返回None"""
+    if url.startswith('/'):
+        return url
+    if url.startswith(base_url + '/'):
+        return url[len(base_url):]
+    return None
+
+def alias_of(path):
+    """.php与.htm互为别名，其他路径没有别名"""
+    for suffix, other in zip(ALIAS_SUFFIXES, reversed(ALIAS_SUFFIXES)):
+        if path.endswith(suffix):
+            return path[:-len(suffix)] + other
+    return None
+
+def read_results(csv_files):
+    """源路径 -> CSV行"""
+    results = {}
+    for csv_file in csv_files:
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                results[row['source_path']] = row
+    return results
+
+def redirect_edges(results, store_records):
+    """每个路径的下一跳（本站内）；站外目标单独列出"""
+    edges = {}
+    external = {}
+    for source, row in results.items():
+        if row['is_redirect'] != 'true':
+            continue
+        target = site_path(row['target_path'])
+        if target is None:
+            external[source] = row['target_path']
+        else:
+            edges.setdefault(source, target)
+    # 状态库中的重定向链给出中间各跳，逐跳加入（CSV中只有首尾）
+    for record in store_records:
+        hops = record['hops']
+        for (url, _), (next_url, _) in zip(hops, hops[1:]):
+            path, next_path = site_path(url), site_path(next_url)
+            if path is None:
+                continue
+            if next_path is None:
+                external[path] = next_url
+            else:
+                edges[path] = next_path
+    return edges, external
+
+def collapse(edges):
+    """把每条链压缩到终点，返回 (路径 -> 终点, 环列表, 通向环的路径 -> 所进入的环)
+    环上的路径与通向环的路径没有终点，记为None"""
+    final = {}
+    cycles = []
+    reached_cycle = {}
+    for start in edges:
+        chain = []
+        node = start
+        while node in edges and node not in final and node not in chain:
+            chain.append(node)
+            node = edges[node]
+        if node in chain:
+            cycle = chain[chain.index(node):] + [node]
+            cycles.append(cycle)
+            end = None
+        elif node in final:
+            end, cycle = final[node], reached_cycle.get(node)
+        else:
+            end, cycle = node, None
+        for path in chain:
+            final[path] = end
+            if cycle:
+                reached_cycle[path] = cycle
+    leading = {path: cycle for path, cycle in reached_cycle.items() if path not in cycle}
+    return final, cycles, leading
+
+def compile_corrections(results, store_records=()):
+    """返回 (修正字典, 报告)"""
+    edges, external = redirect_edges(results, store_records)
+    final, cycles, cycle_of = collapse(edges)
+
+    available = {path for path, row in results.items() if row['is_available'] == 'true'}
+    # 终点可用：作为源路径检查过且为200，或者是某条可用重定向的最终落点
+    available |= {site_path(row['target_path']) for row in results.values() if row['is_available'] == 'true'}
+
+    corrections = {}
+    unavailable = {}
+    for path, end in final.items():
+        if end is None:
+            continue
+        if end in available:
+            corrections[path] = end
+        else:
+            unavailable[path] = end
+    collapsed = sum(1 for path, end in corrections.items() if edges[path] != end)
+
+    # 别名折叠：重定向源的另一个别名也指向同一目标；检查过的别名以它自己的检查结果为准
+    aliases = {}
+    for path, target in corrections.items():
+        alias = alias_of(path)
+        if alias is not None and alias not in results and alias not in corrections and alias != target:
+            aliases[alias] = target
+    corrections.update(aliases)
+
+    report = {
+        'checked_paths': len(results),
+        'redirect_edges': len(edges),
+        'corrections': len(corrections),
+        'collapsed_chains': collapsed,
+        'alias_corrections': aliases,
+        'cycles': cycles,
+        'leading_into_cycles': dict(sorted(cycle_of.items())),
+        'unavailable_targets': unavailable,
+        'external_targets': external
+    }
+    return dict(sorted(corrections.items())), report
+
+def main():
+    parser = argparse.ArgumentParser(description='由重定向检查结果编译路径修正规则')
+    parser.add_argument('csv_files', nargs='*', default=['redirects.csv', 'charts_redirects.csv'])
+    parser.add_argument('--store', help='同时使用状态库中记录的完整重定向链')
+    parser.add_argument('-o', '--output', default=CORRECTIONS_FILE)
+    parser.add_argument('--report', help='报告文件（默认与输出文件同目录，名为 <输出文件名>_report.json）')
+    args = parser.parse_args()
+    output = Path(args.output)
+    report_file = args.report or output.with_name(output.stem + REPORT_SUFFIX + output.suffix)
+
+    results = read_results(args.csv_files)
+    store_records = []
+    if args.store:
+        store = RedirectStore(args.store)
+        store_records = list(store.records(BASE_URL).values())
+        store.close()
+
+    corrections, report = compile_corrections(results, store_records)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(corrections, f, ensure_ascii=False, indent=2)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"检查结果: {report['checked_paths']} 个路径, 重定向边 {report['redirect_edges']} 条")
+    print(f"路径修正: {report['corrections']} 个（压缩链 {report['collapsed_chains']} 个, "
+          f"别名折叠 {len(report['alias_corrections'])} 个）")
+    print(f"重定向环: {len(report['cycles'])} 个, 通向环而未生成修正的路径: {len(report['leading_into_cycles'])} 个")
+    for cycle in report['cycles']:
+        print(f"  {' -> '.join(cycle)}")
+    print(f"目标不可用而未生成修正: {len(report['unavailable_targets'])} 个, 站外目标: {len(report['external_targets'])} 个")
+    print(f"修正规则已保存到: {args.output}")
+    print(f"报告已保存到: {report_file}")
+
+if __name__ == "__main__":
+    main()
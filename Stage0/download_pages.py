@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+页面下载（代替aria2c下载列表）
+下载generate_download_list.py收集的同一组链接，按同样的目录布局保存（writing/、charts/，其他页面保持目录结构）
+- 每个主机有界的keep-alive连接池，并按每秒请求数限速；429/503的Retry-After会推迟该主机后续的请求
+- 超时、连接错误与408/429/5xx按指数退避重试
+- 每个路径的ETag与Last-Modified保存在元数据文件中（下载过程中定期原子地保存，中途被杀也不丢已取得的部分），
+  重新下载时发送If-None-Match/If-Modified-Since，未改变的页面（304）不再传输
+- 指定 --mirror 时保存到按内容寻址的镜像存储（mirror_store.py）而不是普通文件
+用法: python3 download_pages.py [-d 输出目录 | --mirror mirror] [--list 路径列表.txt] [--rate 5] [--connections-per-host 4] [--force]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from check_redirects import (BASE_URL, CONNECT_TIMEOUT, MAX_REDIRECTS, REDIRECT_STATUSES, RETRY_STATUSES,
+                             ConnectionPool, RequestError, error_class, origin_of, pooled_request, read_paths)
+from generate_download_list import collect_all_links, output_location
+from mirror_store import MirrorStore
+
+METADATA_FILE = 'download_metadata.json'
+CONCURRENCY = 8
+CONNECTIONS_PER_HOST = 4
+REQUESTS_PER_SECOND = 5      # 每个主机
+REQUEST_TIMEOUT = 60         # 单个路径（含全部重定向）的总时限
+RETRIES = 3
+MAX_BACKOFF = 60
+SAVE_EVERY = 100             # 每完成这么多个路径或每隔SAVE_INTERVAL秒保存一次元数据
+SAVE_INTERVAL = 10
+
+class HostThrottle:
+    """每个主机的请求起始时间至少间隔 1/rate 秒"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        self.interval = 1 / rate if rate else 0
+        self.next_start = {}
+
+    async def wait(self, origin):
+        now = time.monotonic()
+        start = max(now, self.next_start.get(origin, now))
+        self.next_start[origin] = start + self.interval
+        await asyncio.sleep(start - now)
+
+    def defer(self, origin, seconds):
+        """服务器要求稍后再试时，推迟该主机之后的所有请求"""
+        self.next_start[origin] = max(self.next_start.get(origin, 0), time.monotonic() + seconds)
+
+def retry_after(headers):
+    """Retry-After的秒数形式（HTTP日期形式忽略）"""
+    try:
+        return min(float(headers.get('retry-after', '')), MAX_BACKOFF)
+    except ValueError:
+        return None
+
+def validators(entry):
+    """上一次下载的ETag/Last-Modified -> 条件请求头"""
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+class PageDownloader:
+    def __init__(self, output_dir, metadata, base_url=BASE_URL, pool=None, throttle=None,
+                 retries=RETRIES, request_timeout=REQUEST_TIMEOUT, force=False, mirror=None):
+        self.output_dir = Path(output_dir)
+        self.mirror = mirror
+        self.metadata = metadata
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool or ConnectionPool(CONNECTIONS_PER_HOST)
+        self.throttle = throttle or HostThrottle()
+        self.retries = retries
+        self.request_timeout = request_timeout
+        self.force = force
+        self.requests = 0
+        self.bytes_received = 0
+
+    def local_file(self, link):
+        dir_path, filename = output_location(link)
+        return Path(dir_path) / filename
+
+    def saved(self, local_file):
+        if self.mirror:
+            return self.mirror.exists(local_file)
+        return (self.output_dir / local_file).is_file()
+
+    def save(self, local_file, body, meta):
+        if self.mirror:
+            self.mirror.put(local_file, body, meta['checked'], meta['status'], meta['etag'],
+                            meta['last_modified'], meta['final_url'])
+            return
+        target = self.output_dir / local_file
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + '.part')
+        partial.write_bytes(body)
+        os.replace(partial, target)
+
+    async def get(self, url, extra_headers):
+        origin = origin_of(url)
+        await self.throttle.wait(origin)
+        status, headers, body = await pooled_request(self.pool, 'GET', url, extra_headers)
+        self.requests += 1
+        self.bytes_received += len(body)
+        if status in (429, 503) and retry_after(headers):
+            self.throttle.defer(origin, retry_after(headers))
+        return status, headers, body
+
+    async def follow(self, url, extra_headers):
+        """GET并跟随重定向，返回 (最终URL, 状态码, 头部, 响应体)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = await self.get(url, extra_headers)
+            if status not in REDIRECT_STATUSES or 'location' not in headers:
+                return url, status, headers, body
+            url = urljoin(url, headers['location'])
+        raise RequestError('too_many_redirects', f"重定向超过 {MAX_REDIRECTS} 次")
+
+    async def fetch(self, url, extra_headers):
+        """含重试的下载：超时与连接错误重试，408/429/5xx重试用尽后返回最后的响应"""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(min(2 ** (attempt - 1), MAX_BACKOFF))
+            try:
+                response = await asyncio.wait_for(self.follow(url, extra_headers), self.request_timeout)
+            except (RequestError, OSError, asyncio.TimeoutError, ValueError) as e:
+                if attempt == self.retries:
+                    raise RequestError(error_class(e), str(e)) from e
+                continue
+            if response[1] not in RETRY_STATUSES or attempt == self.retries:
+                return response
+
+    async def download(self, link):
+        """下载一个路径，返回结果类别: downloaded / not_modified / http_error / failed"""
+        local_file = self.local_file(link)
+        previous = self.metadata.get(link, {})
+        # 本地文件不在时不能用304，改为无条件下载
+        conditional = not self.force and self.saved(local_file)
+        try:
+            final_url, status, headers, body = await self.fetch(
+                self.base_url + link, validators(previous) if conditional else {}
+            )
+        except RequestError as e:
+            self.metadata[link] = {**previous, 'error_class': e.error_class, 'checked': time.time()}
+            return 'failed'
+
+        entry = {'final_url': final_url, 'status': status, 'checked': time.time()}
+        # 收到响应后，之前失败留下的错误类别不再适用
+        kept = {key: value for key, value in previous.items() if key != 'error_class'}
+        if status == 304:
+            self.metadata[link] = {**kept, **entry}
+            return 'not_modified'
+        if status != 200:
+            self.metadata[link] = {**kept, **entry}
+            return 'http_error'
+
+        self.metadata[link] = {
+            **entry,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'size': len(body),
+            'downloaded': entry['checked']
+        }
+        self.save(local_file, body, self.metadata[link])
+        return 'downloaded'
+
+    async def download_all(self, links, concurrency=CONCURRENCY, checkpoint=None):
+        """并发下载，返回各结果类别的计数；每完成SAVE_EVERY个路径或每隔SAVE_INTERVAL秒调用一次checkpoint()"""
+        counts = {'downloaded': 0, 'not_modified': 0, 'http_error': 0, 'failed': 0}
+        queue = asyncio.Queue()
+        for link in links:
+            queue.put_nowait(link)
+        completed = 0
+        last_saved = time.monotonic()
+
+        async def worker():
+            nonlocal completed, last_saved
+            while not queue.empty():
+                counts[await self.download(queue.get_nowait())] += 1
+                completed += 1
+                if checkpoint and (completed % SAVE_EVERY == 0 or time.monotonic() - last_saved >= SAVE_INTERVAL):
+                    checkpoint()
+                    last_saved = time.monotonic()
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, len(links)))))
+        finally:
+            self.pool.close()
+        return counts
+
+def load_metadata(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_metadata(metadata, path):
+    partial = f"{path}.part"
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(metadata.items())), f, ensure_ascii=False, indent=2)
+    os.replace(partial, path)
+
+def main():
+    parser = argparse.ArgumentParser(description='按下载列表的目录布局下载页面，重新下载时只传输有变化的页面')
+    parser.add_argument('-d', '--output-dir', default='.', help='输出根目录（其下为writing/、charts/等）')
+    parser.add_argument('--mirror', help='保存到该镜像存储目录（代替 -d 的普通文件）')
+    parser.add_argument('--list', help='路径列表文件（默认用generate_download_list.py收集的链接）')
+    parser.add_argument('--metadata', default=METADATA_FILE, help='保存ETag/Last-Modified的元数据文件')
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--connections-per-host', type=int, default=CONNECTIONS_PER_HOST)
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help='每个主机每秒请求数（0不限速）')
+    parser.add_argument('--connect-timeout', type=float, default=CONNECT_TIMEOUT)
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT, help='单个路径的总时限（秒）')
+    parser.add_argument('--retries', type=int, default=RETRIES)
+    parser.add_argument('--force', action='store_true', help='不发送条件请求，全部重新下载')
+    args = parser.parse_args()
+
+    if args.list:
+        with open(args.list, 'r', encoding='utf-8') as f:
+            links = read_paths(f)
+    else:
+        links = collect_all_links()
+
+    metadata = load_metadata(args.metadata)
+    mirror = MirrorStore(args.mirror) if args.mirror else None
+    downloader = PageDownloader(
+        args.output_dir,
+        metadata,
+        args.base_url,
+        ConnectionPool(args.connections_per_host, args.connect_timeout),
+        HostThrottle(args.rate),
+        retries=args.retries,
+        request_timeout=args.timeout,
+        force=args.force,
+        mirror=mirror
+    )
+    start = time.perf_counter()
+    try:
+        counts = asyncio.run(downloader.download_all(
+            links, args.concurrency, checkpoint=lambda: save_metadata(metadata, args.metadata)
+        ))
+    finally:
+        save_metadata(metadata, args.metadata)
+        if mirror:
+            mirror.close()
+
+    print(f"\n共 {len(links)} 个路径, 用时 {time.perf_counter() - start:.1f}s: "
+          f"{downloader.requests} 个请求, 接收 {downloader.bytes_received / 2**20:.1f} MiB")
+    print(f"- 已下载: {counts['downloaded']} 个")
+    print(f"- 未改变(304): {counts['not_modified']} 个")
+    print(f"- HTTP错误: {counts['http_error']} 个")
+    print(f"- 请求失败: {counts['failed']} 个")
+    print(f"元数据已保存到: {args.metadata}")
+
+if __name__ == "__main__":
+    main()
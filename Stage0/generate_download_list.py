@@ -33,6 +33,19 @@ def normalize_path(link, base_path="/writing/"):
     parsed = urlparse(normalized)
     return parsed.path
 
+def output_location(link):
+    """
+    下载文件的本地位置 (目录, 文件名)
+    - /writing/ 页面放在 writing/，/charts/ 文件放在 charts/，文件名为URL的最后部分
+    - 其他页面保持目录结构
+    """
+    filename = link.split('/')[-1]
+    if link.startswith('/writing/'):
+        return 'writing', filename
+    if link.startswith('/charts/'):
+        return 'charts', filename
+    return '/'.join(link.split('/')[1:-1]), filename  # 去掉开头的/和最后的文件名
+
 def collect_links_from_csv(csv_file, base_path):
     """从CSV文件收集链接"""
     links = set()
@@ -103,20 +116,16 @@ def generate_aria2c_list(links, output_file):
             f.write("# 语言和书写系统页面 (/writing/)\n")
             for link in writing_links:
                 full_url = base_url + link
-                # 输出文件名为URL的最后部分
-                filename = link.split('/')[-1]
+                dir_path, filename = output_location(link)
                 f.write(f"{full_url}\n")
-                f.write(f"  dir=writing\n")
+                f.write(f"  dir={dir_path}\n")
                 f.write(f"  out={filename}\n\n")
         
         if other_links:
             f.write("# 其他页面 (非/writing/和/charts/)\n")
             for link in other_links:
                 full_url = base_url + link
-                # 输出文件名为URL的最后部分，保持目录结构
-                filename = link.split('/')[-1]
-                # 使用相对路径作为输出目录
-                dir_path = '/'.join(link.split('/')[1:-1])  # 去掉开头的/和最后的文件名
+                dir_path, filename = output_location(link)
                 f.write(f"{full_url}\n")
                 if dir_path:
                     f.write(f"  dir={dir_path}\n")
@@ -126,10 +135,9 @@ def generate_aria2c_list(links, output_file):
             f.write("# 表格文件 (/charts/)\n")
             for link in chart_links:
                 full_url = base_url + link
-                # 输出文件名为URL的最后部分
-                filename = link.split('/')[-1]
+                dir_path, filename = output_location(link)
                 f.write(f"{full_url}\n")
-                f.write(f"  dir=charts\n")
+                f.write(f"  dir={dir_path}\n")
                 f.write(f"  out={filename}\n\n")
     
     return len(writing_links), len(chart_links), len(other_links)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+按内容寻址的站点镜像存储
+下载的页面与表格文件按内容的sha256保存为gzip压缩的blob（内容相同的文件只存一份），
+索引（SQLite）记录 镜像路径 -> blob、大小、下载时间与HTTP元数据（状态码、ETag、Last-Modified、最终URL）
+镜像路径与下载目录布局一一对应：本地文件 writing/aari.htm 的镜像路径为 /writing/aari.htm
+提供按镜像路径读取的接口（exists / read_bytes / read_text），可代替直接读取本地文件；也可导出回普通目录布局
+用法: python3 mirror_store.py import 目录 [--metadata download_metadata.json]
+      python3 mirror_store.py export 目录 [--prefix /writing/]
+      python3 mirror_store.py stats
+      python3 mirror_store.py cat /writing/aari.htm
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+MIRROR_DIR = 'mirror'
+INDEX_FILE = 'index.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched REAL,
+    status INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    final_url TEXT
+) WITHOUT ROWID
+"""
+FIELDS = ['path', 'sha256', 'size', 'fetched', 'status', 'etag', 'last_modified', 'final_url']
+
+def mirror_path(path):
+    """本地相对路径或URL路径 -> 镜像路径（以/开头）"""
+    return '/' + str(path).replace(os.sep, '/').lstrip('/')
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+class MirrorStore:
+    def __init__(self, root=MIRROR_DIR):
+        self.root = Path(root)
+        (self.root / 'blobs').mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.root / INDEX_FILE, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+
+    def blob_path(self, sha256):
+        return self.root / 'blobs' / sha256[:2] / f"{sha256}.gz"
+
+    def write_blob(self, data):
+        """保存blob，已有相同内容时不再写入；返回 (sha256, 是否新写入)"""
+        sha256 = content_hash(data)
+        blob = self.blob_path(sha256)
+        if blob.is_file():
+            return sha256, False
+        blob.parent.mkdir(exist_ok=True)
+        partial = blob.with_name(blob.name + '.part')
+        # mtime=0 使相同内容的压缩结果逐字节相同
+        with open(partial, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+            gz.write(data)
+        os.replace(partial, blob)
+        return sha256, True
+
+    def put(self, path, data, fetched=None, status=None, etag=None, last_modified=None, final_url=None):
+        """保存一个文件的内容与元数据并立即提交，返回sha256"""
+        sha256, _ = self.write_blob(data)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (mirror_path(path), sha256, len(data), fetched if fetched is not None else time.time(),
+             status, etag, last_modified, final_url)
+        )
+        self.conn.commit()
+        return sha256
+
+    def info(self, path):
+        """镜像路径的索引记录，不存在时返回None"""
+        row = self.conn.execute("SELECT * FROM files WHERE path=?", (mirror_path(path),)).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def exists(self, path):
+        return self.conn.execute("SELECT 1 FROM files WHERE path=?", (mirror_path(path),)).fetchone() is not None
+
+    def changed(self, path, data):
+        """与镜像中的内容比较（只比较sha256），镜像中没有该路径也算改变"""
+        record = self.info(path)
+        return record is None or record['sha256'] != content_hash(data)
+
+    def read_bytes(self, path):
+        record = self.info(path)
+        if record is None:
+            raise FileNotFoundError(f"镜像中没有: {mirror_path(path)}")
+        with gzip.open(self.blob_path(record['sha256']), 'rb') as f:
+            return f.read()
+
+    def read_text(self, path, encoding='utf-8', errors='strict'):
+        return self.read_bytes(path).decode(encoding, errors)
+
+    def paths(self, prefix='/'):
+        """前缀下的所有镜像路径（有序）"""
+        return [path for (path,) in self.conn.execute(
+            "SELECT path FROM files WHERE substr(path, 1, ?) = ? ORDER BY path", (len(prefix), prefix)
+        )]
+
+    def import_dir(self, directory, metadata=None):
+        """导入普通目录布局下的文件；metadata为download_pages.py的元数据（按镜像路径查找）。
+        返回 (文件数, 新blob数)"""
+        directory = Path(directory)
+        metadata = metadata or {}
+        root = self.root.resolve()
+        rows = []
+        new_blobs = 0
+        for file in sorted(directory.rglob('*')):
+            if not file.is_file() or file.name.endswith('.part') or root in file.resolve().parents:
+                continue
+            path = mirror_path(file.relative_to(directory))
+            data = file.read_bytes()
+            sha256, new = self.write_blob(data)
+            new_blobs += new
+            meta = metadata.get(path, {})
+            rows.append((path, sha256, len(data), meta.get('downloaded', file.stat().st_mtime),
+                         meta.get('status', 200), meta.get('etag'), meta.get('last_modified'), meta.get('final_url')))
+        self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+        return len(rows), new_blobs
+
+    def export(self, directory, prefix='/'):
+        """把前缀下的文件导出为普通目录布局，返回文件数"""
+        directory = Path(directory)
+        paths = self.paths(prefix)
+        for path in paths:
+            target = directory / path.lstrip('/')
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(self.read_bytes(path))
+        return len(paths)
+
+    def stats(self):
+        files, logical = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+        blobs = self.conn.execute("SELECT DISTINCT sha256 FROM files").fetchall()
+        stored = sum(self.blob_path(sha256).stat().st_size for (sha256,) in blobs)
+        return {'files': files, 'blobs': len(blobs), 'logical_bytes': logical, 'stored_bytes': stored}
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='按内容寻址的站点镜像存储')
+    parser.add_argument('command', choices=['import', 'export', 'stats', 'cat'])
+    parser.add_argument('target', nargs='?', help='import/export的目录，或cat的镜像路径')
+    parser.add_argument('--mirror', default=MIRROR_DIR, help='镜像存储目录')
+    parser.add_argument('--metadata', help='import时合并download_pages.py的元数据文件')
+    parser.add_argument('--prefix', default='/', help='export只导出该前缀下的文件')
+    args = parser.parse_args()
+    if args.command != 'stats' and not args.target:
+        parser.error(f"{args.command} 需要指定目标")
+
+    store = MirrorStore(args.mirror)
+    if args.command == 'import':
+        metadata = None
+        if args.metadata:
+            with open(args.metadata, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        files, new_blobs = store.import_dir(args.target, metadata)
+        print(f"导入 {files} 个文件, 新增 {new_blobs} 个blob")
+    elif args.command == 'export':
+        print(f"导出 {store.export(args.target, args.prefix)} 个文件到: {args.target}")
+    elif args.command == 'cat':
+        sys.stdout.buffer.write(store.read_bytes(args.target))
+    else:
+        stats = store.stats()
+        print(f"文件: {stats['files']} 个, blob: {stats['blobs']} 个（{stats['files'] - stats['blobs']} 个文件与其他文件内容相同）")
+        print(f"原始大小: {stats['logical_bytes'] / 2**20:.1f} MiB, 压缩存储: {stats['stored_bytes'] / 2**20:.1f} MiB")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 """
 解析Omniglot索引页面，提取链接和标签
 目前支持languages.htm和index.htm页面
+指定 --mirror 时 --input 为镜像路径（如 /writing/index.htm），从镜像存储读取页面
 """
 
 import os
@@ -10,19 +11,25 @@ from pathlib import Path
 from bs4 import BeautifulSoup
 import argparse
 
-def parse_index_page(html_file, output_csv):
+from mirror_store import MirrorStore
+
+def parse_index_page(html_file, output_csv, mirror=None):
     """
     解析languages.htm和index.htm页面，提取链接和标签
     
     参数:
-        html_file: HTML文件路径
+        html_file: HTML文件路径（给定mirror时为镜像路径）
         output_csv: 输出CSV文件路径
+        mirror: 镜像存储（MirrorStore），为None时读本地文件
     """
     print(f"解析文件: {html_file}")
     
     # 读取HTML文件
-    with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    if mirror:
+        html_content = mirror.read_text(html_file)
+    else:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
     
     # 使用BeautifulSoup解析HTML
     soup = BeautifulSoup(html_content, 'html.parser')
@@ -93,10 +100,14 @@ def main():
     parser.add_argument('--all', action='store_true', help='解析所有索引页面')
     parser.add_argument('--input', help='指定输入文件')
     parser.add_argument('--output', help='指定输出文件')
+    parser.add_argument('--mirror', help='从该镜像存储目录读取 --input 指定的镜像路径')
     
     args = parser.parse_args()
     
     # 如果指定了输入输出文件，直接解析
+    if args.input and args.output and args.mirror:
+        parse_index_page(args.input, args.output, MirrorStore(args.mirror))
+        return
     if args.input and args.output:
         if not os.path.exists(args.input):
             print(f"错误: 输入文件 {args.input} 不存在")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+重定向检查的SQLite状态库
+以 (BASE_URL, 路径) 为键保存最近一次检查的状态码、最终URL、重定向链、错误类别与检查时间；
+每条结果写入即提交，检查中断后已完成的结果仍在库中
+用法: python3 redirect_store.py stats
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+STORE_FILE = 'redirect_checks.sqlite3'
+
+# 408/429/5xx视为失败（重试用尽后仍是这些状态码），与CURL_ERROR一样在failed模式中重查
+FAILED_STATUSES = (408, 429, 500, 502, 503, 504)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    base_url TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status INTEGER,
+    final_url TEXT,
+    hops TEXT NOT NULL,
+    error_class TEXT,
+    checked REAL NOT NULL,
+    PRIMARY KEY (base_url, path)
+) WITHOUT ROWID
+"""
+
+class RedirectStore:
+    def __init__(self, path=STORE_FILE):
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+
+    def put(self, record):
+        """写入一条检查结果并立即提交；status为None表示请求失败（CURL_ERROR）"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (record['base_url'], record['path'], record['status'], record['final_url'],
+             json.dumps(record['hops'], ensure_ascii=False), record['error_class'], record['checked'])
+        )
+        self.conn.commit()
+
+    def records(self, base_url, paths=None):
+        """路径 -> 记录；给定paths时只返回其中已有记录的路径"""
+        records = {}
+        for path, status, final_url, hops, error, checked in self.conn.execute(
+            "SELECT path, status, final_url, hops, error_class, checked FROM checks WHERE base_url=?", (base_url,)
+        ):
+            records[path] = {
+                'base_url': base_url,
+                'path': path,
+                'status': status,
+                'final_url': final_url,
+                'hops': [tuple(hop) for hop in json.loads(hops)],
+                'error_class': error,
+                'checked': checked
+            }
+        if paths is not None:
+            records = {path: records[path] for path in paths if path in records}
+        return records
+
+    def select(self, base_url, paths, mode, older_than_days=None):
+        """需要检查的路径（保持输入顺序）：没有记录的总是检查，已有记录的按mode决定"""
+        records = self.records(base_url, paths)
+        cutoff = time.time() - (older_than_days or 0) * 86400
+
+        def recheck(record):
+            if mode == 'full':
+                return True
+            if mode == 'failed':
+                return record['status'] is None or record['status'] in FAILED_STATUSES
+            if mode == 'stale':
+                return record['checked'] < cutoff
+            return False
+
+        return [path for path in dict.fromkeys(paths) if path not in records or recheck(records[path])]
+
+    def import_csv(self, csv_path, base_url):
+        """导入原脚本生成的CSV：重定向链未知（记为空），检查时间取文件修改时间；已有记录的路径不覆盖"""
+        checked = os.path.getmtime(csv_path)
+        rows = []
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                failed = row['status_code'] == 'CURL_ERROR'
+                target = row['target_path']
+                rows.append((
+                    base_url, row['source_path'],
+                    None if failed else int(row['status_code']),
+                    None if failed else (base_url + target if target.startswith('/') else target),
+                    '[]', 'unknown' if failed else None, checked
+                ))
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO checks VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def stats(path=STORE_FILE):
+    """按BASE_URL统计记录数、失败数与最早检查时间"""
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    for base_url, count, failed, oldest in conn.execute(
+        "SELECT base_url, COUNT(*), SUM(status IS NULL OR status IN (%s)), MIN(checked) FROM checks GROUP BY base_url"
+        % ','.join('?' * len(FAILED_STATUSES)), FAILED_STATUSES
+    ):
+        print(f"{base_url}: {count} 条, 失败 {failed} 条, 最早检查于 {time.strftime('%Y-%m-%d %H:%M', time.localtime(oldest))}")
+    for error, count in conn.execute(
+        "SELECT error_class, COUNT(*) FROM checks WHERE error_class IS NOT NULL GROUP BY error_class"
+    ):
+        print(f"  {error}: {count}")
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='重定向检查状态库')
+    parser.add_argument('command', choices=['stats'])
+    parser.add_argument('--store', default=STORE_FILE)
+    args = parser.parse_args()
+    stats(args.store)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+check_redirects.py 对本地替身服务器的端到端测试
+替身服务器提供：301→302→200重定向链、HEAD返回405而GET返回200的页面、始终503的页面、重定向环、超时的慢页面与非HTTP响应
+运行命令行脚本，逐行核对输出的CSV，并从状态库核对重定向链与错误类别
+"""
+
+import csv
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from redirect_store import RedirectStore
+
+SCRIPT = Path(__file__).resolve().parent / "check_redirects.py"
+SLOW_SECONDS = 2
+TIMEOUT = 0.5
+
+PATHS = [
+    '/chain/start.htm',
+    '/head405.htm',
+    '/unavailable.htm',
+    '/loop.htm',
+    '/slow.htm',
+    '/garbage.htm',
+    '/plain.htm'
+]
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def reply(self, status, location=None, body=b''):
+        self.send_response(status)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command == 'GET':
+            self.wfile.write(body)
+
+    def handle_any(self):
+        self.requests.append((self.command, self.path))
+        if self.path == '/chain/start.htm':
+            return self.reply(301, '/chain/middle.htm')
+        if self.path == '/chain/middle.htm':
+            return self.reply(302, f"http://{self.headers['Host']}/chain/end.htm")
+        if self.path == '/head405.htm':
+            return self.reply(405) if self.command == 'HEAD' else self.reply(200, body=b'page')
+        if self.path == '/unavailable.htm':
+            return self.reply(503)
+        if self.path == '/loop.htm':
+            return self.reply(301, '/loop.htm')
+        if self.path == '/slow.htm':
+            time.sleep(SLOW_SECONDS)
+            return self.reply(200)
+        if self.path == '/garbage.htm':
+            self.wfile.write(b'garbage\r\n\r\n')
+            self.close_connection = True
+            return
+        return self.reply(200, body=b'ok')
+
+    do_HEAD = handle_any
+    do_GET = handle_any
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(scope='module')
+def checked(base_url, tmp_path_factory):
+    """运行一次检查，返回 (CSV行, 状态库记录)"""
+    tmp = tmp_path_factory.mktemp('redirects')
+    (tmp / 'paths.txt').write_text('\n'.join(PATHS) + '\n', encoding='utf-8')
+    subprocess.run(
+        [sys.executable, str(SCRIPT), str(tmp / 'paths.txt'), '-o', str(tmp / 'redirects.csv'),
+         '--base-url', base_url, '--store', str(tmp / 'store.sqlite3'),
+         '--retries', '1', '--timeout', str(TIMEOUT)],
+        check=True, capture_output=True, timeout=60
+    )
+    with open(tmp / 'redirects.csv', 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    store = RedirectStore(tmp / 'store.sqlite3')
+    records = store.records(base_url)
+    store.close()
+    return rows, records
+
+def test_csv_rows(checked):
+    rows, _ = checked
+    assert rows == [
+        ['source_path', 'target_path', 'status_code', 'is_redirect', 'is_available'],
+        ['/chain/start.htm', '/chain/end.htm', '200', 'true', 'true'],
+        ['/head405.htm', '/head405.htm', '200', 'false', 'true'],
+        ['/unavailable.htm', '/unavailable.htm', '503', 'false', 'false'],
+        ['/loop.htm', '/loop.htm', 'CURL_ERROR', 'false', 'false'],
+        ['/slow.htm', '/slow.htm', 'CURL_ERROR', 'false', 'false'],
+        ['/garbage.htm', '/garbage.htm', 'CURL_ERROR', 'false', 'false'],
+        ['/plain.htm', '/plain.htm', '200', 'false', 'true']
+    ]
+
+def test_error_classes(checked):
+    _, records = checked
+    assert {path: record['error_class'] for path, record in records.items()} == {
+        '/chain/start.htm': None,
+        '/head405.htm': None,
+        '/unavailable.htm': None,
+        '/loop.htm': 'too_many_redirects',
+        '/slow.htm': 'timeout',
+        '/garbage.htm': 'protocol',
+        '/plain.htm': None
+    }
+
+def test_redirect_chain_hops(checked, base_url):
+    _, records = checked
+    assert records['/chain/start.htm']['hops'] == [
+        (f"{base_url}/chain/start.htm", 301),
+        (f"{base_url}/chain/middle.htm", 302),
+        (f"{base_url}/chain/end.htm", 200)
+    ]
+
+def test_head_falls_back_to_get(checked):
+    requests = [request for request in StandInHandler.requests if request[1] == '/head405.htm']
+    assert requests == [('HEAD', '/head405.htm'), ('GET', '/head405.htm')]
+
+def test_server_errors_are_retried(checked):
+    requests = [request for request in StandInHandler.requests if request[1] == '/unavailable.htm']
+    assert len(requests) == 2
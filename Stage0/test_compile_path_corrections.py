@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+compile_path_corrections.py 的测试
+用小的重定向边列表核对：链压缩（A→B→C 记为 A→C）、环检测、通向环的路径、.php/.htm别名折叠，
+并运行命令行脚本核对修正文件与写在输出旁的报告
+"""
+
+import csv
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from compile_path_corrections import alias_of, collapse, compile_corrections
+
+SCRIPT = Path(__file__).resolve().parent / "compile_path_corrections.py"
+BASE_URL = 'https://www.omniglot.com'
+
+def rows(*redirects, available=()):
+    """(源, 目标) 重定向与可用页面 -> read_results 形式的检查结果
+    不测别名折叠的用例使用没有.php/.htm后缀的路径"""
+    results = {}
+    for source, target in redirects:
+        results[source] = {'source_path': source, 'target_path': target, 'status_code': '200',
+                           'is_redirect': 'true', 'is_available': 'false'}
+    for path in available:
+        results[path] = {'source_path': path, 'target_path': path, 'status_code': '200',
+                         'is_redirect': 'false', 'is_available': 'true'}
+    return results
+
+def test_collapse_chain():
+    final, cycles, leading = collapse({'/a.htm': '/b.htm', '/b.htm': '/c.htm', '/x.htm': '/c.htm'})
+    assert final == {'/a.htm': '/c.htm', '/b.htm': '/c.htm', '/x.htm': '/c.htm'}
+    assert cycles == [] and leading == {}
+
+def test_collapse_cycle():
+    final, cycles, leading = collapse({'/a.htm': '/b.htm', '/b.htm': '/a.htm'})
+    assert final == {'/a.htm': None, '/b.htm': None}
+    assert cycles == [['/a.htm', '/b.htm', '/a.htm']]
+    assert leading == {}
+
+def test_collapse_self_loop():
+    final, cycles, _ = collapse({'/loop.htm': '/loop.htm'})
+    assert final == {'/loop.htm': None}
+    assert cycles == [['/loop.htm', '/loop.htm']]
+
+def test_collapse_paths_leading_into_cycle():
+    # 无论先遍历环上的节点还是通向环的节点，结果相同
+    for edges in ({'/in.htm': '/a.htm', '/a.htm': '/b.htm', '/b.htm': '/a.htm', '/in2.htm': '/in.htm'},
+                  {'/a.htm': '/b.htm', '/b.htm': '/a.htm', '/in2.htm': '/in.htm', '/in.htm': '/a.htm'}):
+        final, cycles, leading = collapse(edges)
+        assert all(end is None for end in final.values())
+        assert len(cycles) == 1 and set(cycles[0]) == {'/a.htm', '/b.htm'}
+        assert set(leading) == {'/in.htm', '/in2.htm'}
+        assert leading['/in2.htm'] == cycles[0]
+
+def test_alias_of():
+    assert alias_of('/writing/aari.php') == '/writing/aari.htm'
+    assert alias_of('/writing/aari.htm') == '/writing/aari.php'
+    assert alias_of('/charts/aari.xls') is None
+
+def test_corrections_collapse_and_availability():
+    results = rows(('/a', '/b'), ('/b', '/c'), ('/dead', '/missing'), available=['/c'])
+    corrections, report = compile_corrections(results)
+    assert corrections == {'/a': '/c', '/b': '/c'}
+    assert report['collapsed_chains'] == 1
+    assert report['unavailable_targets'] == {'/dead': '/missing'}
+
+def test_corrections_fold_aliases():
+    results = rows(('/writing/old.php', '/writing/new.htm'), ('/writing/checked.php', '/writing/new.htm'),
+                   available=['/writing/new.htm', '/writing/checked.htm'])
+    corrections, report = compile_corrections(results)
+    # 未检查过的别名跟随源路径，检查过的别名以它自己的结果为准
+    assert report['alias_corrections'] == {'/writing/old.htm': '/writing/new.htm'}
+    assert corrections == {
+        '/writing/checked.php': '/writing/new.htm',
+        '/writing/old.htm': '/writing/new.htm',
+        '/writing/old.php': '/writing/new.htm'
+    }
+
+def test_corrections_skip_cycles_and_external_targets():
+    results = rows(('/a.htm', '/b.htm'), ('/b.htm', '/a.htm'), ('/in.htm', '/a.htm'),
+                   ('/away.htm', 'https://example.com/page'))
+    corrections, report = compile_corrections(results)
+    assert corrections == {}
+    assert report['leading_into_cycles'] == {'/in.htm': ['/a.htm', '/b.htm', '/a.htm']}
+    assert report['external_targets'] == {'/away.htm': 'https://example.com/page'}
+
+def test_store_hops_add_intermediate_edges():
+    results = rows(('/a', '/c'), available=['/c'])
+    hops = [{'hops': [(f"{BASE_URL}/a", 301), (f"{BASE_URL}/b", 302), (f"{BASE_URL}/c", 200)]}]
+    corrections, report = compile_corrections(results, hops)
+    assert corrections == {'/a': '/c', '/b': '/c'}
+    assert report['redirect_edges'] == 2
+
+def test_cli_writes_report_beside_output(tmp_path):
+    with open(tmp_path / 'redirects.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, ['source_path', 'target_path', 'status_code', 'is_redirect', 'is_available'])
+        writer.writeheader()
+        writer.writerows(rows(('/a', '/b'), ('/b', '/c'), ('/x', '/x'), available=['/c']).values())
+    output = tmp_path / 'out' / 'corrections.json'
+    output.parent.mkdir()
+    subprocess.run([sys.executable, str(SCRIPT), str(tmp_path / 'redirects.csv'), '-o', str(output)],
+                   check=True, capture_output=True, cwd=tmp_path, timeout=60)
+    assert json.loads(output.read_text(encoding='utf-8')) == {'/a': '/c', '/b': '/c'}
+    report = json.loads((output.parent / 'corrections_report.json').read_text(encoding='utf-8'))
+    assert report['cycles'] == [['/x', '/x']]
+    assert report['corrections'] == 2
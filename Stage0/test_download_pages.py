@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+download_pages.py 对本地替身服务器的测试
+替身服务器按ETag或Last-Modified回答条件请求，另有先返回429/503（带Retry-After）后返回200的页面
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import download_pages
+from download_pages import HostThrottle, PageDownloader
+
+SCRIPT = Path(__file__).resolve().parent / "download_pages.py"
+LAST_MODIFIED = formatdate(1700000000, usegmt=True)
+RETRY_AFTER = 2
+
+PAGES = {
+    '/writing/etag.htm': b'<html>etag</html>',
+    '/charts/table.xls': b'xls' * 100,
+    '/alphabets/modified.htm': b'<html>modified</html>'
+}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def reply(self, status, headers=(), body=b''):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.requests.append((time.monotonic(), self.path, dict(self.headers)))
+        attempts = sum(1 for _, path, _ in self.requests if path == self.path)
+        if self.path in ('/writing/busy429.htm', '/writing/busy503.htm') and attempts == 1:
+            status = 429 if '429' in self.path else 503
+            return self.reply(status, [('Retry-After', str(RETRY_AFTER))])
+        if self.path.startswith('/writing/busy'):
+            return self.reply(200, body=b'busy')
+        body = PAGES.get(self.path)
+        if body is None:
+            return self.reply(404)
+        if self.path == '/alphabets/modified.htm':
+            if self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                return self.reply(304)
+            return self.reply(200, [('Last-Modified', LAST_MODIFIED)], body)
+        etag = f'"{len(body)}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.reply(304, [('ETag', etag)])
+        return self.reply(200, [('ETag', etag)], body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def requests_for(path, since):
+    return [headers for started, request_path, headers in StandInHandler.requests
+            if request_path == path and started >= since]
+
+def download(base_url, output_dir, metadata, links, **options):
+    downloader = PageDownloader(output_dir, metadata, base_url, throttle=HostThrottle(0), retries=1, **options)
+    return asyncio.run(downloader.download_all(links))
+
+def test_first_fetch_stores_validators(base_url, tmp_path):
+    metadata = {}
+    counts = download(base_url, tmp_path, metadata, list(PAGES))
+    assert counts == {'downloaded': 3, 'not_modified': 0, 'http_error': 0, 'failed': 0}
+    assert (tmp_path / 'writing' / 'etag.htm').read_bytes() == PAGES['/writing/etag.htm']
+    assert (tmp_path / 'charts' / 'table.xls').read_bytes() == PAGES['/charts/table.xls']
+    assert (tmp_path / 'alphabets' / 'modified.htm').read_bytes() == PAGES['/alphabets/modified.htm']
+    assert metadata['/writing/etag.htm']['etag'] == f'"{len(PAGES["/writing/etag.htm"])}"'
+    assert metadata['/alphabets/modified.htm']['last_modified'] == LAST_MODIFIED
+
+def test_second_run_revalidates(base_url, tmp_path):
+    metadata = {}
+    download(base_url, tmp_path, metadata, list(PAGES))
+    since = time.monotonic()
+    counts = download(base_url, tmp_path, metadata, list(PAGES))
+    assert counts == {'downloaded': 0, 'not_modified': 3, 'http_error': 0, 'failed': 0}
+    [etag_request] = requests_for('/writing/etag.htm', since)
+    assert etag_request['If-None-Match'] == metadata['/writing/etag.htm']['etag']
+    [modified_request] = requests_for('/alphabets/modified.htm', since)
+    assert modified_request['If-Modified-Since'] == LAST_MODIFIED
+
+def test_not_modified_clears_previous_error(base_url, tmp_path):
+    metadata = {}
+    download(base_url, tmp_path, metadata, ['/writing/etag.htm'])
+    metadata['/writing/etag.htm']['error_class'] = 'timeout'
+    assert download(base_url, tmp_path, metadata, ['/writing/etag.htm'])['not_modified'] == 1
+    assert 'error_class' not in metadata['/writing/etag.htm']
+
+def test_force_bypasses_revalidation(base_url, tmp_path):
+    links = tmp_path / 'links.txt'
+    links.write_text('\n'.join(PAGES) + '\n', encoding='utf-8')
+    command = [sys.executable, str(SCRIPT), '-d', str(tmp_path / 'out'), '--list', str(links),
+               '--metadata', str(tmp_path / 'metadata.json'), '--base-url', base_url, '--rate', '0']
+    subprocess.run(command, check=True, capture_output=True, timeout=60)
+    since = time.monotonic()
+    output = subprocess.run(command + ['--force'], check=True, capture_output=True, text=True, timeout=60).stdout
+    assert '已下载: 3 个' in output
+    for path in PAGES:
+        [request] = requests_for(path, since)
+        assert 'If-None-Match' not in request and 'If-Modified-Since' not in request
+
+@pytest.mark.parametrize('path', ['/writing/busy429.htm', '/writing/busy503.htm'])
+def test_retry_after_defers_the_host(base_url, tmp_path, path):
+    since = time.monotonic()
+    counts = download(base_url, tmp_path, {}, [path])
+    assert counts['downloaded'] == 1
+    attempts = [started for started, request_path, _ in StandInHandler.requests
+                if request_path == path and started >= since]
+    assert len(attempts) == 2
+    # 退避只有1秒，第二次请求推迟到Retry-After之后说明限速器按服务器要求推迟了该主机
+    assert attempts[1] - attempts[0] >= RETRY_AFTER - 0.1
+
+def test_metadata_checkpoints_during_crawl(base_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(download_pages, 'SAVE_EVERY', 1)
+    metadata = {}
+    saved = []
+    downloader = PageDownloader(tmp_path, metadata, base_url, throttle=HostThrottle(0))
+    asyncio.run(downloader.download_all(list(PAGES), concurrency=1,
+                                        checkpoint=lambda: saved.append(json.dumps(metadata, sort_keys=True))))
+    assert [len(json.loads(snapshot)) for snapshot in saved] == [1, 2, 3]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+mirror_store.py 的测试
+内容相同的两个路径共用一个blob、changed按内容比较、read_text解码、从普通目录导入并导出回同样的布局
+"""
+
+import gzip
+
+import pytest
+
+from mirror_store import MirrorStore, content_hash, mirror_path
+
+PAGE = '<html>Aari — ʔ</html>'.encode('utf-8')
+CHART = b'xls' * 1000
+
+@pytest.fixture
+def store(tmp_path):
+    store = MirrorStore(tmp_path / 'mirror')
+    yield store
+    store.close()
+
+def test_mirror_path():
+    assert mirror_path('writing/aari.htm') == '/writing/aari.htm'
+    assert mirror_path('/writing/aari.htm') == '/writing/aari.htm'
+
+def test_same_bytes_share_one_blob(store):
+    first = store.put('/charts/aari.xls', CHART, fetched=100.0, status=200, etag='"1"')
+    second = store.put('charts/aari-copy.xls', CHART)
+    store.put('/writing/aari.htm', PAGE)
+    assert first == second == content_hash(CHART)
+    assert store.stats()['files'] == 3 and store.stats()['blobs'] == 2
+    assert [path.name for path in (store.root / 'blobs').rglob('*.gz')].count(f"{first}.gz") == 1
+    with gzip.open(store.blob_path(first), 'rb') as f:
+        assert f.read() == CHART
+    assert store.info('/charts/aari.xls') == {
+        'path': '/charts/aari.xls', 'sha256': first, 'size': len(CHART), 'fetched': 100.0,
+        'status': 200, 'etag': '"1"', 'last_modified': None, 'final_url': None
+    }
+
+def test_changed_compares_content(store):
+    assert store.changed('/writing/aari.htm', PAGE)
+    store.put('/writing/aari.htm', PAGE)
+    assert not store.changed('/writing/aari.htm', PAGE)
+    assert store.changed('/writing/aari.htm', PAGE + b'\n')
+
+def test_read_bytes_and_text(store):
+    store.put('/writing/aari.htm', PAGE)
+    assert store.exists('writing/aari.htm')
+    assert store.read_bytes('/writing/aari.htm') == PAGE
+    assert store.read_text('/writing/aari.htm') == PAGE.decode('utf-8')
+    assert store.read_text('/writing/aari.htm', 'ascii', 'replace').startswith('<html>Aari ')
+    assert not store.exists('/writing/missing.htm')
+    with pytest.raises(FileNotFoundError):
+        store.read_bytes('/writing/missing.htm')
+
+def test_import_and_export_plain_layout(store, tmp_path):
+    source = tmp_path / 'site'
+    (source / 'writing').mkdir(parents=True)
+    (source / 'charts').mkdir()
+    (source / 'writing' / 'aari.htm').write_bytes(PAGE)
+    (source / 'writing' / 'aari.htm.part').write_bytes(b'partial')
+    (source / 'charts' / 'aari.xls').write_bytes(CHART)
+    (source / 'charts' / 'aari.xlsx').write_bytes(CHART)
+    metadata = {'/writing/aari.htm': {'downloaded': 5.0, 'status': 200, 'etag': '"e"'}}
+    assert store.import_dir(source, metadata) == (3, 2)
+    assert store.paths() == ['/charts/aari.xls', '/charts/aari.xlsx', '/writing/aari.htm']
+    assert store.info('/writing/aari.htm')['etag'] == '"e"'
+
+    exported = tmp_path / 'exported'
+    assert store.export(exported, prefix='/charts/') == 2
+    assert sorted(str(path.relative_to(exported)) for path in exported.rglob('*') if path.is_file()) == [
+        'charts/aari.xls', 'charts/aari.xlsx'
+    ]
+    assert store.export(exported) == 3
+    assert (exported / 'writing' / 'aari.htm').read_bytes() == PAGE
+    assert (exported / 'charts' / 'aari.xlsx').read_bytes() == CHART
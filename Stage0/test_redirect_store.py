@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+redirect_store.py 的测试
+临时状态库中放入检查时间固定的记录，核对四种重查模式（unseen、failed、stale、full）选出的路径，
+以及原脚本CSV导入状态库后再按原格式写回的往返结果
+"""
+
+import io
+import os
+import time
+
+import pytest
+
+from check_redirects import csv_row, write_csv
+from redirect_store import RedirectStore
+
+BASE_URL = 'https://www.omniglot.com'
+NOW = time.time()
+DAY = 86400
+
+def record(path, status, days_ago, final_path=None, error_class=None):
+    return {
+        'base_url': BASE_URL,
+        'path': path,
+        'status': status,
+        'final_url': None if status is None else BASE_URL + (final_path or path),
+        'hops': [] if status is None else [(BASE_URL + path, status)],
+        'error_class': error_class,
+        'checked': NOW - days_ago * DAY
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    store = RedirectStore(tmp_path / 'store.sqlite3')
+    for item in (
+        record('/fresh.htm', 200, 1),
+        record('/old.htm', 200, 40),
+        record('/timeout.htm', None, 2, error_class='timeout'),
+        record('/busy.htm', 503, 3),
+        record('/missing.htm', 404, 50)
+    ):
+        store.put(item)
+    yield store
+    store.close()
+
+PATHS = ['/new.htm', '/fresh.htm', '/old.htm', '/timeout.htm', '/busy.htm', '/missing.htm', '/new.htm']
+
+@pytest.mark.parametrize('mode, older_than, expected', [
+    ('unseen', None, ['/new.htm']),
+    ('failed', None, ['/new.htm', '/timeout.htm', '/busy.htm']),
+    ('stale', 30, ['/new.htm', '/old.htm', '/missing.htm']),
+    ('stale', 45, ['/new.htm', '/missing.htm']),
+    ('full', None, ['/new.htm', '/fresh.htm', '/old.htm', '/timeout.htm', '/busy.htm', '/missing.htm'])
+])
+def test_select_modes(store, mode, older_than, expected):
+    assert store.select(BASE_URL, PATHS, mode, older_than) == expected
+
+def test_records_are_scoped_by_base_url(store):
+    assert store.records('http://127.0.0.1:8000') == {}
+    assert store.select('http://127.0.0.1:8000', ['/fresh.htm'], 'unseen') == ['/fresh.htm']
+    assert set(store.records(BASE_URL, ['/fresh.htm', '/new.htm'])) == {'/fresh.htm'}
+
+def test_put_round_trip(store):
+    saved = store.records(BASE_URL)['/old.htm']
+    assert saved == record('/old.htm', 200, 40) | {'hops': [(BASE_URL + '/old.htm', 200)]}
+
+CSV_TEXT = (
+    "source_path,target_path,status_code,is_redirect,is_available\n"
+    "/a.htm,/b.htm,200,true,true\n"
+    "/c.htm,/c.htm,404,false,false\n"
+    "/d.htm,/d.htm,CURL_ERROR,false,false\n"
+    "/e.htm,https://example.com/e,200,true,true\n"
+)
+
+def test_import_csv_round_trip(tmp_path):
+    csv_path = tmp_path / 'redirects.csv'
+    csv_path.write_text(CSV_TEXT, encoding='utf-8')
+    os.utime(csv_path, (NOW - 10 * DAY, NOW - 10 * DAY))
+    store = RedirectStore(tmp_path / 'store.sqlite3')
+    assert store.import_csv(csv_path, BASE_URL) == 4
+    records = store.records(BASE_URL)
+    assert records['/d.htm']['status'] is None and records['/d.htm']['error_class'] == 'unknown'
+    assert all(item['checked'] == pytest.approx(NOW - 10 * DAY) for item in records.values())
+
+    output = io.StringIO()
+    write_csv([csv_row(records[path]) for path in ['/a.htm', '/c.htm', '/d.htm', '/e.htm']], output)
+    assert output.getvalue() == CSV_TEXT
+
+    # 重新导入不覆盖已有记录，导入的时间参与stale模式
+    store.put(record('/a.htm', 200, 0))
+    assert store.import_csv(csv_path, BASE_URL) == 0
+    assert store.records(BASE_URL)['/a.htm']['final_url'] == BASE_URL + '/a.htm'
+    assert store.select(BASE_URL, ['/a.htm', '/c.htm'], 'stale', 7) == ['/c.htm']
+    assert store.select(BASE_URL, ['/a.htm', '/c.htm', '/d.htm'], 'failed') == ['/d.htm']
+    store.close()
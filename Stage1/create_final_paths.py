@@ -6,7 +6,6 @@
 
 import json
 import sys
-from pathlib import Path
 
 def create_final_paths(input_file='paths_raw.json', corrections_file=None, output_file='paths_final.json'):
     """处理路径字段清理和sources合并"""
@@ -17,9 +16,9 @@ def create_final_paths(input_file='paths_raw.json', corrections_file=None, outpu
     
     print(f"原始条目数: {len(paths)}")
     
-    # 读取路径修正规则（如果有）
+    # 读取路径修正规则（由Stage0/compile_path_corrections.py编译，链已压缩为直达）
     path_corrections = {}
-    if corrections_file and Path(corrections_file).exists():
+    if corrections_file:
         with open(corrections_file, 'r', encoding='utf-8') as f:
             path_corrections = json.load(f)
         print(f"加载路径修正规则: {len(path_corrections)} 个")
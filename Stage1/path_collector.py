@@ -3,19 +3,37 @@
 """
 路径收集与验证器
 收集所有源文件中的路径，处理Fragment，检查文件存在性
+文件存在性默认检查input_dir下的本地文件；给定镜像存储目录时改为查镜像索引（Stage0/mirror_store.py）
+用法: python3 path_collector.py [../Stage0/mirror]
 """
 
 import csv
+import importlib.util
 import json
 import os
+import sys
 from typing import List, Dict, Optional
 from pathlib import Path
 from urllib.parse import urljoin
 
+STAGE0_DIR = Path(__file__).resolve().parent.parent / "Stage0"
+
+def import_from(directory, name):
+    """按文件路径导入另一个阶段目录中的模块：只加载该文件，不改动sys.path"""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, Path(directory) / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+MirrorStore = import_from(STAGE0_DIR, 'mirror_store').MirrorStore
+
 class PathCollector:
-    def __init__(self, base_dir: str = ".", input_dir: str = None):
+    def __init__(self, base_dir: str = ".", input_dir: str = None, mirror: Optional[MirrorStore] = None):
         self.base_dir = Path(base_dir)
         self.input_dir = Path(input_dir) if input_dir else self.base_dir
+        self.mirror = mirror
         self.language_dir = self.base_dir / "language"
         self.writing_dir = self.base_dir / "writing"
         
@@ -50,6 +68,9 @@ class PathCollector:
         else:
             relative_path = absolute_url
             
+        if self.mirror:
+            return self.mirror.exists(relative_path)
+        
         # 构建完整的本地文件路径
         local_file_path = self.input_dir / relative_path
         
@@ -308,5 +329,6 @@ class PathCollector:
 
 if __name__ == "__main__":
     # 输入从Stage0读取，输出到当前目录(stage1)
-    collector = PathCollector(".", "../Stage0")
+    mirror = MirrorStore(sys.argv[1]) if len(sys.argv) > 1 else None
+    collector = PathCollector(".", "../Stage0", mirror)
     collector.run()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+path_collector.py 的测试
+文件存在性检查在本地目录与镜像存储（按文件路径从Stage0导入的mirror_store）两种方式下结果一致
+"""
+
+from path_collector import STAGE0_DIR, MirrorStore, PathCollector
+
+def test_mirror_store_comes_from_stage0():
+    import mirror_store
+    assert mirror_store.__file__ == str(STAGE0_DIR / "mirror_store.py")
+    assert MirrorStore is mirror_store.MirrorStore
+
+def test_check_file_exists_local_and_mirror(tmp_path):
+    (tmp_path / 'writing').mkdir()
+    (tmp_path / 'writing' / 'aari.htm').write_bytes(b'<html></html>')
+    mirror = MirrorStore(tmp_path / 'mirror')
+    mirror.put('/writing/aari.htm', b'<html></html>')
+    for collector in (PathCollector(tmp_path, tmp_path), PathCollector(tmp_path, tmp_path, mirror)):
+        assert collector.check_file_exists('aari.htm')
+        assert collector.check_file_exists('/writing/aari.htm#top')
+        assert not collector.check_file_exists('missing.htm')
+    mirror.close()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO 639-3模糊匹配策略的基准测试
+固定的标签样本（取自Stage1/paths_final.json，由 fixture 子命令生成一次后不再变化）及其10倍、100倍合成扩充集
+（对原标签做删字、换字、相邻交换、词序调换等确定性扰动）上，逐个匹配器测量：
+吞吐量、单标签延迟p50/p99、构建与匹配样本时的峰值内存（tracemalloc），以及与暴力基线的top-1/top-3一致率
+只比较模糊打分本身，不走精确查找快速路径与匹配缓存；ISO目录（含随目录预编译的索引）在计时与内存测量之前加载一次，
+构建时间与峰值内存只计匹配器自己构建的结构与匹配过程
+用法: python benchmark.py fixture
+      python benchmark.py run [--scales 1 10 100] [--matchers ...] [--output benchmark_results.json] [--compare 旧结果.json]
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from iso_catalog import load_catalog, normalize_name
+from lsh_index import percentile
+
+STAGE1_DIR = Path(__file__).resolve().parent.parent / "Stage1"
+FIXTURE_FILE = 'benchmark_fixture.json'
+RESULTS_FILE = 'benchmark_results.json'
+FIXTURE_SIZE = 200
+SEED = 20240501
+TOP_N = 3
+
+def create_fixture(size=FIXTURE_SIZE, seed=SEED):
+    """从paths_final.json的标签中按固定种子抽样"""
+    with open(STAGE1_DIR / "paths_final.json", 'r', encoding='utf-8') as f:
+        paths = json.load(f)
+    labels = sorted({source['label'] for path in paths for source in path['sources']
+                     if normalize_name(source['label'])})
+    return {
+        'source': 'Stage1/paths_final.json',
+        'seed': seed,
+        'labels': sorted(random.Random(seed).sample(labels, size))
+    }
+
+def perturb(label, rng):
+    """对标准化标签做一次随机扰动"""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    tokens = label.split()
+    kind = rng.randrange(5)
+    if kind == 3 and len(tokens) > 1:
+        rng.shuffle(tokens)
+        return ' '.join(tokens)
+    if kind == 4:
+        return f"{label} {rng.choice(['language', 'dialect', 'script', 'people'])}"
+    if len(label) < 3:
+        return label + rng.choice(letters)
+    i = rng.randrange(len(label) - 1)
+    if kind == 0:
+        return label[:i] + label[i + 1:]
+    if kind == 1:
+        return label[:i] + rng.choice(letters) + label[i + 1:]
+    return label[:i] + label[i + 1] + label[i] + label[i + 2:]
+
+def scaled_labels(labels, scale, seed=SEED):
+    """scale倍扩充：每个原标签保留一份，其余为扰动变体（扰动可叠加，变体再做一次标准化）"""
+    rng = random.Random(f"{seed}-{scale}")
+    result = []
+    for label in labels:
+        result.append(label)
+        variant = label
+        for _ in range(scale - 1):
+            variant = normalize_name(perturb(variant if rng.random() < 0.5 else label, rng)) or label
+            result.append(variant)
+    return result
+
+def ranked(matches):
+    """按分数降序（同分保持目录顺序）取前TOP_N个代码"""
+    return [match['iso_code'] for match in sorted(matches, key=lambda m: m['score'], reverse=True)[:TOP_N]]
+
+def iso_mapper_matcher(generator, edit_distance=False):
+    def build(catalog):
+        from iso_mapper import ISOMapper
+        mapper = ISOMapper()
+        mapper.candidate_generator = generator
+        mapper.use_edit_distance = edit_distance
+        mapper.load_iso_standards(catalog)
+        return lambda label: ranked(mapper.score_language_label(label))
+    return build
+
+def manual_matcher(catalog):
+    from manual_iso_mapping import build_scorer, score_label
+    scorer = build_scorer(catalog['iso639'])
+    return lambda label: ranked(score_label(label, catalog['iso639'], scorer, catalog['iso639_index']))
+
+def tfidf_matcher(rescore):
+    def build(catalog):
+        from optimized_iso_mapper import OptimizedISOMapper, RESCORE_THRESHOLD, TFIDF_THRESHOLD
+        mapper = OptimizedISOMapper()
+        mapper.iso639_codes = catalog['iso639']
+        mapper.iso15924_codes = catalog['iso15924']
+        mapper.build_matchers()
+        threshold = RESCORE_THRESHOLD if rescore else TFIDF_THRESHOLD
+        fields = ('print_name', 'inverted_name')
+
+        def match(label):
+            records = mapper.match_labels([label], mapper.iso639_matcher, mapper.iso639_codes, fields, rescore)[label]
+            return ranked(record for record in records if record['score'] >= threshold)
+        return match
+    return build
+
+# 暴力基线在前：其余匹配器的一致率都相对它计算
+MATCHERS = {
+    'brute_force': iso_mapper_matcher('brute_force'),
+    'ngram': iso_mapper_matcher('ngram'),
+    'lsh': iso_mapper_matcher('lsh'),
+    'ngram+edit': iso_mapper_matcher('ngram', edit_distance=True),
+    'manual_iso_mapping': manual_matcher,
+    'tfidf': tfidf_matcher(rescore=False),
+    'tfidf+rescore': tfidf_matcher(rescore=True)
+}
+
+def build_quietly(build, catalog):
+    """构建匹配器，屏蔽加载时的打印"""
+    with redirect_stdout(io.StringIO()):
+        return build(catalog)
+
+def measure_memory(build, catalog, labels):
+    """构建匹配器并匹配一遍样本时的tracemalloc峰值（单独一遍，不计入延迟；目录已在测量前加载）"""
+    tracemalloc.start()
+    match = build_quietly(build, catalog)
+    for label in labels:
+        match(label)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def run_matcher(match, labels):
+    """逐标签匹配，返回结果与各标签延迟"""
+    results = []
+    latencies = []
+    for label in labels:
+        start = time.perf_counter()
+        results.append(match(label))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+def agreement(results, baseline):
+    """top-1：首选代码与基线相同（都无匹配也算一致）；top-3：基线首选出现在前3个中（只计基线有匹配的标签）"""
+    top1 = sum((result[:1] == expected[:1]) for result, expected in zip(results, baseline))
+    with_match = [(result, expected) for result, expected in zip(results, baseline) if expected]
+    top3 = sum(expected[0] in result for result, expected in with_match)
+    return {
+        'top1': top1 / len(baseline),
+        'top3': top3 / len(with_match) if with_match else 1.0
+    }
+
+def benchmark(fixture, scales, names):
+    start = time.perf_counter()
+    catalog = load_catalog()
+    catalog_seconds = time.perf_counter() - start
+    print(f"ISO目录加载 {catalog_seconds:.2f}s（不计入各匹配器的构建时间与峰值内存）")
+    labels = [normalize_name(label) for label in fixture['labels']]
+    datasets = {f"{scale}x": scaled_labels(labels, scale) for scale in scales}
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'fixture': {'source': fixture['source'], 'seed': fixture['seed'], 'labels': len(labels)},
+        'datasets': {name: len(data) for name, data in datasets.items()},
+        'catalog_seconds': catalog_seconds,
+        'matchers': {}
+    }
+    baselines = {}
+    for name in ['brute_force'] + [name for name in names if name != 'brute_force']:
+        build = MATCHERS[name]
+        start = time.perf_counter()
+        match = build_quietly(build, catalog)
+        build_seconds = time.perf_counter() - start
+        entry = {'build_seconds': build_seconds, 'peak_memory_bytes': measure_memory(build, catalog, labels),
+                 'datasets': {}}
+        for dataset, data in datasets.items():
+            start = time.perf_counter()
+            results, latencies = run_matcher(match, data)
+            elapsed = time.perf_counter() - start
+            if name == 'brute_force':
+                baselines[dataset] = results
+            latencies.sort()
+            entry['datasets'][dataset] = dict(
+                labels=len(data),
+                seconds=elapsed,
+                labels_per_second=len(data) / elapsed,
+                p50_ms=percentile(latencies, 0.5) * 1000,
+                p99_ms=percentile(latencies, 0.99) * 1000,
+                **agreement(results, baselines[dataset])
+            )
+            row = entry['datasets'][dataset]
+            print(f"{name:20s} {dataset:>5s}: {row['labels_per_second']:9.1f} 标签/秒, p50 {row['p50_ms']:.2f}ms, "
+                  f"p99 {row['p99_ms']:.2f}ms, top-1 {row['top1']:.1%}, top-3 {row['top3']:.1%}")
+        print(f"{name:20s} 构建 {build_seconds:.2f}s, 峰值内存 {entry['peak_memory_bytes'] / 2**20:.1f} MiB")
+        report['matchers'][name] = entry
+    return report
+
+def compare(report, previous):
+    """与上一次结果逐项对比吞吐量与一致率"""
+    print(f"\n=== 与 {previous['created']} 的结果对比 ===")
+    for name, entry in report['matchers'].items():
+        for dataset, row in entry['datasets'].items():
+            old = previous['matchers'].get(name, {}).get('datasets', {}).get(dataset)
+            if old is None:
+                continue
+            print(f"{name:20s} {dataset:>5s}: 吞吐量 {row['labels_per_second'] / old['labels_per_second'] - 1:+.1%}, "
+                  f"p99 {row['p99_ms'] - old['p99_ms']:+.2f}ms, top-1 {row['top1'] - old['top1']:+.1%}, "
+                  f"top-3 {row['top3'] - old['top3']:+.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description='ISO 639-3模糊匹配策略基准测试')
+    parser.add_argument('command', choices=['fixture', 'run'],
+                        help='fixture: 重新抽样生成固定样本; run: 运行基准测试')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='合成扩充倍数')
+    parser.add_argument('--matchers', nargs='+', choices=list(MATCHERS), default=list(MATCHERS))
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--compare', metavar='FILE', help='与之前的结果文件对比')
+    args = parser.parse_args()
+
+    if args.command == 'fixture':
+        fixture = create_fixture()
+        with open(FIXTURE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, ensure_ascii=False, indent=2)
+        print(f"已抽取 {len(fixture['labels'])} 个标签到: {FIXTURE_FILE}")
+        return
+
+    with open(FIXTURE_FILE, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+    report = benchmark(fixture, args.scales, args.matchers)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
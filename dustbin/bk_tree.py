@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO名称编辑距离BK树
+短名称上SequenceMatcher的ratio对一两个字符的拼写差异过于敏感（如"Sylheti"与"Syloti"），
+BK树利用编辑距离的三角不等式，只访问可能落在距离k以内的子树
+直接运行时在实体标签上与线性扫描核对结果并比较查询延迟
+"""
+
+MAX_LABEL_LENGTH = 16  # 更长的标签交给ratio打分
+
+def edit_budget(length):
+    """按标签长度允许的最大编辑距离：过短的名称不做模糊匹配"""
+    if length < 4:
+        return 0
+    if length < 7:
+        return 1
+    return 2
+
+def levenshtein(a, b, limit=None):
+    """编辑距离；给出limit时，一旦可证明超过limit即返回limit + 1"""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        left = i
+        for j, char_b in enumerate(b):
+            left = min(previous[j + 1] + 1, left + 1, previous[j] + (char_a != char_b))
+            current.append(left)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def edit_similarity(a, b, distance):
+    """编辑距离换算的相似度，与ratio同在[0, 1]区间"""
+    return 1.0 - distance / max(len(a), len(b), 1)
+
+class BKTree:
+    """键到若干文本的BK树；节点为去重后的文本，以扁平列表存放，便于pickle
+    编辑距离不小于长度差，因此按文本长度各建一棵子树，查询只进入长度差不超过k的子树"""
+
+    def __init__(self, entries):
+        """entries: 可迭代的 (key, text)，同一文本可对应多个key"""
+        self.texts = []
+        self.text_keys = []
+        self.children = []
+        self.roots = {}
+        self.distance_calls = 0
+        text_ids = {}
+        for key, text in entries:
+            if text in text_ids:
+                self.text_keys[text_ids[text]].append(key)
+                continue
+            text_ids[text] = len(self.texts)
+            self.texts.append(text)
+            self.text_keys.append([key])
+            self.children.append({})
+            self.insert(text_ids[text])
+
+    def insert(self, text_id):
+        text = self.texts[text_id]
+        node = self.roots.setdefault(len(text), text_id)
+        if node == text_id:
+            return
+        while True:
+            distance = levenshtein(text, self.texts[node])
+            child = self.children[node].get(distance)
+            if child is None:
+                self.children[node][distance] = text_id
+                return
+            node = child
+
+    def within(self, text, k):
+        """返回编辑距离不超过k的 [(key, 名称, 距离)]，按距离、再按插入顺序排列"""
+        hits = []
+        stack = [self.roots[length] for length in range(len(text) - k, len(text) + k + 1) if length in self.roots]
+        while stack:
+            node = stack.pop()
+            # 距离超过 k + 最大边 时任何子树都不可能有结果，无需算出精确值
+            children = self.children[node]
+            distance = levenshtein(text, self.texts[node], k + max(children, default=0))
+            self.distance_calls += 1
+            if distance <= k:
+                hits.append((distance, node))
+            # 三角不等式：只有边距离在[d-k, d+k]内的子树可能含有结果
+            for edge, child in children.items():
+                if distance - k <= edge <= distance + k:
+                    stack.append(child)
+        hits.sort()
+        return [(key, self.texts[node], distance) for distance, node in hits for key in self.text_keys[node]]
+
+def linear_within(entries, text, k):
+    """线性扫描基线，返回与BKTree.within相同形式的结果集合"""
+    hits = set()
+    for key, name in entries:
+        distance = levenshtein(text, name, k)
+        if distance <= k:
+            hits.add((key, name, distance))
+    return hits
+
+def main():
+    """实体标签上BK树与线性扫描的一致性核对与查询延迟"""
+    import json
+    import time
+    from iso_catalog import load_catalog, normalize_name
+    from lsh_index import percentile
+
+    with open('entity_analysis_report.json', 'r', encoding='utf-8') as f:
+        entities = json.load(f)['entities']
+    labels = sorted({normalize_name(label) for entity in entities.values() for label in entity['labels']})
+    labels = [label for label in labels if edit_budget(len(label)) and len(label) <= MAX_LABEL_LENGTH]
+    catalog = load_catalog()
+
+    for standard, fields in (('iso15924', ('english_name_norm', 'alias_norm')),
+                             ('iso639', ('print_name_norm', 'inverted_name_norm'))):
+        entries = [((code, field), data[field]) for code, data in catalog[standard].items()
+                   for field in fields if data[field]]
+        tree = catalog[f"{standard}_bktree"]
+        tree.distance_calls = 0
+        tree_times, linear_times = [], []
+        mismatches = 0
+        for label in labels:
+            k = edit_budget(len(label))
+            start = time.perf_counter()
+            tree_hits = tree.within(label, k)
+            tree_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            linear_hits = linear_within(entries, label, k)
+            linear_times.append(time.perf_counter() - start)
+            mismatches += set(tree_hits) != linear_hits
+
+        print(f"{standard}: {len(tree.texts)} 个名称, {len(labels)} 个短标签, 不一致 {mismatches}")
+        print(f"  每次查询平均计算距离 {tree.distance_calls / len(labels):.0f} 次（线性扫描 {len(entries)} 次）")
+        for name, times in (('BK树', tree_times), ('线性扫描', linear_times)):
+            times.sort()
+            print(f"  {name}: p50 {percentile(times, 0.5) * 1000:.3f}ms, "
+                  f"p99 {percentile(times, 0.99) * 1000:.3f}ms, 总计 {sum(times):.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+带上界剪枝的SequenceMatcher阈值打分器
+依次用长度比上界（即real_quick_ratio，可按长度排序后用bisect整段跳过）、quick_ratio剪枝，最后才计算ratio，
+结果与直接计算ratio后比较阈值完全相同
+直接运行时在实体标签上做微基准：统计各级剪枝淘汰的比较数，并与逐对ratio核对
+"""
+
+import bisect
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+def length_bound(len_a, len_b):
+    """ratio的长度上界，与SequenceMatcher.real_quick_ratio的计算方式一致"""
+    total = len_a + len_b
+    return 2.0 * min(len_a, len_b) / total if total else 1.0
+
+class BoundedScorer:
+    """对一组固定名称打分；每个名称的SequenceMatcher常驻，seq2预处理与字符计数只做一次"""
+
+    def __init__(self, entries, threshold):
+        """entries: 可迭代的 (key, name)，name为已标准化名称"""
+        self.threshold = threshold
+        self.entries = sorted(set(entries), key=lambda entry: len(entry[1]))
+        self.lengths = [len(name) for _, name in self.entries]
+        self.matchers = {name: SequenceMatcher(None, '', name) for _, name in self.entries}
+        self.tiers = Counter()
+        self.length_range = lru_cache(maxsize=None)(self._length_range)
+
+    def _length_range(self, length):
+        """满足长度上界不低于阈值的名称长度闭区间"""
+        lengths = [n for n in range(2 * length + 2) if length_bound(length, n) >= self.threshold]
+        if not lengths:
+            return 0, -1
+        # 对更长的名称上界单调递减，找到第一个低于阈值的长度为止
+        high = max(lengths)
+        while length_bound(length, high + 1) >= self.threshold:
+            high += 1
+        return min(lengths), high
+
+    def score(self, label, name):
+        """返回ratio；可证明低于阈值时返回0.0而不计算ratio"""
+        if length_bound(len(label), len(name)) < self.threshold:
+            self.tiers['length'] += 1
+            return 0.0
+        matcher = self.matchers[name]
+        matcher.set_seq1(label)
+        if matcher.quick_ratio() < self.threshold:
+            self.tiers['quick_ratio'] += 1
+            return 0.0
+        ratio = matcher.ratio()
+        self.tiers['ratio' if ratio < self.threshold else 'accepted'] += 1
+        return ratio
+
+    def entries_in_range(self, label):
+        """按长度排序后用bisect取出可能达到阈值的 (key, name)，整段跳过其余名称"""
+        low, high = self.length_range(len(label))
+        start = bisect.bisect_left(self.lengths, low)
+        end = bisect.bisect_right(self.lengths, high)
+        self.tiers['length'] += len(self.entries) - (end - start)
+        return self.entries[start:end]
+
+    def keys_in_range(self, label, ordered_keys):
+        """可能达到阈值的key，按ordered_keys的顺序返回"""
+        keys = {key for key, _ in self.entries_in_range(label)}
+        return [key for key in ordered_keys if key in keys]
+
+def main():
+    """微基准：全量ISO 639-3名称上逐级剪枝 vs 逐对ratio"""
+    import argparse
+    import json
+    import time
+    from iso_catalog import load_catalog, normalize_name
+
+    parser = argparse.ArgumentParser(description='剪枝打分器微基准')
+    parser.add_argument('--threshold', type=float, default=0.85)
+    parser.add_argument('--sample', type=int, default=10, help='逐对ratio核对时每隔多少个标签取一个')
+    args = parser.parse_args()
+
+    with open('entity_analysis_report.json', 'r', encoding='utf-8') as f:
+        entities = json.load(f)['entities']
+    labels = sorted({normalize_name(label) for entity in entities.values() for label in entity['labels']})
+    catalog = load_catalog()
+    names = {name for data in catalog['iso639'].values()
+             for name in (data['print_name_norm'], data['inverted_name_norm'])}
+
+    scorer = BoundedScorer(((name, name) for name in names), args.threshold)
+    start = time.time()
+    bounded = {}
+    for label in labels:
+        bounded[label] = {name for _, name in scorer.entries_in_range(label)
+                          if scorer.score(label, name) >= args.threshold}
+    bounded_time = time.time() - start
+
+    total = len(labels) * len(names)
+    print(f"标签: {len(labels)}, 名称: {len(names)}, 比较总数: {total}, 阈值: {args.threshold}")
+    for tier in ('length', 'quick_ratio', 'ratio', 'accepted'):
+        print(f"  {tier}: {scorer.tiers[tier]} ({scorer.tiers[tier] / total:.2%})")
+    print(f"剪枝打分耗时: {bounded_time:.2f}s")
+
+    sample = labels[::args.sample]
+    start = time.time()
+    mismatches = 0
+    for label in sample:
+        plain = {name for name in names
+                 if SequenceMatcher(None, label, name).ratio() >= args.threshold}
+        mismatches += plain != bounded[label]
+    plain_time = time.time() - start
+    print(f"逐对ratio核对: {len(sample)} 个标签, 不一致 {mismatches}, "
+          f"耗时 {plain_time:.2f}s (剪枝版同样本约 {bounded_time * len(sample) / len(labels):.2f}s)")
+
+if __name__ == "__main__":
+    main()
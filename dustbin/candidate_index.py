@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO名称候选索引
+对ISO名称建立字符n-gram倒排索引，只把共享n-gram最多的少量候选交给SequenceMatcher精确打分
+直接运行时在实体标签样本上与逐对暴力匹配的前3结果做一致性核对
+"""
+
+import heapq
+from collections import Counter
+
+NGRAM_SIZE = 2
+CANDIDATE_LIMIT = 200
+
+def char_ngrams(text, n=NGRAM_SIZE):
+    """提取带首尾填充的字符n-gram集合"""
+    padded = f" {text} "
+    if len(padded) < n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+class NgramIndex:
+    """键（ISO代码）到若干文本（已标准化名称）的n-gram倒排索引"""
+
+    def __init__(self, entries, n=NGRAM_SIZE):
+        """entries: 可迭代的 (key, text)，同一key可对应多个文本"""
+        self.n = n
+        self.keys = []
+        self.key_order = {}
+        self.text_key = []
+        self.text_gram_count = []
+        self.postings = {}
+
+        text_ids = {}
+        for key, text in entries:
+            if key not in self.key_order:
+                self.key_order[key] = len(self.keys)
+                self.keys.append(key)
+            # 同一key下重复的文本（如Print_Name与Inverted_Name相同）只索引一次
+            if (key, text) in text_ids:
+                continue
+            text_id = len(self.text_key)
+            text_ids[(key, text)] = text_id
+            self.text_key.append(self.key_order[key])
+            grams = char_ngrams(text, n)
+            self.text_gram_count.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(text_id)
+
+    def candidates(self, text, limit=CANDIDATE_LIMIT):
+        """返回与text最相近的至多limit个key，按索引建立时的顺序排列"""
+        grams = char_ngrams(text, self.n)
+        counts = Counter()
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting:
+                counts.update(posting)
+
+        # 以n-gram集合的Dice系数排序，避免长名称仅因n-gram多而占满候选
+        query_size = len(grams)
+        gram_count = self.text_gram_count
+        ranked = heapq.nlargest(
+            limit, counts,
+            key=lambda text_id: counts[text_id] / (query_size + gram_count[text_id])
+        )
+        selected = {self.text_key[text_id] for text_id in ranked}
+        return [self.keys[key_id] for key_id in sorted(selected)]
+
+def main():
+    """在实体标签样本上核对候选索引与暴力匹配的前3结果"""
+    import json
+    import time
+    from iso_mapper import ISOMapper
+
+    mapper = ISOMapper()
+    with open('entity_analysis_report.json', 'r', encoding='utf-8') as f:
+        entities = json.load(f)['entities']
+    mapper.load_iso_standards()
+
+    # 固定样本：按实体ID排序后每隔10个取一个
+    sample = [entities[eid]['labels'] for eid in sorted(entities)[::10]]
+
+    results = {}
+    timings = {}
+    for name in ('brute_force', 'ngram'):
+        mapper.candidate_generator = name
+        start = time.time()
+        results[name] = [mapper.find_language_matches(None, labels) for labels in sample]
+        timings[name] = time.time() - start
+
+    mismatches = []
+    for labels, expected, actual in zip(sample, results['brute_force'], results['ngram']):
+        if [(m['iso_code'], m['score']) for m in expected] != [(m['iso_code'], m['score']) for m in actual]:
+            mismatches.append({'labels': labels, 'brute_force': expected, 'ngram': actual})
+
+    print(f"样本: {len(sample)} 个实体, 不一致: {len(mismatches)}")
+    print(f"耗时: 暴力 {timings['brute_force']:.2f}s, 候选索引 {timings['ngram']:.2f}s")
+    for item in mismatches[:10]:
+        print(json.dumps(item, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO代码到Omniglot实体的反向索引与覆盖率报告
+写出映射结果时同时生成：反向索引（ISO代码 -> 实体ID）与覆盖率（按Scope、Language_Type、宏语言、ISO 15924）；
+每个代码按源表顺序编号，集合用整数位图表示，覆盖与未覆盖都由位运算得到
+用法: python coverage_report.py [iso_mappings.json]
+"""
+
+import argparse
+import csv
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from iso_code_table import open_table
+
+ISO_DIR = Path(__file__).resolve().parent.parent / "ISO"
+REVERSE_INDEX_FILE = 'iso_reverse_index.json'
+COVERAGE_FILE = 'iso_coverage_report.json'
+
+class CodeSpace:
+    """代码与位编号的对应；集合以int位图表示"""
+
+    def __init__(self, codes):
+        self.codes = list(codes)
+        self.position = {code: i for i, code in enumerate(self.codes)}
+
+    def mask(self, codes):
+        bits = 0
+        for code in codes:
+            if code in self.position:
+                bits |= 1 << self.position[code]
+        return bits
+
+    def members(self, bits):
+        """位图中的代码，按源表顺序"""
+        codes = []
+        while bits:
+            low = bits & -bits
+            codes.append(self.codes[low.bit_length() - 1])
+            bits ^= low
+        return codes
+
+def build_reverse_index(pairs):
+    """(实体ID, 标准, ISO代码) -> {标准: {ISO代码: [实体ID]}}"""
+    reverse = {'iso639': defaultdict(list), 'iso15924': defaultdict(list)}
+    for entity_id, standard, iso_code in pairs:
+        reverse[standard][iso_code].append(entity_id)
+    return {standard: dict(sorted(index.items())) for standard, index in reverse.items()}
+
+def coverage_row(space, bits, covered):
+    """单个类别：总数、已覆盖数与未覆盖代码"""
+    hit = bits & covered
+    total = bits.bit_count()
+    return {
+        'total': total,
+        'covered': hit.bit_count(),
+        'coverage': hit.bit_count() / total if total else 0.0,
+        'uncovered': space.members(bits & ~covered)
+    }
+
+def build_coverage(reverse):
+    """由反向索引计算各类别覆盖率"""
+    table = open_table()
+    records = [table.record(number) for number in range(table.count)]
+    iso639 = CodeSpace(record['Id'] for record in records)
+    covered639 = iso639.mask(reverse['iso639'])
+
+    by_scope = defaultdict(int)
+    by_type = defaultdict(int)
+    for record in records:
+        bit = 1 << iso639.position[record['Id']]
+        by_scope[record['Scope']] |= bit
+        by_type[record['Language_Type']] |= bit
+
+    with open(ISO_DIR / "iso-639-3-macrolanguage-hierarchy.json", 'r', encoding='utf-8') as f:
+        hierarchy = json.load(f)
+    macrolanguages = {}
+    for macro in hierarchy:
+        members = iso639.mask(member['id'] for member in macro['members'])
+        row = coverage_row(iso639, members, covered639)
+        row['macro_covered'] = macro['macro_id'] in reverse['iso639']
+        macrolanguages[macro['macro_id']] = row
+
+    with open(ISO_DIR / "iso15924-codes.tsv", 'r', encoding='utf-8', newline='') as f:
+        iso15924 = CodeSpace(row['Code'] for row in csv.DictReader(f, delimiter='\t'))
+    all15924 = (1 << len(iso15924.codes)) - 1
+
+    return {
+        'iso639': {
+            'all': coverage_row(iso639, (1 << len(iso639.codes)) - 1, covered639),
+            'scope': {scope: coverage_row(iso639, bits, covered639) for scope, bits in sorted(by_scope.items())},
+            'language_type': {ltype: coverage_row(iso639, bits, covered639) for ltype, bits in sorted(by_type.items())},
+            'macrolanguage': macrolanguages
+        },
+        'iso15924': coverage_row(iso15924, all15924, iso15924.mask(reverse['iso15924']))
+    }
+
+def write_reports(pairs):
+    """写出反向索引与覆盖率报告"""
+    reverse = build_reverse_index(pairs)
+    coverage = build_coverage(reverse)
+    with open(REVERSE_INDEX_FILE, 'w', encoding='utf-8') as f:
+        json.dump(reverse, f, ensure_ascii=False, indent=2)
+    with open(COVERAGE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(coverage, f, ensure_ascii=False, indent=2)
+    return coverage
+
+def mapping_pairs(mappings):
+    """iso_mappings.json中各实体的最佳匹配"""
+    for key, standard in (('languages', 'iso639'), ('writing_systems', 'iso15924')):
+        for entity_id, mapping in mappings[key].items():
+            yield entity_id, standard, mapping['best_match']['iso_code']
+
+def main():
+    parser = argparse.ArgumentParser(description='由映射结果重新生成反向索引与覆盖率报告')
+    parser.add_argument('mapping_file', nargs='?', default='iso_mappings.json')
+    args = parser.parse_args()
+
+    with open(args.mapping_file, 'r', encoding='utf-8') as f:
+        mappings = json.load(f)
+
+    start = time.perf_counter()
+    coverage = write_reports(mapping_pairs(mappings))
+    elapsed = time.perf_counter() - start
+
+    for name, rows in (('Scope', coverage['iso639']['scope']), ('Language_Type', coverage['iso639']['language_type'])):
+        print(f"ISO 639-3 按{name}:")
+        for value, row in rows.items():
+            print(f"  {value}: {row['covered']}/{row['total']} ({row['coverage']:.1%})")
+    macros = coverage['iso639']['macrolanguage'].values()
+    print(f"宏语言: 自身已覆盖 {sum(row['macro_covered'] for row in macros)}/{len(macros)}, "
+          f"至少一个成员已覆盖 {sum(row['covered'] > 0 for row in macros)}/{len(macros)}")
+    print(f"ISO 15924: {coverage['iso15924']['covered']}/{coverage['iso15924']['total']} "
+          f"({coverage['iso15924']['coverage']:.1%})")
+    print(f"生成耗时: {elapsed:.3f} 秒")
+    print(f"\n反向索引已保存到: {REVERSE_INDEX_FILE}")
+    print(f"覆盖率报告已保存到: {COVERAGE_FILE}")
+
+if __name__ == "__main__":
+    main()
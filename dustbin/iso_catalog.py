@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO名称目录构建与加载
+一次性完成ISO 639-3/15924名称的标准化、分词与候选索引（n-gram、MinHash-LSH、编辑距离BK树）构建，并以源文件哈希为键持久化到磁盘
+ISO/*.tsv与宏语言层级JSON变更后加载时自动重建；直接运行则强制重建
+"""
+
+import csv
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import re
+import sys
+from pathlib import Path
+
+from bk_tree import BKTree
+from candidate_index import NgramIndex
+from lsh_index import MinHashLSH
+from token_scorer import TokenScorer
+
+ISO_DIR = Path(__file__).resolve().parent.parent / "ISO"
+CACHE_DIR = ISO_DIR.parent / ".iso_cache"
+CATALOG_FILE = "iso_catalog.pickle"
+
+def import_from(directory, name):
+    """按文件路径导入dustbin以外的模块：只加载该文件，不改动sys.path"""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, Path(directory) / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+# 标签标准化器在仓库根目录，与entity_standardizer.py共用；各匹配器经由本模块取用
+NORMALIZER = import_from(ISO_DIR.parent, 'label_normalizer').NORMALIZER
+
+# 目录结构或标准化规则变化时递增，使旧产物失效
+CATALOG_VERSION = 9
+
+def normalize_name(name):
+    """标准化名称用于匹配：Unicode折叠后去掉括号内容与标点（结果由共享的标准化器缓存）"""
+    return NORMALIZER.normalize(name)[0]
+
+def parentheticals(name):
+    """名称中括号内容的标准化形式"""
+    return NORMALIZER.normalize(name)[1]
+
+def tokenize(normalized_name):
+    """对已标准化的名称做casefold并分词"""
+    return tuple(normalized_name.casefold().split())
+
+def exact_keys(label):
+    """标签的精确查找键：标准化形式，以及"Zapotec, Isthmus"式倒序标签的正序形式"""
+    keys = [normalize_name(label)]
+    if label.count(',') == 1:
+        head, tail = label.split(',')
+        keys.append(normalize_name(f"{tail} {head}"))
+    return [key for key in keys if key]
+
+def resolve_retired(hit, retirements):
+    """把落在已废止代码上的命中改写为现行代码；拆分为多个代码时返回多个候选，无替代代码时保留并标记"""
+    retired = retirements.get(hit['iso_code']) if retirements else None
+    if retired is None:
+        return [hit]
+    if not retired['current']:
+        return [dict(hit, retired_code=hit['iso_code'], retirement_reason=retired['reason'])]
+    return [{
+        'iso_code': code,
+        'matched_field': hit['matched_field'],
+        'iso_name': name,
+        'retired_code': hit['iso_code'],
+        'retirement_reason': retired['reason']
+    } for code, name in retired['current']]
+
+def exact_matches(labels, exact_index, retirements=None):
+    """哈希快速路径：返回各标签的精确/倒序命中（按代码去重，保持命中顺序）
+    给定废止代码表时，命中的废止代码在此改写为现行代码"""
+    matches = []
+    seen_codes = set()
+    for label in labels:
+        for key in exact_keys(label):
+            # 折叠后同键的名称中，与标签原文（含附加符号）一致的排在前面，如"Võro"先于"Voro"
+            hits = sorted(exact_index.get(key, ()), key=lambda hit: hit['iso_name'].casefold() != label.casefold())
+            for hit in hits:
+                for record in resolve_retired(hit, retirements):
+                    if record['iso_code'] in seen_codes:
+                        continue
+                    seen_codes.add(record['iso_code'])
+                    match = {
+                        'iso_code': record['iso_code'],
+                        'score': 1.0,
+                        'matched_field': record['matched_field'],
+                        'omniglot_label': label,
+                        'iso_name': record['iso_name']
+                    }
+                    if 'retired_code' in record:
+                        match['retired_code'] = record['retired_code']
+                        match['retirement_reason'] = record['retirement_reason']
+                    matches.append(match)
+    return matches
+
+def add_exact(exact_index, name, iso_code, field):
+    """向多值哈希索引加入一个名称；同一键下同一代码只记录首个字段"""
+    hits = exact_index.setdefault(normalize_name(name), [])
+    if all(hit['iso_code'] != iso_code for hit in hits):
+        hits.append({'iso_code': iso_code, 'matched_field': field, 'iso_name': name})
+
+def source_hash(iso_dir=ISO_DIR):
+    """计算ISO源表（ISO/*.tsv、ISO/*.json）与目录版本的联合哈希"""
+    digest = hashlib.sha256(f"catalog-v{CATALOG_VERSION}".encode())
+    for path in sorted(path for path in Path(iso_dir).iterdir() if path.suffix in ('.tsv', '.json')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def read_tsv(path):
+    """按表头读取TSV"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f, delimiter='\t'))
+
+def build_retirements(iso_dir=ISO_DIR):
+    """编译废止代码表：废止代码 -> 原因与现行代码列表（已沿替换链走到底），查询为一次字典查找
+    C/D/M取Change_To；S（拆分）取Ret_Remedy中方括号内的全部代码；N（不存在）无替代代码"""
+    iso_dir = Path(iso_dir)
+    rows = {row['Id']: row for row in read_tsv(iso_dir / "iso-639-3_Retirements.tsv")}
+    ref_names = {row['Id']: row['Ref_Name'] for row in read_tsv(iso_dir / "iso-639-3.tsv")}
+
+    def targets(code):
+        row = rows[code]
+        if row['Change_To']:
+            return [row['Change_To']]
+        if row['Ret_Reason'] == 'S':
+            return re.findall(r'\[([a-z]{3})\]', row['Ret_Remedy'])
+        return []
+
+    def follow(code, chain):
+        current = []
+        for target in targets(code):
+            if target in chain:
+                raise ValueError(f"废止代码替换链成环: {' -> '.join(chain + [target])}")
+            resolved = follow(target, chain + [target]) if target in rows else [target]
+            current.extend(code for code in resolved if code not in current)
+        return current
+
+    return {
+        code: {
+            'reason': row['Ret_Reason'],
+            'ref_name': row['Ref_Name'],
+            'effective': row['Effective'],
+            'current': [(target, ref_names[target]) for target in follow(code, [code])]
+        }
+        for code, row in rows.items()
+    }
+
+def build_catalog(iso_dir=ISO_DIR):
+    """从ISO源表构建目录"""
+    iso_dir = Path(iso_dir)
+
+    # 名称索引中一个Id可有多行；iso639按代码保留最后一行（与原映射脚本一致），names保留全部行
+    iso639 = {}
+    iso639_names = []
+    for row in read_tsv(iso_dir / "iso-639-3_Name_Index.tsv"):
+        print_norm = normalize_name(row['Print_Name'])
+        inverted_norm = normalize_name(row['Inverted_Name'])
+        iso639[row['Id']] = {
+            'print_name': row['Print_Name'],
+            'inverted_name': row['Inverted_Name'],
+            'print_name_norm': print_norm,
+            'inverted_name_norm': inverted_norm
+        }
+        iso639_names.append({
+            'iso_code': row['Id'],
+            'print_name': row['Print_Name'],
+            'inverted_name': row['Inverted_Name'],
+            'print_name_norm': print_norm,
+            'inverted_name_norm': inverted_norm,
+            'tokens': tokenize(print_norm)
+        })
+
+    # 精确查找索引：标准化名称 -> 全部命中代码，覆盖名称索引全部行与主表Ref_Name
+    iso639_exact = {}
+    for name in iso639_names:
+        add_exact(iso639_exact, name['print_name'], name['iso_code'], 'print_name')
+        add_exact(iso639_exact, name['inverted_name'], name['iso_code'], 'inverted_name')
+    for row in read_tsv(iso_dir / "iso-639-3.tsv"):
+        add_exact(iso639_exact, row['Ref_Name'], row['Id'], 'ref_name')
+    # 仅在没有现行代码同名时，废止代码的名称也可命中，命中后由废止代码表改写为现行代码
+    retirements = build_retirements(iso_dir)
+    active_keys = set(iso639_exact)
+    for code, retired in retirements.items():
+        if normalize_name(retired['ref_name']) not in active_keys:
+            add_exact(iso639_exact, retired['ref_name'], code, 'retired_name')
+
+    iso15924 = {}
+    iso15924_exact = {}
+    for row in read_tsv(iso_dir / "iso15924-codes.tsv"):
+        alias = row['Alias'] if row['Alias'] else None
+        english_norm = normalize_name(row['English Name'])
+        iso15924[row['Code']] = {
+            'number': row['N°'],
+            'english_name': row['English Name'],
+            'alias': alias,
+            'english_name_norm': english_norm,
+            'alias_norm': normalize_name(alias) if alias else None,
+            'tokens': tokenize(english_norm) + (tokenize(normalize_name(alias)) if alias else ())
+        }
+        add_exact(iso15924_exact, row['English Name'], row['Code'], 'english_name')
+        if alias:
+            add_exact(iso15924_exact, alias, row['Code'], 'alias')
+
+    # 宏语言双向索引：宏语言 -> 成员代码，成员代码 -> 宏语言
+    with open(iso_dir / "iso-639-3-macrolanguage-hierarchy.json", 'r', encoding='utf-8') as f:
+        hierarchy = json.load(f)
+    macrolanguages = {macro['macro_id']: [member['id'] for member in macro['members']] for macro in hierarchy}
+    macro_of = {member: macro for macro, members in macrolanguages.items() for member in members}
+
+    return {
+        'source_hash': source_hash(iso_dir),
+        'normalized_names': NORMALIZER.snapshot(),
+        'iso639': iso639,
+        'iso639_names': iso639_names,
+        'iso15924': iso15924,
+        'iso639_exact': iso639_exact,
+        'iso15924_exact': iso15924_exact,
+        'macrolanguages': macrolanguages,
+        'macro_of': macro_of,
+        'retirements': retirements,
+        'iso639_index': NgramIndex(
+            (code, name)
+            for code, data in iso639.items()
+            for name in (data['print_name_norm'], data['inverted_name_norm'])
+        ),
+        'iso639_lsh': MinHashLSH(
+            (code, name)
+            for code, data in iso639.items()
+            for name in (data['print_name_norm'], data['inverted_name_norm'])
+        ),
+        'iso15924_index': NgramIndex(
+            (code, name)
+            for code, data in iso15924.items()
+            for name in (data['english_name_norm'], data['alias_norm'])
+            if name
+        ),
+        'iso15924_tokens': TokenScorer(
+            (code, field, data[f"{field}_norm"])
+            for code, data in iso15924.items()
+            for field in ('english_name', 'alias')
+            if data[f"{field}_norm"]
+        ),
+        'iso639_bktree': BKTree(
+            ((code, field), data[field])
+            for code, data in iso639.items()
+            for field in ('print_name_norm', 'inverted_name_norm')
+        ),
+        'iso15924_bktree': BKTree(
+            ((code, field), data[field])
+            for code, data in iso15924.items()
+            for field in ('english_name_norm', 'alias_norm')
+            if data[field]
+        )
+    }
+
+def save_catalog(catalog, cache_dir=CACHE_DIR):
+    """原子地写出目录产物"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    target = cache_dir / CATALOG_FILE
+    tmp = target.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump({'key': catalog['source_hash'], 'catalog': catalog}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+
+def load_catalog(iso_dir=ISO_DIR, cache_dir=CACHE_DIR):
+    """加载目录；产物缺失、损坏（截断、类改名等无法反序列化）或源表哈希不符时重建"""
+    key = source_hash(iso_dir)
+    try:
+        with open(Path(cache_dir) / CATALOG_FILE, 'rb') as f:
+            stored = pickle.load(f)
+        if stored['key'] == key:
+            NORMALIZER.seed(stored['catalog']['normalized_names'])
+            return stored['catalog']
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+            KeyError, TypeError):
+        pass
+
+    catalog = build_catalog(iso_dir)
+    save_catalog(catalog, cache_dir)
+    return catalog
+
+def main():
+    """强制重建目录"""
+    catalog = build_catalog()
+    save_catalog(catalog)
+    print(f"ISO 639-3: {len(catalog['iso639'])} 个代码, {len(catalog['iso639_names'])} 个名称")
+    print(f"宏语言: {len(catalog['macrolanguages'])} 个, 成员映射 {len(catalog['macro_of'])} 条")
+    print(f"废止代码: {len(catalog['retirements'])} 个")
+    print(f"ISO 15924: {len(catalog['iso15924'])} 个代码")
+    print(f"精确查找键: ISO 639-3 {len(catalog['iso639_exact'])} 个, ISO 15924 {len(catalog['iso15924_exact'])} 个")
+    print(f"目录已保存到: {CACHE_DIR / CATALOG_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO 639-3代码表的内存映射二进制版本
+把ISO/iso-639-3.tsv编译为定长记录 + 共享字符串区 + 各代码列（Id/Part2b/Part2t/Part1）与名称的有序索引，
+打开时只做mmap，查询在索引上二分，不解析TSV
+用法: python iso_code_table.py rebuild | verify | lookup CODE... | name NAME
+"""
+
+import argparse
+import csv
+import hashlib
+import mmap
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+
+# 与iso_catalog相同的目录；不从iso_catalog导入，避免打开代码表时连带加载numpy等匹配依赖
+ISO_DIR = Path(__file__).resolve().parent.parent / "ISO"
+CACHE_DIR = ISO_DIR.parent / ".iso_cache"
+
+SOURCE_FILE = ISO_DIR / "iso-639-3.tsv"
+TABLE_FILE = CACHE_DIR / "iso-639-3.bin"
+
+MAGIC = b'I639'
+FORMAT_VERSION = 1
+
+# 代码列与定长宽度；3字母代码按Id、Part2b、Part2t的顺序查找
+CODE_COLUMNS = (('Id', 3), ('Part2b', 3), ('Part2t', 3), ('Part1', 2))
+FIELDS = ('Id', 'Part2b', 'Part2t', 'Part1', 'Scope', 'Language_Type', 'Ref_Name', 'Comment')
+
+# 头部：魔数、格式版本、记录数、源文件sha256，随后是各区段的 (偏移, 条目数)
+HEADER = struct.Struct('<4sHI32s' + 'II' * (len(CODE_COLUMNS) + 3))
+# 记录：4个定长代码列、Scope、Language_Type、Ref_Name与Comment在字符串区的 (偏移, 长度)
+RECORD = struct.Struct('<3s3s3s2sccIHIH')
+# 代码索引条目：定长代码 + 记录号
+CODE_ENTRIES = {width: struct.Struct(f'<{width}sI') for _, width in CODE_COLUMNS}
+# 名称索引条目：casefold后名称在字符串区的 (偏移, 长度) + 记录号
+NAME_ENTRY = struct.Struct('<IHI')
+
+def source_hash(path=SOURCE_FILE):
+    """源TSV的sha256"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+def read_rows(path=SOURCE_FILE):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f, delimiter='\t'))
+
+def build_table(source=SOURCE_FILE, target=TABLE_FILE):
+    """编译二进制代码表并原子写出"""
+    rows = read_rows(source)
+    blob = bytearray()
+    strings = {}
+
+    def intern(text):
+        """字符串区去重存放，返回 (偏移, 长度)"""
+        data = text.encode('utf-8')
+        if data not in strings:
+            strings[data] = len(blob)
+            blob.extend(data)
+        return strings[data], len(data)
+
+    records = bytearray()
+    for row in rows:
+        records += RECORD.pack(
+            *(row[column].encode('ascii') for column, _ in CODE_COLUMNS),
+            row['Scope'].encode('ascii'), row['Language_Type'].encode('ascii'),
+            *intern(row['Ref_Name']), *intern(row['Comment'])
+        )
+
+    sections = [records]
+    for column, width in CODE_COLUMNS:
+        entry = CODE_ENTRIES[width]
+        keys = sorted((row[column].encode('ascii'), record) for record, row in enumerate(rows) if row[column])
+        sections.append(b''.join(entry.pack(key, record) for key, record in keys))
+    names = sorted((row['Ref_Name'].casefold().encode('utf-8'), record) for record, row in enumerate(rows))
+    sections.append(b''.join(NAME_ENTRY.pack(*intern(name.decode('utf-8')), record) for name, record in names))
+    sections.append(blob)
+
+    layout = []
+    offset = HEADER.size
+    entry_sizes = [RECORD.size] + [CODE_ENTRIES[width].size for _, width in CODE_COLUMNS] + [NAME_ENTRY.size, 1]
+    for section, entry_size in zip(sections, entry_sizes):
+        layout += [offset, len(section) // entry_size]
+        offset += len(section)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(rows), source_hash(source), *layout))
+        for section in sections:
+            f.write(section)
+    os.replace(tmp, target)
+    return len(rows)
+
+class ISOCodeTable:
+    """只读的内存映射代码表"""
+
+    def __init__(self, path=TABLE_FILE):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self.data)
+        magic, version, self.count, self.source_hash = header[:4]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} 不是当前格式的代码表，请重新运行 rebuild")
+        sections = list(zip(header[4::2], header[5::2]))
+        self.records_offset = sections[0][0]
+        self.code_indexes = {column: (sections[i + 1], CODE_ENTRIES[width])
+                             for i, (column, width) in enumerate(CODE_COLUMNS)}
+        self.name_index = sections[len(CODE_COLUMNS) + 1]
+        self.blob_offset = sections[-1][0]
+
+    def string(self, offset, length):
+        start = self.blob_offset + offset
+        return self.data[start:start + length].decode('utf-8')
+
+    def record(self, number):
+        """按记录号解码为与TSV表头同名的字典"""
+        values = RECORD.unpack_from(self.data, self.records_offset + number * RECORD.size)
+        codes = [value.rstrip(b'\0').decode('ascii') for value in values[:6]]
+        return dict(zip(FIELDS, codes + [self.string(*values[6:8]), self.string(*values[8:10])]))
+
+    def search(self, section, entry, key_of, target):
+        """在有序索引区段上二分，返回第一个键不小于target的位置"""
+        (offset, count) = section
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if key_of(entry.unpack_from(self.data, offset + middle * entry.size)) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup_column(self, column, code):
+        (section, entry) = self.code_indexes[column]
+        key = code.encode('ascii')
+        position = self.search(section, entry, lambda item: item[0].rstrip(b'\0'), key)
+        if position < section[1]:
+            found, number = entry.unpack_from(self.data, section[0] + position * entry.size)
+            if found.rstrip(b'\0') == key:
+                return self.record(number)
+        return None
+
+    def lookup(self, code):
+        """按任一代码形式查找：2字母查Part1，3字母依次查Id、Part2b、Part2t；未找到返回None"""
+        code = code.strip().lower()
+        if not code.isascii():
+            return None
+        columns = [column for column, width in CODE_COLUMNS if width == len(code)]
+        for column in columns:
+            record = self.lookup_column(column, code)
+            if record is not None:
+                return record
+        return None
+
+    def by_name(self, name):
+        """按Ref_Name查找（忽略大小写），返回全部同名记录"""
+        section = self.name_index
+        target = name.strip().casefold()
+        name_of = lambda item: self.string(item[0], item[1])
+        position = self.search(section, NAME_ENTRY, name_of, target)
+        results = []
+        while position < section[1]:
+            item = NAME_ENTRY.unpack_from(self.data, section[0] + position * NAME_ENTRY.size)
+            if name_of(item) != target:
+                break
+            results.append(self.record(item[2]))
+            position += 1
+        return results
+
+    def close(self):
+        self.data.close()
+
+@lru_cache(maxsize=None)
+def open_table(path=TABLE_FILE):
+    """打开代码表；尚未编译或源TSV内容与编译时不一致时先重建"""
+    try:
+        table = ISOCodeTable(path)
+        if table.source_hash == source_hash():
+            return table
+        table.close()
+    except FileNotFoundError:
+        pass
+    build_table(target=path)
+    return ISOCodeTable(path)
+
+def lookup(code):
+    return open_table().lookup(code)
+
+def by_name(name):
+    return open_table().by_name(name)
+
+def verify(path=TABLE_FILE, source=SOURCE_FILE):
+    """逐行核对二进制表与TSV：每个代码列、每个名称都能查回同一行，且记录数一致"""
+    table = ISOCodeTable(path)
+    rows = read_rows(source)
+    errors = []
+    if table.count != len(rows):
+        errors.append(f"记录数不一致: 二进制 {table.count}, TSV {len(rows)}")
+    if table.source_hash != source_hash(source):
+        errors.append("源TSV已在编译后修改")
+    for number, row in enumerate(rows):
+        if table.record(number) != {field: row[field] for field in FIELDS}:
+            errors.append(f"第 {number} 条记录不一致: {row['Id']}")
+        for column, _ in CODE_COLUMNS:
+            if row[column] and table.lookup_column(column, row[column]) != table.record(number):
+                errors.append(f"{column} 索引查不到 {row[column]}")
+        if table.record(number) not in table.by_name(row['Ref_Name']):
+            errors.append(f"名称索引查不到 {row['Ref_Name']}")
+    table.close()
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description='ISO 639-3二进制代码表')
+    parser.add_argument('command', choices=['rebuild', 'verify', 'lookup', 'name'])
+    parser.add_argument('values', nargs='*')
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        count = build_table()
+        print(f"已编译 {count} 条记录到: {TABLE_FILE} ({TABLE_FILE.stat().st_size} 字节)")
+    elif args.command == 'verify':
+        errors = verify()
+        for error in errors[:20]:
+            print(error)
+        print(f"核对完成: {len(errors)} 处不一致")
+        if errors:
+            raise SystemExit(1)
+    elif args.command == 'lookup':
+        for code in args.values:
+            print(code, lookup(code))
+    else:
+        for record in by_name(' '.join(args.values)):
+            print(record)
+
+if __name__ == "__main__":
+    main()
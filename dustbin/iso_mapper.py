@@ -5,11 +5,19 @@ ISO代码映射脚本
 处理实体类型冲突，建立Omniglot实体与ISO标准代码的映射关系
 """
 
-import csv
+import argparse
 import json
-import re
-from collections import defaultdict
-from difflib import SequenceMatcher
+
+from bk_tree import MAX_LABEL_LENGTH, edit_budget, edit_similarity
+from bounded_scorer import BoundedScorer
+from coverage_report import COVERAGE_FILE, REVERSE_INDEX_FILE, mapping_pairs, write_reports
+from iso_catalog import NORMALIZER, exact_matches, load_catalog, normalize_name
+from match_cache import MatchCache
+
+THRESHOLD = 0.85  # 高置信度匹配阈值
+
+# 打分逻辑或阈值变化时递增，使匹配缓存中的旧结果失效
+SCORER_VERSION = 'iso_mapper-4'
 
 class ISOMapper:
     def __init__(self):
@@ -17,6 +25,27 @@ class ISOMapper:
         self.iso639_codes = {}
         self.iso15924_codes = {}
         self.conflicts = []
+        self.iso639_index = None
+        self.iso15924_index = None
+        self.iso639_lsh = None
+        self.candidate_generator = 'ngram'  # ngram / lsh / brute_force
+        self.use_edit_distance = False
+        self.iso639_bktree = None
+        self.iso15924_bktree = None
+        self.iso15924_tokens = None
+        self.use_token_scorer = True
+        self.macrolanguages = {}
+        self.macro_of = {}
+        self.expand_macrolanguages = False
+        self.collapsed_members = 0
+        self.iso639_exact = {}
+        self.retirements = {}
+        self.iso15924_exact = {}
+        self.fast_path_resolved = 0
+        self.catalog_key = None
+        self.match_cache = None
+        self.iso639_scorer = None
+        self.iso15924_scorer = None
         self.mappings = {
             'languages': {},  # entity_id -> iso639_code
             'writing_systems': {},  # entity_id -> iso15924_code
@@ -45,109 +74,178 @@ class ISOMapper:
         
         print(f"加载了 {len(self.entities)} 个实体，发现 {len(self.conflicts)} 个类型冲突")
     
-    def load_iso_standards(self):
-        """加载ISO标准数据"""
-        # 加载ISO 639-3语言代码
-        with open('iso-639-3_Name_Index.tab', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            for row in reader:
-                self.iso639_codes[row['Id']] = {
-                    'print_name': row['Print_Name'],
-                    'inverted_name': row['Inverted_Name']
-                }
+    def load_iso_standards(self, catalog=None):
+        """加载ISO标准数据（预编译目录，源表变更时自动重建）；可传入已加载的目录"""
+        catalog = catalog or load_catalog()
+        self.catalog_key = catalog['source_hash']
+        self.iso639_codes = catalog['iso639']
+        self.iso15924_codes = catalog['iso15924']
         
-        # 加载ISO 15924书写系统代码
-        with open('iso15924-codes.tsv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            for row in reader:
-                self.iso15924_codes[row['Code']] = {
-                    'number': row['N°'],
-                    'english_name': row['English Name'],
-                    'alias': row['Alias'] if row['Alias'] else None
-                }
+        # 候选索引随目录一起构建，匹配时每个标签只对少量候选精确打分
+        self.iso639_index = catalog['iso639_index']
+        self.iso15924_index = catalog['iso15924_index']
+        self.iso639_lsh = catalog['iso639_lsh']
+        self.iso639_bktree = catalog['iso639_bktree']
+        self.iso15924_bktree = catalog['iso15924_bktree']
+        self.iso15924_tokens = catalog['iso15924_tokens']
+        self.macrolanguages = catalog['macrolanguages']
+        self.macro_of = catalog['macro_of']
+        self.iso639_exact = catalog['iso639_exact']
+        self.retirements = catalog['retirements']
+        self.iso15924_exact = catalog['iso15924_exact']
+        
+        # 剪枝打分器：长度上界与quick_ratio能证明低于阈值的比较不计算ratio
+        self.iso639_scorer = BoundedScorer(
+            ((code, data[field]) for code, data in self.iso639_codes.items()
+             for field in ('print_name_norm', 'inverted_name_norm')),
+            THRESHOLD
+        )
+        self.iso15924_scorer = BoundedScorer(
+            ((code, data[field]) for code, data in self.iso15924_codes.items()
+             for field in ('english_name_norm', 'alias_norm') if data[field]),
+            THRESHOLD
+        )
         
         print(f"加载了 {len(self.iso639_codes)} 个ISO 639-3语言代码")
         print(f"加载了 {len(self.iso15924_codes)} 个ISO 15924书写系统代码")
     
-    def similarity_score(self, str1, str2):
-        """计算两个字符串的相似度"""
-        return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
-    
     def normalize_name_for_matching(self, name):
         """标准化名称用于匹配"""
-        # 移除括号内容
-        name = re.sub(r'\([^)]*\)', '', name)
-        # 移除常见的标点和修饰词
-        name = re.sub(r'[,\-\']', ' ', name)
-        name = re.sub(r'\s+', ' ', name).strip()
-        return name.lower()
+        return normalize_name(name)
     
-    def find_language_matches(self, entity_id, labels):
-        """为语言实体寻找ISO 639-3匹配"""
-        best_matches = []
+    def candidate_codes(self, normalized_label, codes, index, scorer):
+        """返回需要精确打分的ISO代码；brute_force时退回全量比较（按长度区间整段跳过不可能达到阈值的名称）"""
+        if self.candidate_generator == 'brute_force':
+            return scorer.keys_in_range(normalized_label, codes)
+        return index.candidates(normalized_label)
+    
+    def edit_matches(self, normalized_label, tree):
+        """第二匹配器：短标签在编辑距离预算内的名称，返回 代码 -> (字段, 相似度)，每个代码取最相近的名称"""
+        if not self.use_edit_distance or len(normalized_label) > MAX_LABEL_LENGTH:
+            return {}
+        k = edit_budget(len(normalized_label))
+        if not k:
+            return {}
+        matches = {}
+        for (iso_code, field), name, distance in tree.within(normalized_label, k):
+            # within按距离升序返回，首次出现即最近
+            matches.setdefault(iso_code, (field[:-len('_norm')], edit_similarity(normalized_label, name, distance)))
+        return matches
+    
+    def combine_edit_matches(self, matches, edit_hits, codes, name_field):
+        """合并两种匹配器：同一代码取两者较高的分数；仅编辑距离命中的代码按目录顺序追加"""
+        matched = {match['iso_code']: match for match in matches}
+        for iso_code, (field, similarity) in edit_hits.items():
+            match = matched.get(iso_code)
+            if match is not None:
+                if similarity > match['score']:
+                    match['score'] = similarity
+                    match['matched_field'] = field
+                continue
+            matched[iso_code] = {
+                'iso_code': iso_code,
+                'score': similarity,
+                'matched_field': field,
+                'iso_name': codes[iso_code][name_field]
+            }
+        return [matched[code] for code in codes if code in matched] if edit_hits else matches
+    
+    def score_language_code(self, normalized_label, iso_code):
+        """标签对单个ISO 639-3代码的分数与命中字段（低于阈值的比较被剪枝为0）"""
+        iso_data = self.iso639_codes[iso_code]
+        # 检查Print_Name匹配
+        score1 = self.iso639_scorer.score(normalized_label, iso_data['print_name_norm'])
         
-        for label in labels:
-            normalized_label = self.normalize_name_for_matching(label)
-            
-            for iso_code, iso_data in self.iso639_codes.items():
-                # 检查Print_Name匹配
-                print_name_norm = self.normalize_name_for_matching(iso_data['print_name'])
-                score1 = self.similarity_score(normalized_label, print_name_norm)
-                
-                # 检查Inverted_Name匹配
-                inverted_name_norm = self.normalize_name_for_matching(iso_data['inverted_name'])
-                score2 = self.similarity_score(normalized_label, inverted_name_norm)
-                
-                max_score = max(score1, score2)
-                
-                if max_score >= 0.85:  # 高置信度匹配
-                    best_matches.append({
-                        'iso_code': iso_code,
-                        'score': max_score,
-                        'matched_field': 'print_name' if score1 >= score2 else 'inverted_name',
-                        'omniglot_label': label,
-                        'iso_name': iso_data['print_name']
-                    })
+        # 检查Inverted_Name匹配
+        score2 = self.iso639_scorer.score(normalized_label, iso_data['inverted_name_norm'])
         
-        # 按分数排序并去重
-        best_matches.sort(key=lambda x: x['score'], reverse=True)
-        seen_codes = set()
-        unique_matches = []
-        for match in best_matches:
-            if match['iso_code'] not in seen_codes:
-                unique_matches.append(match)
-                seen_codes.add(match['iso_code'])
-        
-        return unique_matches[:3]  # 返回前3个最佳匹配
+        return max(score1, score2), 'print_name' if score1 >= score2 else 'inverted_name'
     
-    def find_writing_system_matches(self, entity_id, labels):
-        """为书写系统实体寻找ISO 15924匹配"""
+    def score_language_label(self, normalized_label):
+        """对单个标签的ISO 639-3候选打分，返回高置信度匹配（按目录顺序）
+        宏语言与其成员同为候选时先给宏语言打分；宏语言达到阈值则成员折叠在其下不再单独打分（expand_macrolanguages时逐个打分）"""
+        matches = []
+        # LSH只建在ISO 639-3名称上，作为n-gram索引之外的另一种候选生成方式
+        index = self.iso639_lsh if self.candidate_generator == 'lsh' else self.iso639_index
+        candidates = self.candidate_codes(normalized_label, self.iso639_codes, index, self.iso639_scorer)
+        candidate_set = set(candidates)
+        scores = {}
+        for iso_code in candidates:
+            macro = self.macro_of.get(iso_code)
+            if not self.expand_macrolanguages and macro in candidate_set:
+                if macro not in scores:
+                    scores[macro] = self.score_language_code(normalized_label, macro)
+                if scores[macro][0] >= THRESHOLD:
+                    self.collapsed_members += 1
+                    continue
+            if iso_code not in scores:
+                scores[iso_code] = self.score_language_code(normalized_label, iso_code)
+            max_score, matched_field = scores[iso_code]
+            
+            if max_score >= THRESHOLD:  # 高置信度匹配
+                matches.append({
+                    'iso_code': iso_code,
+                    'score': max_score,
+                    'matched_field': matched_field,
+                    'iso_name': self.iso639_codes[iso_code]['print_name']
+                })
+        edit_hits = self.edit_matches(normalized_label, self.iso639_bktree)
+        return self.combine_edit_matches(matches, edit_hits, self.iso639_codes, 'print_name')
+    
+    def score_writing_system_label(self, normalized_label):
+        """对单个标签的ISO 15924候选打分，返回高置信度匹配（按目录顺序）
+        启用词元打分时，候选为n-gram候选与共享信息词元的代码之并集，分数取加权词元分数与整串ratio的较大值"""
+        matches = []
+        scorer = self.iso15924_scorer
+        token_scores = self.iso15924_tokens.scores(normalized_label) if self.use_token_scorer else {}
+        candidate_set = set(self.candidate_codes(normalized_label, self.iso15924_codes, self.iso15924_index, scorer))
+        candidate_set.update(token_scores)
+        candidates = [code for code in self.iso15924_codes if code in candidate_set]
+        for iso_code in candidates:
+            iso_data = self.iso15924_codes[iso_code]
+            # 检查English Name匹配
+            score1 = scorer.score(normalized_label, iso_data['english_name_norm'])
+            
+            # 检查Alias匹配（如果存在）
+            score2 = 0
+            if iso_data['alias']:
+                score2 = scorer.score(normalized_label, iso_data['alias_norm'])
+            
+            max_score = max(score1, score2)
+            matched_field = 'english_name' if score1 >= score2 else 'alias'
+            token_score, token_field = token_scores.get(iso_code, (0, None))
+            if token_score > max_score:
+                max_score, matched_field = token_score, token_field
+            
+            if max_score >= THRESHOLD:  # 高置信度匹配
+                matches.append({
+                    'iso_code': iso_code,
+                    'score': max_score,
+                    'matched_field': matched_field,
+                    'iso_name': iso_data['english_name']
+                })
+        edit_hits = self.edit_matches(normalized_label, self.iso15924_bktree)
+        return self.combine_edit_matches(matches, edit_hits, self.iso15924_codes, 'english_name')
+    
+    def rank_matches(self, labels, standard, scorer):
+        """合并各标签的匹配，按分数排序并按代码去重；有匹配缓存时先查缓存"""
         best_matches = []
         
         for label in labels:
             normalized_label = self.normalize_name_for_matching(label)
+            if self.match_cache is None:
+                label_matches = scorer(normalized_label)
+            else:
+                label_matches = self.match_cache.get_or_score(normalized_label, standard, scorer)
             
-            for iso_code, iso_data in self.iso15924_codes.items():
-                # 检查English Name匹配
-                english_name_norm = self.normalize_name_for_matching(iso_data['english_name'])
-                score1 = self.similarity_score(normalized_label, english_name_norm)
-                
-                # 检查Alias匹配（如果存在）
-                score2 = 0
-                if iso_data['alias']:
-                    alias_norm = self.normalize_name_for_matching(iso_data['alias'])
-                    score2 = self.similarity_score(normalized_label, alias_norm)
-                
-                max_score = max(score1, score2)
-                
-                if max_score >= 0.85:  # 高置信度匹配
-                    best_matches.append({
-                        'iso_code': iso_code,
-                        'score': max_score,
-                        'matched_field': 'english_name' if score1 >= score2 else 'alias',
-                        'omniglot_label': label,
-                        'iso_name': iso_data['english_name']
-                    })
+            for match in label_matches:
+                best_matches.append({
+                    'iso_code': match['iso_code'],
+                    'score': match['score'],
+                    'matched_field': match['matched_field'],
+                    'omniglot_label': label,
+                    'iso_name': match['iso_name']
+                })
         
         # 按分数排序并去重
         best_matches.sort(key=lambda x: x['score'], reverse=True)
@@ -160,6 +258,32 @@ class ISOMapper:
         
         return unique_matches[:3]  # 返回前3个最佳匹配
     
+    def annotate_macrolanguages(self, matches):
+        """在匹配记录上标注宏语言关系：宏语言列出成员代码，成员注明所属宏语言"""
+        for match in matches:
+            if match['iso_code'] in self.macrolanguages:
+                match['members'] = self.macrolanguages[match['iso_code']]
+            if match['iso_code'] in self.macro_of:
+                match['macrolanguage'] = self.macro_of[match['iso_code']]
+        return matches
+    
+    def find_language_matches(self, entity_id, labels):
+        """为语言实体寻找ISO 639-3匹配"""
+        # 快速路径：标准化后精确或倒序命中的直接返回，跳过模糊打分；命中废止代码时改写为现行代码
+        exact = exact_matches(labels, self.iso639_exact, self.retirements)
+        if exact:
+            self.fast_path_resolved += 1
+            return self.annotate_macrolanguages(exact[:3])
+        return self.annotate_macrolanguages(self.rank_matches(labels, 'iso639', self.score_language_label))
+    
+    def find_writing_system_matches(self, entity_id, labels):
+        """为书写系统实体寻找ISO 15924匹配"""
+        exact = exact_matches(labels, self.iso15924_exact)
+        if exact:
+            self.fast_path_resolved += 1
+            return exact[:3]
+        return self.rank_matches(labels, 'iso15924', self.score_writing_system_label)
+    
     def resolve_entity_type(self, entity_id, entity_data):
         """解决实体类型冲突"""
         type_hints = set(entity_data['type_hints'])
@@ -189,6 +313,11 @@ class ISOMapper:
         """创建实体到ISO代码的映射"""
         mapped_languages = 0
         mapped_writing_systems = 0
+        # 不同候选生成方式、是否启用编辑距离匹配器、是否展开宏语言的结果可能不同，分别缓存
+        scorer_key = (f"{SCORER_VERSION}/{self.candidate_generator}" + ('+edit' if self.use_edit_distance else '')
+                      + ('+expand' if self.expand_macrolanguages else '')
+                      + ('' if self.use_token_scorer else '+no-tokens'))
+        self.match_cache = MatchCache(self.catalog_key, scorer_key)
         
         for entity_id, entity_data in self.entities.items():
             # 跳过fragment实体
@@ -233,11 +362,19 @@ class ISOMapper:
                         'labels': list(labels)
                     })
         
+        self.match_cache.close()
+        
         print(f"\n=== 映射结果统计 ===")
         print(f"成功映射的语言: {mapped_languages}")
         print(f"成功映射的书写系统: {mapped_writing_systems}")
         print(f"未映射的语言: {len(self.mappings['unmapped']['languages'])}")
         print(f"未映射的书写系统: {len(self.mappings['unmapped']['writing_systems'])}")
+        attempted = (mapped_languages + mapped_writing_systems +
+                     len(self.mappings['unmapped']['languages']) + len(self.mappings['unmapped']['writing_systems']))
+        print(f"快速路径解析: {self.fast_path_resolved}/{attempted} ({self.fast_path_resolved / attempted:.1%})")
+        print(f"匹配缓存: 命中 {self.match_cache.hits}, 新打分 {self.match_cache.misses}")
+        print(f"标签标准化: 命中 {NORMALIZER.hits}, 新计算 {NORMALIZER.misses}")
+        print(f"宏语言折叠跳过的成员打分: {self.collapsed_members}")
     
     def save_mappings(self):
         """保存映射结果"""
@@ -260,12 +397,31 @@ class ISOMapper:
         with open('conflict_resolution.json', 'w', encoding='utf-8') as f:
             json.dump(conflict_report, f, ensure_ascii=False, indent=2)
         
+        # ISO代码 -> 实体的反向索引与覆盖率报告
+        write_reports(mapping_pairs(self.mappings))
+        
         print(f"\n映射结果已保存到: iso_mappings.json")
         print(f"冲突解决报告已保存到: conflict_resolution.json")
+        print(f"反向索引与覆盖率报告已保存到: {REVERSE_INDEX_FILE}, {COVERAGE_FILE}")
 
 def main():
     """主处理函数"""
+    parser = argparse.ArgumentParser(description='Omniglot实体到ISO代码的映射')
+    parser.add_argument('--candidates', choices=['ngram', 'lsh', 'brute_force'], default='ngram',
+                        help='ISO 639-3模糊匹配的候选生成方式')
+    parser.add_argument('--edit-distance', action='store_true',
+                        help='对短标签启用编辑距离（BK树）第二匹配器，与ratio分数合并')
+    parser.add_argument('--expand-macrolanguages', action='store_true',
+                        help='宏语言命中时仍逐个为其成员打分，而不是折叠在宏语言下')
+    parser.add_argument('--no-token-scorer', action='store_true',
+                        help='ISO 15924只用整串ratio打分，不使用加权词元索引')
+    args = parser.parse_args()
+    
     mapper = ISOMapper()
+    mapper.candidate_generator = args.candidates
+    mapper.use_edit_distance = args.edit_distance
+    mapper.expand_macrolanguages = args.expand_macrolanguages
+    mapper.use_token_scorer = not args.no_token_scorer
     
     print("正在加载实体数据...")
     mapper.load_entity_data()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地ISO/实体查询服务
+启动时一次性加载ISO目录、二进制代码表、Stage1路径与实体分类，之后以HTTP/JSON回答查询，查询结果带LRU缓存
+  GET  /code?q=eng               任一形式的ISO 639代码或ISO 15924代码
+  GET  /name?q=Cantonese         名称精确查找（标准化、倒序形式）
+  GET  /entity?path=/chinese/cantonese.htm
+  GET  /match?q=Sylheti&standard=iso639|iso15924   模糊匹配
+  POST 同上路径，请求体 {"queries": [...], "standard": ...} 批量查询
+  GET  /stats                    各接口请求数、缓存命中率与延迟分位数
+用法: python lookup_server.py [--port 8639] [--cache-size 4096]
+"""
+
+import argparse
+import copy
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from iso_catalog import exact_matches
+from iso_code_table import open_table
+from iso_mapper import ISOMapper
+from lsh_index import percentile
+
+STAGE1_DIR = Path(__file__).resolve().parent.parent / "Stage1"
+LATENCY_WINDOW = 10000  # 每个接口保留最近多少次查询的延迟（批量请求中每个查询各记一次）
+
+class LookupService:
+    """常驻内存的索引与各接口的查询函数"""
+
+    def __init__(self, cache_size):
+        self.mapper = ISOMapper()
+        self.mapper.load_iso_standards()
+        self.code_table = open_table()
+        self.script_codes = {}
+        for script_code, data in self.mapper.iso15924_codes.items():
+            self.script_codes[script_code.casefold()] = script_code
+            self.script_codes[data['number']] = script_code
+        # 模糊匹配器内部复用SequenceMatcher，标签标准化器的LRU也不是线程安全的，多线程下需串行
+        self.match_lock = threading.Lock()
+
+        with open(STAGE1_DIR / "paths_final.json", 'r', encoding='utf-8') as f:
+            self.paths = {entry['absolute_url_path']: entry for entry in json.load(f)}
+        self.entity_classes = {}
+        for class_file in sorted((STAGE1_DIR / "class").glob("*.json")):
+            if class_file.name == 'classification_summary.json':
+                continue
+            with open(class_file, 'r', encoding='utf-8') as f:
+                for entry in json.load(f):
+                    self.entity_classes[entry['absolute_url_path']] = class_file.stem
+
+        self.handlers = {
+            'code': lru_cache(maxsize=cache_size)(self.lookup_code),
+            'name': lru_cache(maxsize=cache_size)(self.lookup_name),
+            'entity': lru_cache(maxsize=cache_size)(self.lookup_entity),
+            'match': lru_cache(maxsize=cache_size)(self.match_label)
+        }
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.requests = defaultdict(int)
+        self.started = time.time()
+
+    def lookup_code(self, code, standard=None):
+        """ISO 639（Id/Part2b/Part2t/Part1）与ISO 15924（字母或数字代码）"""
+        script_code = self.script_codes.get(code.strip().casefold())
+        script = script_code and self.mapper.iso15924_codes[script_code]
+        return {
+            'query': code,
+            'iso639': self.code_table.lookup(code),
+            'iso15924': script and {
+                'code': script_code,
+                'number': script['number'],
+                'english_name': script['english_name'],
+                'alias': script['alias']
+            }
+        }
+
+    def lookup_name(self, name, standard=None):
+        """名称精确查找，与映射脚本的快速路径相同"""
+        with self.match_lock:
+            return {
+                'query': name,
+                'iso639': self.mapper.annotate_macrolanguages(
+                    exact_matches([name], self.mapper.iso639_exact, self.mapper.retirements)),
+                'iso15924': exact_matches([name], self.mapper.iso15924_exact)
+            }
+
+    def lookup_entity(self, path, standard=None):
+        """按Omniglot路径返回实体及其分类"""
+        entry = self.paths.get(path)
+        return {
+            'query': path,
+            'entity': entry,
+            'class': self.entity_classes.get(path)
+        }
+
+    def match_label(self, label, standard='iso639'):
+        """模糊匹配前3个ISO代码"""
+        find = {
+            'iso639': self.mapper.find_language_matches,
+            'iso15924': self.mapper.find_writing_system_matches
+        }[standard]
+        with self.match_lock:
+            return {'query': label, 'standard': standard, 'matches': find(None, [label])}
+
+    def query(self, endpoint, values, standard):
+        """执行一批查询，逐个查询记录延迟；返回缓存结果的副本，调用方修改结果不会影响缓存"""
+        handler = self.handlers[endpoint]
+        latencies = self.latencies[endpoint]
+        results = []
+        for value in values:
+            start = time.perf_counter()
+            results.append(copy.deepcopy(handler(value, standard)))
+            latencies.append(time.perf_counter() - start)
+        self.requests[endpoint] += 1
+        return results
+
+    def stats(self):
+        stats = {'uptime_seconds': time.time() - self.started, 'endpoints': {}}
+        for endpoint, handler in self.handlers.items():
+            info = handler.cache_info()
+            lookups = info.hits + info.misses
+            latencies = sorted(self.latencies[endpoint])
+            stats['endpoints'][endpoint] = {
+                'requests': self.requests[endpoint],
+                'queries': lookups,
+                'cache_hits': info.hits,
+                'cache_misses': info.misses,
+                'cache_hit_rate': info.hits / lookups if lookups else 0.0,
+                'cache_size': info.currsize,
+                'latency_ms': {
+                    f"p{int(fraction * 100)}": percentile(latencies, fraction) * 1000
+                    for fraction in (0.5, 0.9, 0.99)
+                } if latencies else {}
+            }
+        return stats
+
+class LookupServer(ThreadingHTTPServer):
+    # 默认的listen队列只有5，多个客户端同时连接时会被重置
+    request_queue_size = 128
+    daemon_threads = True
+
+class LookupHandler(BaseHTTPRequestHandler):
+    service = None
+    # 规定协议版本后客户端可复用连接批量发请求
+    protocol_version = 'HTTP/1.1'
+
+    PARAMS = {'code': 'q', 'name': 'q', 'entity': 'path', 'match': 'q'}
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def endpoint(self):
+        url = urlsplit(self.path)
+        return url.path.strip('/'), parse_qs(url.query)
+
+    def standard(self, value):
+        if value not in ('iso639', 'iso15924'):
+            raise ValueError(f"未知标准: {value}")
+        return value
+
+    def do_GET(self):
+        endpoint, params = self.endpoint()
+        if endpoint == 'stats':
+            self.send_json(200, self.service.stats())
+            return
+        if endpoint not in self.PARAMS:
+            self.send_json(404, {'error': f"未知接口: /{endpoint}"})
+            return
+        values = params.get(self.PARAMS[endpoint])
+        if not values:
+            self.send_json(400, {'error': f"缺少参数: {self.PARAMS[endpoint]}"})
+            return
+        try:
+            standard = self.standard(params.get('standard', ['iso639'])[0]) if endpoint == 'match' else None
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        self.send_json(200, self.service.query(endpoint, values[:1], standard)[0])
+
+    def do_POST(self):
+        endpoint, _ = self.endpoint()
+        # 先读完请求体，否则404响应后剩余字节会留在keep-alive连接里被当作下一个请求
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if endpoint not in self.PARAMS:
+            self.send_json(404, {'error': f"未知接口: /{endpoint}"})
+            return
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError("请求体必须是JSON对象")
+            queries = request['queries']
+            if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+                raise ValueError("queries 必须是字符串列表")
+            standard = self.standard(request.get('standard', 'iso639')) if endpoint == 'match' else None
+        except (ValueError, KeyError) as e:
+            self.send_json(400, {'error': f"请求体无效: {e}"})
+            return
+        self.send_json(200, {'results': self.service.query(endpoint, queries, standard)})
+
+    def log_message(self, format, *args):
+        """请求统计由 /stats 提供，不逐条打印访问日志"""
+
+def main():
+    parser = argparse.ArgumentParser(description='本地ISO/实体查询服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8639)
+    parser.add_argument('--cache-size', type=int, default=4096, help='每个接口的LRU缓存条目数')
+    args = parser.parse_args()
+
+    start = time.time()
+    LookupHandler.service = LookupService(args.cache_size)
+    print(f"索引加载完成: {time.time() - start:.2f} 秒, {len(LookupHandler.service.paths)} 条路径")
+    server = LookupServer((args.host, args.port), LookupHandler)
+    print(f"查询服务已启动: http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO名称MinHash-LSH候选索引
+对ISO 639-3名称的字符shingle集合计算MinHash签名，按 bands × rows 分桶；
+查询只取与标签至少在一个band上完全相同的名称，作为n-gram索引之外的另一种候选生成方式
+直接运行时在Stage1/paths_final.json的全部标签上，对比暴力匹配报告召回率与延迟
+"""
+
+import random
+import zlib
+
+import numpy as np
+
+from candidate_index import char_ngrams
+
+SHINGLE_SIZE = 2
+LSH_BANDS = 32
+LSH_ROWS = 4
+LSH_SEED = 20240501
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+def shingle_hashes(text, n=SHINGLE_SIZE):
+    """字符shingle的确定性哈希（跨进程、跨运行稳定）"""
+    return np.fromiter(
+        (zlib.crc32(gram.encode('utf-8')) % MERSENNE_PRIME for gram in char_ngrams(text, n)),
+        dtype=np.uint64
+    )
+
+class MinHashLSH:
+    """键（ISO代码）到若干文本的MinHash-LSH索引；bands × rows 即签名长度"""
+
+    def __init__(self, entries, bands=LSH_BANDS, rows=LSH_ROWS, n=SHINGLE_SIZE, seed=LSH_SEED):
+        """entries: 可迭代的 (key, text)，同一key可对应多个文本"""
+        self.bands = bands
+        self.rows = rows
+        self.n = n
+        rng = random.Random(seed)
+        num_perm = bands * rows
+        self.a = np.array([rng.randrange(1, MERSENNE_PRIME) for _ in range(num_perm)], dtype=np.uint64)
+        self.b = np.array([rng.randrange(0, MERSENNE_PRIME) for _ in range(num_perm)], dtype=np.uint64)
+
+        self.keys = []
+        self.key_order = {}
+        self.buckets = [{} for _ in range(bands)]
+        seen = set()
+        for key, text in entries:
+            if key not in self.key_order:
+                self.key_order[key] = len(self.keys)
+                self.keys.append(key)
+            # 同一key下重复的文本只索引一次
+            if (key, text) in seen:
+                continue
+            seen.add((key, text))
+            key_id = self.key_order[key]
+            for band, bucket in zip(self.buckets, self.band_keys(text)):
+                band.setdefault(bucket, []).append(key_id)
+
+    def signature(self, text):
+        """MinHash签名：每个哈希函数 (a*x + b) mod p 在shingle集合上的最小值"""
+        hashes = shingle_hashes(text, self.n)
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def band_keys(self, text):
+        """签名按band切分后的桶键"""
+        signature = self.signature(text)
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def candidates(self, text):
+        """返回至少在一个band上与text同桶的key，按索引建立时的顺序排列"""
+        selected = set()
+        for band, bucket in zip(self.buckets, self.band_keys(text)):
+            selected.update(band.get(bucket, ()))
+        return [self.keys[key_id] for key_id in sorted(selected)]
+
+def percentile(values, fraction):
+    """已排序列表的分位数（最近秩）"""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def main():
+    """paths_final.json标签上LSH与n-gram索引相对暴力匹配的召回率与延迟"""
+    import argparse
+    import json
+    import time
+    from pathlib import Path
+    from bounded_scorer import BoundedScorer
+    from iso_catalog import load_catalog, normalize_name
+    from iso_mapper import THRESHOLD
+
+    parser = argparse.ArgumentParser(description='MinHash-LSH召回率与延迟报告')
+    parser.add_argument('--config', action='append', metavar='BANDSxROWS',
+                        help='要评估的参数组合，可重复，如 --config 32x4 --config 16x8（默认同时评估目录内置组合与几组对照）')
+    args = parser.parse_args()
+    configs = [tuple(int(x) for x in config.split('x')) for config in args.config or
+               [f"{LSH_BANDS}x{LSH_ROWS}", '48x3', '16x8', '24x2']]
+
+    paths_file = Path(__file__).resolve().parent.parent / "Stage1" / "paths_final.json"
+    with open(paths_file, 'r', encoding='utf-8') as f:
+        paths = json.load(f)
+    labels = sorted({normalize_name(source['label']) for path in paths for source in path['sources']} - {''})
+
+    catalog = load_catalog()
+    entries = [(code, data[field]) for code, data in catalog['iso639'].items()
+               for field in ('print_name_norm', 'inverted_name_norm')]
+    scorer = BoundedScorer(entries, THRESHOLD)
+
+    def matched_codes(label, codes):
+        return {code for code in codes
+                if max(scorer.score(label, catalog['iso639'][code]['print_name_norm']),
+                       scorer.score(label, catalog['iso639'][code]['inverted_name_norm'])) >= THRESHOLD}
+
+    # 暴力基线：全部名称（长度区间外的整段跳过，结果与逐对ratio相同）
+    expected = {}
+    latencies = {}
+    start = time.perf_counter()
+    for label in labels:
+        t = time.perf_counter()
+        expected[label] = {code for code, name in scorer.entries_in_range(label)
+                           if scorer.score(label, name) >= THRESHOLD}
+        latencies.setdefault('brute_force', []).append(time.perf_counter() - t)
+    print(f"标签: {len(labels)}, ISO 639-3代码: {len(catalog['iso639'])}, 阈值: {THRESHOLD}")
+    print(f"暴力匹配: {time.perf_counter() - start:.2f}s, 有匹配的标签 {sum(1 for codes in expected.values() if codes)}")
+
+    generators = {'ngram': catalog['iso639_index']}
+    for bands, rows in configs:
+        if (bands, rows) == (LSH_BANDS, LSH_ROWS):
+            generators[f"lsh {bands}x{rows}"] = catalog['iso639_lsh']
+        else:
+            start = time.perf_counter()
+            generators[f"lsh {bands}x{rows}"] = MinHashLSH(entries, bands, rows)
+            print(f"构建 lsh {bands}x{rows}: {time.perf_counter() - start:.2f}s")
+
+    expected_pairs = sum(len(codes) for codes in expected.values())
+    report = {}
+    for name, generator in generators.items():
+        found_pairs = 0
+        candidate_counts = []
+        times = []
+        for label in labels:
+            t = time.perf_counter()
+            candidates = generator.candidates(label)
+            found = matched_codes(label, candidates)
+            times.append(time.perf_counter() - t)
+            candidate_counts.append(len(candidates))
+            found_pairs += len(found & expected[label])
+        latencies[name] = times
+        report[name] = {
+            'recall': found_pairs / expected_pairs if expected_pairs else 1.0,
+            'mean_candidates': sum(candidate_counts) / len(candidate_counts)
+        }
+
+    print(f"\n{'生成器':<14}{'召回率':>8}{'平均候选':>10}{'p50 ms':>9}{'p99 ms':>9}{'总计 s':>9}")
+    for name, times in latencies.items():
+        times = sorted(times)
+        stats = report.get(name, {'recall': 1.0, 'mean_candidates': len(catalog['iso639'])})
+        print(f"{name:<14}{stats['recall']:>8.2%}{stats['mean_candidates']:>10.1f}"
+              f"{percentile(times, 0.5) * 1000:>9.3f}{percentile(times, 0.99) * 1000:>9.3f}{sum(times):>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,33 @@
 # -*- coding: utf-8 -*-
 """
 实用的ISO映射脚本 - 生成具体的映射结果
-支持多核并行处理
+支持多核并行处理；按编号分片写出检查点，中断后续跑，可由共享目录的多个进程或机器分担
+合并时在结果旁写出运行记录（阶段耗时、每实体候选数、各进程忙闲时间），--profile 时附带打分的cProfile统计
 """
 
+import argparse
+import cProfile
+import hashlib
 import json
-import csv
-import re
-from difflib import SequenceMatcher
 from collections import defaultdict
 from multiprocessing import Pool, cpu_count
-from functools import partial
+import os
+from pathlib import Path
+import socket
 import time
 
-def normalize_name(name):
-    """标准化名称用于匹配"""
-    name = re.sub(r'\([^)]*\)', '', name)  # 移除括号
-    name = re.sub(r'[,\-\']', ' ', name)   # 替换标点
-    name = re.sub(r'\s+', ' ', name).strip().lower()
-    return name
+from bounded_scorer import BoundedScorer
+from coverage_report import COVERAGE_FILE, REVERSE_INDEX_FILE, write_reports
+from iso_catalog import exact_matches, load_catalog, normalize_name
+from match_cache import MatchCache
+from run_profile import CPROFILE_FILE, RUN_PROFILE_FILE, StageProfile, candidate_summary, cprofile_summary
 
-def similarity_score(str1, str2):
-    """计算相似度"""
-    return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
+SHARD_DIR = 'iso_mapping_shards'
+SHARD_SIZE = 50
+THRESHOLD = 0.8
+
+# 打分逻辑或阈值变化时递增，使匹配缓存中的旧结果失效
+SCORER_VERSION = 'manual_iso_mapping-2'
 
 def load_data():
     """加载所有数据"""
@@ -31,27 +36,10 @@ def load_data():
     with open('entity_analysis_report.json', 'r', encoding='utf-8') as f:
         entities = json.load(f)['entities']
     
-    # 加载ISO 639-3
-    iso639 = {}
-    with open('iso-639-3_Name_Index.tab', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter='\t')
-        for row in reader:
-            iso639[row['Id']] = {
-                'print_name': row['Print_Name'],
-                'inverted_name': row['Inverted_Name']
-            }
-    
-    # 加载ISO 15924
-    iso15924 = {}
-    with open('iso15924-codes.tsv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter='\t')
-        for row in reader:
-            iso15924[row['Code']] = {
-                'english_name': row['English Name'],
-                'alias': row['Alias'] if row['Alias'] else None
-            }
+    # 加载预编译的ISO目录（源表变更时自动重建）
+    catalog = load_catalog()
     
-    return entities, iso639, iso15924
+    return entities, catalog
 
 def resolve_conflicts(entities):
     """解决类型冲突"""
@@ -93,135 +81,323 @@ def resolve_conflicts(entities):
     
     return resolved, conflicts
 
-def find_best_matches(entity_labels, iso_data, threshold=0.8):
-    """找到最佳匹配"""
+def build_scorer(iso_data, threshold=THRESHOLD):
+    """对ISO名称构建剪枝打分器"""
+    return BoundedScorer(
+        ((iso_code, iso_info[field]) for iso_code, iso_info in iso_data.items()
+         for field in ('print_name_norm', 'inverted_name_norm', 'english_name_norm', 'alias_norm')
+         if iso_info.get(field)),
+        threshold
+    )
+
+def score_label(normalized_label, iso_data, scorer, index=None, profile=None):
+    """对单个标签打分，返回超过阈值的匹配（按目录顺序）
+    给定候选索引时只对候选代码精确打分，否则按长度区间整段跳过不可能达到阈值的名称
+    给定profile时分别记录候选生成与打分耗时及候选数"""
+    matches = []
+    threshold = scorer.threshold
+    start = time.perf_counter()
+    if index is None:
+        candidates = scorer.keys_in_range(normalized_label, iso_data)
+    else:
+        candidates = index.candidates(normalized_label)
+    candidates = list(candidates)
+    scoring_start = time.perf_counter()
+    
+    for iso_code in candidates:
+        iso_info = iso_data[iso_code]
+        # 对于ISO 639-3
+        if 'print_name' in iso_info:
+            scores = [
+                scorer.score(normalized_label, iso_info['print_name_norm']),
+                scorer.score(normalized_label, iso_info['inverted_name_norm'])
+            ]
+            max_score = max(scores)
+            if max_score >= threshold:
+                matches.append({'iso_code': iso_code, 'score': max_score, 'iso_name': iso_info['print_name']})
+        
+        # 对于ISO 15924
+        elif 'english_name' in iso_info:
+            scores = [scorer.score(normalized_label, iso_info['english_name_norm'])]
+            if iso_info['alias']:
+                scores.append(scorer.score(normalized_label, iso_info['alias_norm']))
+            max_score = max(scores)
+            if max_score >= threshold:
+                matches.append({'iso_code': iso_code, 'score': max_score, 'iso_name': iso_info['english_name']})
+    
+    if profile is not None:
+        profile.seconds['candidates'] += scoring_start - start
+        profile.seconds['scoring'] += time.perf_counter() - scoring_start
+        profile.scored += len(candidates)
+    return matches
+
+def find_best_matches(entity_labels, iso_data, scorer, index=None, cache=None, standard=None, profile=None,
+                      cprofiler=None):
+    """找到最佳匹配；给定匹配缓存时各标签先查缓存
+    给定cprofiler时只在score_label期间启用，统计中不含精确查找与缓存读写"""
     best_matches = []
     
     for label in entity_labels:
         normalized_label = normalize_name(label)
-        
-        for iso_code, iso_info in iso_data.items():
-            # 对于ISO 639-3
-            if 'print_name' in iso_info:
-                scores = [
-                    similarity_score(normalized_label, normalize_name(iso_info['print_name'])),
-                    similarity_score(normalized_label, normalize_name(iso_info['inverted_name']))
-                ]
-                max_score = max(scores)
-                if max_score >= threshold:
-                    best_matches.append({
-                        'iso_code': iso_code,
-                        'score': max_score,
-                        'omniglot_label': label,
-                        'iso_name': iso_info['print_name']
-                    })
-            
-            # 对于ISO 15924
-            elif 'english_name' in iso_info:
-                scores = [similarity_score(normalized_label, normalize_name(iso_info['english_name']))]
-                if iso_info['alias']:
-                    scores.append(similarity_score(normalized_label, normalize_name(iso_info['alias'])))
-                max_score = max(scores)
-                if max_score >= threshold:
-                    best_matches.append({
-                        'iso_code': iso_code,
-                        'score': max_score,
-                        'omniglot_label': label,
-                        'iso_name': iso_info['english_name']
-                    })
+        if cprofiler is None:
+            score = lambda text: score_label(text, iso_data, scorer, index, profile)
+        else:
+            score = lambda text: cprofiler.runcall(score_label, text, iso_data, scorer, index, profile)
+        label_matches = score(normalized_label) if cache is None else cache.get_or_score(normalized_label, standard, score)
+        for match in label_matches:
+            best_matches.append({
+                'iso_code': match['iso_code'],
+                'score': match['score'],
+                'omniglot_label': label,
+                'iso_name': match['iso_name']
+            })
     
     # 返回分数最高的匹配
     if best_matches:
         return sorted(best_matches, key=lambda x: x['score'], reverse=True)[0]
     return None
 
-def process_entity_batch(entity_batch, iso639, iso15924, resolved_types):
+# 工作进程内的只读ISO目录与类型表，由进程池初始化函数每个进程安装一次
+_worker_catalog = None
+_worker_resolved_types = None
+_worker_cache = None
+_worker_scorers = None
+_worker_profiler = None
+_worker_profile_file = None
+_worker_run_id = None
+
+def init_worker(catalog, resolved_types, run_id, cprofile_dir=None):
+    """进程池初始化：fork时直接继承父进程内存，不随每个任务pickle；匹配缓存连接与打分器每进程各建一份
+    给定cprofile_dir时本进程的累计cProfile统计在每批结束后写到该目录，文件名带运行编号"""
+    global _worker_catalog, _worker_resolved_types, _worker_cache, _worker_scorers
+    global _worker_profiler, _worker_profile_file, _worker_run_id
+    _worker_run_id = run_id
+    _worker_catalog = catalog
+    _worker_resolved_types = resolved_types
+    _worker_cache = MatchCache(catalog['source_hash'], SCORER_VERSION)
+    _worker_scorers = {standard: build_scorer(catalog[standard]) for standard in ('iso639', 'iso15924')}
+    if cprofile_dir is not None:
+        _worker_profiler = cProfile.Profile()
+        _worker_profile_file = cprofile_dir / f"cprofile-{run_id}-{os.getpid()}.prof"
+
+def process_entity_batch(entity_batch):
     """并行处理一批实体"""
+    start_time = time.perf_counter()
+    catalog = _worker_catalog
+    profile = StageProfile()
+    cache_hits, cache_misses = _worker_cache.hits, _worker_cache.misses
     batch_results = {
         'language_mappings': {},
         'writing_mappings': {},
         'unmapped_languages': [],
-        'unmapped_writings': []
+        'unmapped_writings': [],
+        'fast_path_resolved': 0
     }
     
     for entity_id, entity_data in entity_batch:
         if entity_data['is_fragment']:
             continue
         
-        entity_type = resolved_types[entity_id]
+        entity_type = _worker_resolved_types[entity_id]
         labels = entity_data['labels']
         
+        # 快速路径：标准化后精确或倒序命中的直接采用，跳过模糊打分
         if entity_type == 'language':
-            match = find_best_matches(labels, iso639)
+            with profile.stage('exact'):
+                exact = exact_matches(labels, catalog['iso639_exact'], catalog['retirements'])
+            batch_results['fast_path_resolved'] += bool(exact)
+            match = exact[0] if exact else find_best_matches(labels, catalog['iso639'], _worker_scorers['iso639'],
+                                                           index=catalog['iso639_index'],
+                                                           cache=_worker_cache, standard='iso639', profile=profile,
+                                                           cprofiler=_worker_profiler)
             if match:
                 batch_results['language_mappings'][entity_id] = match
             else:
                 batch_results['unmapped_languages'].append({'entity_id': entity_id, 'labels': labels})
         
         elif entity_type == 'writing_system':
-            match = find_best_matches(labels, iso15924)
+            with profile.stage('exact'):
+                exact = exact_matches(labels, catalog['iso15924_exact'])
+            batch_results['fast_path_resolved'] += bool(exact)
+            match = exact[0] if exact else find_best_matches(labels, catalog['iso15924'], _worker_scorers['iso15924'],
+                                                           index=catalog['iso15924_index'],
+                                                           cache=_worker_cache, standard='iso15924', profile=profile,
+                                                           cprofiler=_worker_profiler)
             if match:
                 batch_results['writing_mappings'][entity_id] = match
             else:
                 batch_results['unmapped_writings'].append({'entity_id': entity_id, 'labels': labels})
+        profile.end_entity()
     
+    _worker_cache.commit()
+    # 全部命中缓存的进程没有调用过打分，不写出空统计
+    if _worker_profiler is not None and _worker_cache.misses:
+        _worker_profiler.dump_stats(_worker_profile_file)
+    batch_results['cache_hits'] = _worker_cache.hits - cache_hits
+    batch_results['cache_misses'] = _worker_cache.misses - cache_misses
+    batch_results['worker'] = f"{socket.gethostname()}:{os.getpid()}"
+    batch_results['run'] = _worker_run_id
+    batch_results['entities'] = len(entity_batch)
+    batch_results['busy_seconds'] = time.perf_counter() - start_time
+    batch_results['profile'] = profile.to_dict()
     return batch_results
 
-def chunk_dict(data, chunk_size):
-    """将字典分块"""
-    items = list(data.items())
-    for i in range(0, len(items), chunk_size):
-        yield items[i:i + chunk_size]
+def process_shard(task):
+    """处理一个编号分片，附带分片号与起止时间"""
+    shard_id, entity_batch = task
+    started = time.time()
+    shard_result = process_entity_batch(entity_batch)
+    shard_result['shard'] = shard_id
+    shard_result['started'] = started
+    shard_result['finished'] = time.time()
+    return shard_result
 
-def main():
-    print("开始ISO映射...")
-    
-    # 加载数据
-    entities, iso639, iso15924 = load_data()
-    print(f"加载完成: {len(entities)} 实体, {len(iso639)} ISO639, {len(iso15924)} ISO15924")
-    
-    # 解决冲突
-    resolved_types, conflicts = resolve_conflicts(entities)
-    print(f"解决了 {len(conflicts)} 个类型冲突")
-    
-    # 准备多核并行处理
-    num_cores = cpu_count()
-    print(f"使用 {num_cores} 个CPU核心进行并行处理")
+def file_hash(path):
+    """文件内容的sha256"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def write_atomic(path, data):
+    """先写临时文件再改名，中断时不会留下半个结果文件"""
+    tmp = path.with_name(f"{path.name}.{socket.gethostname()}-{os.getpid()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def shard_file(shard_dir, shard_id):
+    return shard_dir / f"shard-{shard_id:04d}.json"
+
+def load_or_create_manifest(shard_dir, inputs, entity_ids, shard_size):
+    """首个运行者写出分片清单，之后的运行（包括共享目录的其他进程或机器）沿用同一清单
+    清单记录输入哈希与各分片的实体；分片是否完成以其结果文件是否存在为准（结果文件原子写出）"""
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = shard_dir / 'manifest.json'
+    tmp = shard_dir / f"manifest.json.{socket.gethostname()}-{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({
+            'inputs': inputs,
+            'shard_size': shard_size,
+            'shards': [entity_ids[i:i + shard_size] for i in range(0, len(entity_ids), shard_size)]
+        }, f, ensure_ascii=False, indent=2)
+    try:
+        os.link(tmp, manifest_path)  # 原子创建，已有清单时失败
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp)
     
-    # 过滤掉fragment实体
-    non_fragment_entities = {k: v for k, v in entities.items() if not v['is_fragment']}
-    total_entities = len(non_fragment_entities)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest['inputs'] != inputs:
+        raise SystemExit(f"{shard_dir} 中的分片属于另一组输入（实体报告、ISO目录或打分器版本不同），请换用新的分片目录")
+    return manifest
+
+def pending_shards(shard_dir, manifest, part=0, parts=1):
+    """本进程负责且尚未完成的分片号"""
+    return [shard_id for shard_id in range(len(manifest['shards']))
+            if shard_id % parts == part and not shard_file(shard_dir, shard_id).exists()]
+
+def covered_seconds(windows):
+    """若干 (开始, 结束) 时间段并集的总长：多台机器同时运行的重叠部分只计一次，中断与续跑之间的间隔不计"""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(windows):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+class ResultMerger:
+    """合并分片结果，统计各次运行的时间段与各工作进程的吞吐量"""
     
-    # 将实体分块
-    chunk_size = max(1, total_entities // (num_cores * 4))  # 每核心4个任务
-    entity_chunks = list(chunk_dict(non_fragment_entities, chunk_size))
+    def __init__(self):
+        self.language_mappings = {}
+        self.writing_mappings = {}
+        self.unmapped = {'languages': [], 'writing_systems': []}
+        self.fast_path_resolved = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.started = None
+        self.finished = None
+        self.runs = {}  # 运行编号 -> [最早分片开始, 最晚分片结束]
+        self.workers = defaultdict(lambda: {'batches': 0, 'entities': 0, 'busy_seconds': 0.0,
+                                            'started': None, 'finished': None})
+        self.profile = StageProfile()
     
-    print(f"将 {total_entities} 个实体分为 {len(entity_chunks)} 个批次处理")
+    def add(self, batch_result):
+        self.language_mappings.update(batch_result['language_mappings'])
+        self.writing_mappings.update(batch_result['writing_mappings'])
+        self.unmapped['languages'].extend(batch_result['unmapped_languages'])
+        self.unmapped['writing_systems'].extend(batch_result['unmapped_writings'])
+        self.fast_path_resolved += batch_result['fast_path_resolved']
+        self.cache_hits += batch_result['cache_hits']
+        self.cache_misses += batch_result['cache_misses']
+        self.started = min(self.started or batch_result['started'], batch_result['started'])
+        self.finished = max(self.finished or batch_result['finished'], batch_result['finished'])
+        run = self.runs.setdefault(batch_result.get('run'), [batch_result['started'], batch_result['finished']])
+        run[0] = min(run[0], batch_result['started'])
+        run[1] = max(run[1], batch_result['finished'])
+        
+        worker = self.workers[batch_result['worker']]
+        worker['batches'] += 1
+        worker['entities'] += batch_result['entities']
+        worker['busy_seconds'] += batch_result['busy_seconds']
+        worker['started'] = min(worker['started'] or batch_result['started'], batch_result['started'])
+        worker['finished'] = max(worker['finished'] or batch_result['finished'], batch_result['finished'])
+        self.profile.add(batch_result['profile'])
     
-    # 创建并行处理函数
-    process_batch = partial(process_entity_batch, 
-                           iso639=iso639, 
-                           iso15924=iso15924, 
-                           resolved_types=resolved_types)
+    def processing_seconds(self):
+        """各次运行时间段的并集总长"""
+        return covered_seconds(self.runs.values())
     
-    # 执行并行映射
-    start_time = time.time()
-    with Pool(num_cores) as pool:
-        batch_results = pool.map(process_batch, entity_chunks)
+    def worker_statistics(self):
+        """各工作进程实际达到的吞吐量与空闲时间
+        墙钟时间取该进程自己的首个分片开始到最后一个分片结束，不含其他运行或中断的间隔"""
+        statistics = {}
+        for worker, stats in sorted(self.workers.items()):
+            wall_seconds = stats['finished'] - stats['started']
+            statistics[worker] = dict(
+                stats,
+                wall_seconds=wall_seconds,
+                idle_seconds=max(0.0, wall_seconds - stats['busy_seconds']),
+                entities_per_second=stats['entities'] / stats['busy_seconds'] if stats['busy_seconds'] else 0.0,
+                utilization=min(1.0, stats['busy_seconds'] / wall_seconds) if wall_seconds else 1.0
+            )
+        return statistics
     
-    # 合并结果
-    language_mappings = {}
-    writing_mappings = {}
-    unmapped = {'languages': [], 'writing_systems': []}
+    def ordered(self, entity_order):
+        """按实体原始顺序整理结果，使输出与分片完成顺序无关"""
+        position = {eid: i for i, eid in enumerate(entity_order)}
+        by_position = lambda eid: position[eid]
+        return (
+            {eid: self.language_mappings[eid] for eid in sorted(self.language_mappings, key=by_position)},
+            {eid: self.writing_mappings[eid] for eid in sorted(self.writing_mappings, key=by_position)},
+            {key: sorted(items, key=lambda x: position[x['entity_id']]) for key, items in self.unmapped.items()}
+        )
+
+def merge_shards(shard_dir, manifest, resolved_types, conflicts, stages, cprofile=False):
+    """合并全部分片，写出与单次运行相同结构的iso_mapping_results.json及运行记录
+    stages: 本进程的加载、冲突解决等阶段耗时，与各分片的工作进程阶段耗时一同写入运行记录
+    cprofile: 汇总分片目录中各工作进程的cProfile统计"""
+    missing = pending_shards(shard_dir, manifest)
+    if missing:
+        raise SystemExit(f"尚有 {len(missing)} 个分片未完成（如 {missing[:5]}），无法合并")
     
-    for batch_result in batch_results:
-        language_mappings.update(batch_result['language_mappings'])
-        writing_mappings.update(batch_result['writing_mappings'])
-        unmapped['languages'].extend(batch_result['unmapped_languages'])
-        unmapped['writing_systems'].extend(batch_result['unmapped_writings'])
+    merger = ResultMerger()
+    for shard_id in range(len(manifest['shards'])):
+        with open(shard_file(shard_dir, shard_id), 'r', encoding='utf-8') as f:
+            merger.add(json.load(f))
     
-    processing_time = time.time() - start_time
-    print(f"并行处理完成，耗时 {processing_time:.2f} 秒")
+    entity_order = [eid for shard in manifest['shards'] for eid in shard]
+    total_entities = len(entity_order)
+    processing_time = merger.processing_seconds()
+    span = merger.finished - merger.started
+    language_mappings, writing_mappings, unmapped = merger.ordered(entity_order)
     
     # 保存结果
     results = {
@@ -232,8 +408,15 @@ def main():
             'writing_systems_mapped': len(writing_mappings),
             'languages_unmapped': len(unmapped['languages']),
             'writing_systems_unmapped': len(unmapped['writing_systems']),
+            'fast_path_resolved': merger.fast_path_resolved,
+            'fast_path_fraction': merger.fast_path_resolved / total_entities,
+            'cache_hits': merger.cache_hits,
+            'cache_misses': merger.cache_misses,
             'processing_time_seconds': processing_time,
-            'cpu_cores_used': num_cores
+            'span_seconds': span,
+            'runs': len(merger.runs),
+            'cpu_cores_used': len(merger.workers),
+            'workers': merger.worker_statistics()
         },
         'mappings': {
             'languages': language_mappings,
@@ -243,8 +426,35 @@ def main():
         'conflicts_resolved': [{'entity_id': eid, 'resolved_as': resolved_types[eid]} for eid in conflicts]
     }
     
-    with open('iso_mapping_results.json', 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    with stages.stage('write'):
+        with open('iso_mapping_results.json', 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        
+        # ISO代码 -> 实体的反向索引与覆盖率报告
+        write_reports(
+            [(eid, 'iso639', mapping['iso_code']) for eid, mapping in language_mappings.items()] +
+            [(eid, 'iso15924', mapping['iso_code']) for eid, mapping in writing_mappings.items()]
+        )
+    
+    # 运行记录：主进程阶段为墙钟时间，工作进程阶段为各进程累计时间
+    run_profile = {
+        'finished': merger.finished,
+        'processing_time_seconds': processing_time,
+        'span_seconds': span,
+        'runs': len(merger.runs),
+        'stages': dict(stages.seconds),
+        'worker_stages': dict(merger.profile.seconds),
+        'candidates_per_entity': candidate_summary(merger.profile.candidates),
+        'workers': results['statistics']['workers']
+    }
+    if cprofile:
+        # 只汇总产生了当前分片的运行的统计，分片目录中其他运行留下的文件不计入
+        run_profile['cprofile'] = cprofile_summary(sorted(
+            path for run_id in merger.runs if run_id
+            for path in shard_dir.glob(f"cprofile-{run_id}-*.prof")
+        ))
+    with open(RUN_PROFILE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(run_profile, f, ensure_ascii=False, indent=2)
     
     # 输出统计
     print(f"\n=== 映射完成 ===")
@@ -254,9 +464,85 @@ def main():
     print(f"书写系统映射成功: {len(writing_mappings)}")
     print(f"未映射语言: {len(unmapped['languages'])}")
     print(f"未映射书写系统: {len(unmapped['writing_systems'])}")
-    print(f"处理时间: {processing_time:.2f} 秒")
-    print(f"使用CPU核心: {num_cores}")
+    print(f"快速路径解析: {merger.fast_path_resolved} ({merger.fast_path_resolved / total_entities:.1%})")
+    print(f"匹配缓存: 命中 {merger.cache_hits}, 新打分 {merger.cache_misses}")
+    print(f"处理时间: {processing_time:.2f} 秒（{len(merger.runs)} 次运行，首尾跨度 {span:.2f} 秒）")
+    for worker, stats in results['statistics']['workers'].items():
+        print(f"  进程 {worker}: {stats['entities']} 实体, {stats['entities_per_second']:.1f} 实体/秒, "
+              f"空闲 {stats['idle_seconds']:.2f} 秒")
+    print("阶段耗时: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in
+                                  {**run_profile['stages'], **run_profile['worker_stages']}.items()))
+    candidates = run_profile['candidates_per_entity']
+    print(f"每实体打分候选数: 平均 {candidates['mean']:.1f}, p50 {candidates['p50']}, "
+          f"p99 {candidates['p99']}, 最大 {candidates['max']}")
     print(f"\n结果已保存到: iso_mapping_results.json")
+    print(f"反向索引与覆盖率报告已保存到: {REVERSE_INDEX_FILE}, {COVERAGE_FILE}")
+    print(f"运行记录已保存到: {RUN_PROFILE_FILE}" + (f", cProfile统计: {CPROFILE_FILE}" if cprofile else ''))
+
+def parse_part(value):
+    """解析 K/N：共N个进程分担分片时本进程为第K个（从0开始）"""
+    part, parts = (int(x) for x in value.split('/'))
+    if not 0 <= part < parts:
+        raise argparse.ArgumentTypeError(f"无效的分担编号: {value}")
+    return part, parts
+
+def main():
+    parser = argparse.ArgumentParser(description='分片、可续跑的ISO映射')
+    parser.add_argument('command', nargs='?', default='run', choices=['run', 'status', 'merge'],
+                        help='run: 处理未完成分片，全部完成后自动合并；status: 查看进度；merge: 仅合并')
+    parser.add_argument('--shard-dir', type=Path, default=Path(SHARD_DIR))
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='每个分片的实体数（仅首次创建清单时生效）')
+    parser.add_argument('--part', type=parse_part, default=(0, 1),
+                        help='K/N：与其他进程或机器共享分片目录时只处理编号模N余K的分片')
+    parser.add_argument('--profile', action='store_true',
+                        help='工作进程启用cProfile，统计写到分片目录，合并时汇总（merge时同样指定）')
+    args = parser.parse_args()
+    
+    print("开始ISO映射...")
+    stages = StageProfile()
+    
+    # 加载数据
+    with stages.stage('load'):
+        entities, catalog = load_data()
+    print(f"加载完成: {len(entities)} 实体, {len(catalog['iso639'])} ISO639, {len(catalog['iso15924'])} ISO15924")
+    
+    # 解决冲突
+    with stages.stage('conflicts'):
+        resolved_types, conflicts = resolve_conflicts(entities)
+    print(f"解决了 {len(conflicts)} 个类型冲突")
+    
+    # 过滤掉fragment实体，按固定顺序切分为编号分片
+    entity_ids = [k for k, v in entities.items() if not v['is_fragment']]
+    inputs = {
+        'entity_report': file_hash('entity_analysis_report.json'),
+        'catalog': catalog['source_hash'],
+        'scorer': SCORER_VERSION
+    }
+    manifest = load_or_create_manifest(args.shard_dir, inputs, entity_ids, args.shard_size)
+    total_shards = len(manifest['shards'])
+    
+    if args.command == 'run':
+        part, parts = args.part
+        pending = pending_shards(args.shard_dir, manifest, part, parts)
+        print(f"分片: 共 {total_shards} 个, 本进程待处理 {len(pending)} 个（{part}/{parts}）")
+        
+        # 准备多核并行处理
+        num_cores = cpu_count()
+        print(f"使用 {num_cores} 个CPU核心进行并行处理")
+        
+        # 执行并行映射：目录经初始化函数每进程安装一次，工作进程从任务队列逐个领取分片，每完成一个即原子写出
+        tasks = ((shard_id, [(eid, entities[eid]) for eid in manifest['shards'][shard_id]]) for shard_id in pending)
+        # 运行编号随分片结果保存，合并时据此划分各次运行的时间段并找到本次运行的cProfile统计
+        run_id = f"{socket.gethostname()}-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}"
+        cprofile_dir = args.shard_dir if args.profile else None
+        with Pool(num_cores, initializer=init_worker, initargs=(catalog, resolved_types, run_id, cprofile_dir)) as pool:
+            for shard_result in pool.imap_unordered(process_shard, tasks):
+                write_atomic(shard_file(args.shard_dir, shard_result['shard']), shard_result)
+    
+    remaining = pending_shards(args.shard_dir, manifest)
+    print(f"已完成分片: {total_shards - len(remaining)}/{total_shards}")
+    if args.command == 'merge' or (args.command == 'run' and not remaining):
+        merge_shards(args.shard_dir, manifest, resolved_types, conflicts, stages, args.profile)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
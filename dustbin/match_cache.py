@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO匹配结果持久缓存
+以 (标准化标签, 目标标准, 目录哈希, 打分器版本) 为键保存打分后的候选列表，重跑时只为新标签打分
+用法: python match_cache.py stats | compact
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+
+from iso_catalog import CACHE_DIR, load_catalog
+
+CACHE_FILE = CACHE_DIR / "match_cache.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    label TEXT NOT NULL,
+    standard TEXT NOT NULL,
+    catalog_key TEXT NOT NULL,
+    scorer TEXT NOT NULL,
+    candidates TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (label, standard, catalog_key, scorer)
+) WITHOUT ROWID
+"""
+
+class MatchCache:
+    """单个目录版本与打分器版本下的标签打分缓存；多个进程可各自打开同一文件
+    新打分的结果先留在内存中，commit时一次写入并立即提交：打分期间不持有数据库写锁，多个进程冷缓存时不会互相排队"""
+
+    def __init__(self, catalog_key, scorer, path=CACHE_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.catalog_key = catalog_key
+        self.scorer = scorer
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, label, standard):
+        """返回缓存的候选列表，未命中返回None"""
+        candidates = self.pending.get((label, standard))
+        if candidates is not None:
+            self.hits += 1
+            return candidates
+        row = self.conn.execute(
+            "SELECT candidates FROM matches WHERE label=? AND standard=? AND catalog_key=? AND scorer=?",
+            (label, standard, self.catalog_key, self.scorer)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, label, standard, candidates):
+        """记下新打分的结果，commit时写入"""
+        self.pending[(label, standard)] = candidates
+
+    def get_or_score(self, label, standard, score):
+        """先查缓存，未命中时调用score(label)打分并记下"""
+        candidates = self.get(label, standard)
+        if candidates is None:
+            candidates = score(label)
+            self.put(label, standard, candidates)
+        return candidates
+
+    def commit(self):
+        """把记下的结果在一个短事务中写入"""
+        if not self.pending:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?)",
+                [(label, standard, self.catalog_key, self.scorer, json.dumps(candidates, ensure_ascii=False), now)
+                 for (label, standard), candidates in self.pending.items()]
+            )
+        self.pending = {}
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+def stats(path=CACHE_FILE):
+    """按目录版本与打分器统计缓存条目"""
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    current = load_catalog()['source_hash']
+    for catalog_key, scorer, count in conn.execute(
+        "SELECT catalog_key, scorer, COUNT(*) FROM matches GROUP BY catalog_key, scorer"
+    ):
+        marker = '当前' if catalog_key == current else '过期'
+        print(f"{catalog_key[:12]} ({marker}) {scorer}: {count} 条")
+    conn.close()
+
+def compact(path=CACHE_FILE):
+    """删除不属于当前目录版本的条目并回收空间"""
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    current = load_catalog()['source_hash']
+    removed = conn.execute("DELETE FROM matches WHERE catalog_key != ?", (current,)).rowcount
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    print(f"已删除过期条目: {removed}")
+
+def main():
+    parser = argparse.ArgumentParser(description='ISO匹配结果缓存维护')
+    parser.add_argument('command', choices=['stats', 'compact'])
+    args = parser.parse_args()
+    {'stats': stats, 'compact': compact}[args.command]()
+
+if __name__ == "__main__":
+    main()
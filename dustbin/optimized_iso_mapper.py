@@ -5,22 +5,112 @@
 使用多核并行和向量化技术提高性能
 """
 
-import csv
+import argparse
 import json
-import re
 import time
-from collections import defaultdict
-from multiprocessing import Pool, cpu_count
-from functools import partial
-import numpy as np
+from collections import Counter, defaultdict
 from difflib import SequenceMatcher
 
+import numpy as np
+from scipy import sparse
+
+from iso_catalog import exact_matches, load_catalog, normalize_name
+from manual_iso_mapping import resolve_conflicts
+
+NGRAM_SIZE = 3
+TOP_K = 3
+RESCORE_POOL = 50         # 重新打分时从TF-IDF取的候选名称数
+TFIDF_THRESHOLD = 0.7     # TF-IDF余弦相似度阈值
+RESCORE_THRESHOLD = 0.85  # SequenceMatcher重新打分后的阈值（与iso_mapper一致）
+BLOCK_SIZE = 1024         # 每次稠密化的标签行数，控制内存
+
+class TfidfMatcher:
+    """字符n-gram TF-IDF向量化匹配器"""
+    
+    def __init__(self, entries, n=NGRAM_SIZE):
+        """entries: 可迭代的 (iso_code, matched_field, normalized_name)"""
+        self.n = n
+        self.codes, self.fields, texts = [], [], []
+        self.code_order = {}
+        for code, field, text in entries:
+            self.code_order.setdefault(code, len(self.code_order))
+            self.codes.append(code)
+            self.fields.append(field)
+            texts.append(text)
+        
+        self.vocabulary = {}
+        counts = self.count_matrix(texts, grow=True)
+        df = np.bincount(counts.indices, minlength=len(self.vocabulary))
+        self.idf = np.log((1 + len(texts)) / (1 + df)) + 1
+        self.matrix = self.weight(counts).T.tocsr()
+    
+    def ngrams(self, text):
+        padded = f" {text} "
+        return [padded[i:i + self.n] for i in range(max(1, len(padded) - self.n + 1))]
+    
+    def count_matrix(self, texts, grow=False):
+        """文本 -> n-gram计数稀疏矩阵；查询时忽略词表外n-gram"""
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            for gram, count in Counter(self.ngrams(text)).items():
+                column = self.vocabulary.get(gram)
+                if column is None:
+                    if not grow:
+                        continue
+                    column = self.vocabulary[gram] = len(self.vocabulary)
+                indices.append(column)
+                data.append(count)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr)),
+            shape=(len(texts), len(self.vocabulary))
+        )
+    
+    def weight(self, counts):
+        """乘以IDF并按行L2归一化"""
+        weighted = counts @ sparse.diags(self.idf.astype(np.float32))
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ weighted
+    
+    def top_k(self, texts, k):
+        """返回每个文本按余弦相似度降序的前k个代码记录（同一代码只保留最高分字段）"""
+        queries = self.weight(self.count_matrix(texts))
+        # 一个代码可有多个名称，多取一些名称以便按代码去重后仍有k个
+        name_k = min(k * 4, self.matrix.shape[1])
+        results = []
+        for start in range(0, len(texts), BLOCK_SIZE):
+            scores = (queries[start:start + BLOCK_SIZE] @ self.matrix).toarray()
+            top = np.argpartition(-scores, name_k - 1, axis=1)[:, :name_k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            for row_ids, row_scores in zip(np.take_along_axis(top, order, axis=1),
+                                           np.take_along_axis(top_scores, order, axis=1)):
+                records, seen = [], set()
+                for name_id, score in zip(row_ids.tolist(), row_scores.tolist()):
+                    code = self.codes[name_id]
+                    if score <= 0 or code in seen:
+                        continue
+                    seen.add(code)
+                    records.append({'iso_code': code, 'score': score, 'matched_field': self.fields[name_id]})
+                    if len(records) == k:
+                        break
+                results.append(records)
+        return results
+
 class OptimizedISOMapper:
     def __init__(self):
         self.entities = {}
         self.iso639_codes = {}
         self.iso15924_codes = {}
         self.conflicts = []
+        self.resolved_types = {}
+        self.iso639_matcher = None
+        self.iso15924_matcher = None
+        self.iso639_exact = {}
+        self.retirements = {}
+        self.iso15924_exact = {}
+        self.fast_path_resolved = 0
         self.mappings = {
             'languages': {},
             'writing_systems': {},
@@ -45,26 +135,15 @@ class OptimizedISOMapper:
                 type_hints <= {'writing_system', 'single_lang_writing', 'multi_lang_writing'}
             ):
                 self.conflicts.append(entity_id)
+        self.resolved_types, _ = resolve_conflicts(self.entities)
         
         print("正在加载ISO标准数据...")
-        # 加载ISO 639-3
-        with open('iso-639-3_Name_Index.tab', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            for row in reader:
-                self.iso639_codes[row['Id']] = {
-                    'print_name': row['Print_Name'],
-                    'inverted_name': row['Inverted_Name']
-                }
-        
-        # 加载ISO 15924
-        with open('iso15924-codes.tsv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            for row in reader:
-                self.iso15924_codes[row['Code']] = {
-                    'number': row['N°'],
-                    'english_name': row['English Name'],
-                    'alias': row['Alias'] if row['Alias'] else None
-                }
+        catalog = load_catalog()
+        self.iso639_codes = catalog['iso639']
+        self.iso15924_codes = catalog['iso15924']
+        self.iso639_exact = catalog['iso639_exact']
+        self.retirements = catalog['retirements']
+        self.iso15924_exact = catalog['iso15924_exact']
         
         print(f"数据加载完成:")
         print(f"  实体: {len(self.entities)} 个（冲突: {len(self.conflicts)} 个）")
@@ -73,10 +152,7 @@ class OptimizedISOMapper:
     
     def normalize_name(self, name):
         """标准化名称"""
-        name = re.sub(r'\([^)]*\)', '', name)
-        name = re.sub(r'[,\-\']', ' ', name)
-        name = re.sub(r'\s+', ' ', name).strip().lower()
-        return name
+        return normalize_name(name)
     
     def similarity_score(self, str1, str2):
         """计算相似度分数"""
@@ -130,89 +206,146 @@ class OptimizedISOMapper:
         print(f"明确的语言: {summary['statistics']['clear_languages']}")
         print(f"明确的书写系统: {summary['statistics']['clear_writing_systems']}")
         print(f"\n摘要已保存到: mapping_summary.json")
-        print(f"\n建议: 由于计算量大，详细的ISO映射建议手动执行")
     
-    def create_manual_mapping_script(self):
-        """创建供手动执行的高效映射脚本"""
-        script_content = '''#!/usr/bin/env python3
-"""
-手动执行的高效ISO映射脚本
-使用向量化和多进程优化
-"""
-
-import json
-import csv
-import numpy as np
-from multiprocessing import Pool, cpu_count
-from difflib import SequenceMatcher
-import re
-from functools import partial
-import time
-
-def normalize_name(name):
-    name = re.sub(r'\\([^)]*\\)', '', name)
-    name = re.sub(r'[,\\-\\']', ' ', name)
-    name = re.sub(r'\\s+', ' ', name).strip().lower()
-    return name
-
-def similarity_batch(target_name, iso_names):
-    """批量计算相似度"""
-    target_norm = normalize_name(target_name)
-    scores = []
-    for iso_name in iso_names:
-        iso_norm = normalize_name(iso_name)
-        score = SequenceMatcher(None, target_norm, iso_norm).ratio()
-        scores.append(score)
-    return scores
-
-def process_entity_batch(entity_batch, iso_data, threshold=0.85):
-    """处理一批实体的映射"""
-    results = []
-    for entity_id, entity_info in entity_batch:
-        best_matches = []
-        for label in entity_info['labels']:
-            # 这里可以添加具体的匹配逻辑
-            # 为了演示，简化处理
-            pass
-        results.append((entity_id, best_matches))
-    return results
-
-def main():
-    print("开始高效ISO映射...")
+    def build_matchers(self):
+        """对ISO名称构建TF-IDF矩阵"""
+        self.iso639_matcher = TfidfMatcher(
+            (code, field, data[f'{field}_norm'])
+            for code, data in self.iso639_codes.items()
+            for field in ('print_name', 'inverted_name')
+        )
+        self.iso15924_matcher = TfidfMatcher(
+            (code, field, data[f'{field}_norm'])
+            for code, data in self.iso15924_codes.items()
+            for field in ('english_name', 'alias')
+            if data[f'{field}_norm']
+        )
     
-    # 使用多核处理
-    num_cores = cpu_count()
-    print(f"使用 {num_cores} 个CPU核心")
+    def rescore(self, normalized_label, candidates, iso_codes, fields, code_order):
+        """对候选代码用SequenceMatcher重新打分；同分时按目录顺序，与逐对比较结果一致"""
+        records = []
+        for iso_code in sorted(candidates, key=code_order.get):
+            iso_data = iso_codes[iso_code]
+            best_score, best_field = 0, None
+            for field in fields:
+                if iso_data[f'{field}_norm']:
+                    score = self.similarity_score(normalized_label, iso_data[f'{field}_norm'])
+                    if score > best_score:
+                        best_score, best_field = score, field
+            records.append({'iso_code': iso_code, 'score': best_score, 'matched_field': best_field})
+        records.sort(key=lambda x: x['score'], reverse=True)
+        return records
     
-    # 加载数据
-    with open('entity_analysis_report.json', 'r') as f:
-        entities = json.load(f)['entities']
+    def match_labels(self, labels, matcher, iso_codes, fields, rescore=False):
+        """一次矩阵乘法为全部标签生成按分数降序的候选记录"""
+        normalized = sorted({self.normalize_name(label) for label in labels})
+        pool = RESCORE_POOL if rescore else TOP_K
+        results = {}
+        for normalized_label, records in zip(normalized, matcher.top_k(normalized, pool)):
+            if rescore:
+                records = self.rescore(normalized_label, [r['iso_code'] for r in records],
+                                       iso_codes, fields, matcher.code_order)
+            results[normalized_label] = records[:TOP_K]
+        return results
     
-    # 这里添加具体的并行处理逻辑
-    print("映射完成！")
-
-if __name__ == "__main__":
-    main()
-'''
+    def create_mappings(self, rescore=False):
+        """用向量化引擎创建实体到ISO代码的映射"""
+        threshold = RESCORE_THRESHOLD if rescore else TFIDF_THRESHOLD
+        targets = {
+            'language': ('languages', self.iso639_matcher, self.iso639_codes, self.iso639_exact, self.retirements,
+                         ('print_name', 'inverted_name'), 'print_name'),
+            'writing_system': ('writing_systems', self.iso15924_matcher, self.iso15924_codes, self.iso15924_exact, None,
+                               ('english_name', 'alias'), 'english_name')
+        }
+        
+        entities_by_type = defaultdict(list)
+        for entity_id, entity_data in self.entities.items():
+            if entity_data['is_fragment']:
+                continue
+            entities_by_type[self.resolved_types[entity_id]].append(entity_id)
         
-        with open('manual_iso_mapping.py', 'w', encoding='utf-8') as f:
-            f.write(script_content)
+        for entity_type, (key, matcher, iso_codes, exact_index, retirements, fields, name_field) in targets.items():
+            entity_ids = entities_by_type[entity_type]
+            # 快速路径：标准化后精确或倒序命中的实体不进入向量化打分
+            exact = {eid: exact_matches(self.entities[eid]['labels'], exact_index, retirements) for eid in entity_ids}
+            label_matches = self.match_labels(
+                [label for eid in entity_ids if not exact[eid] for label in self.entities[eid]['labels']],
+                matcher, iso_codes, fields, rescore
+            )
+            
+            for entity_id in entity_ids:
+                labels = self.entities[entity_id]['labels']
+                if exact[entity_id]:
+                    self.fast_path_resolved += 1
+                    matches = exact[entity_id][:TOP_K]
+                    self.mappings[key][entity_id] = {
+                        'best_match': matches[0],
+                        'all_matches': matches,
+                        'labels': list(labels)
+                    }
+                    continue
+                
+                candidates = []
+                for label in labels:
+                    for record in label_matches[self.normalize_name(label)]:
+                        if record['score'] >= threshold:
+                            candidates.append(dict(
+                                record,
+                                omniglot_label=label,
+                                iso_name=iso_codes[record['iso_code']][name_field]
+                            ))
+                candidates.sort(key=lambda x: x['score'], reverse=True)
+                
+                seen_codes = set()
+                matches = []
+                for match in candidates:
+                    if match['iso_code'] not in seen_codes:
+                        matches.append(match)
+                        seen_codes.add(match['iso_code'])
+                matches = matches[:TOP_K]
+                
+                if matches:
+                    self.mappings[key][entity_id] = {
+                        'best_match': matches[0],
+                        'all_matches': matches,
+                        'labels': list(labels)
+                    }
+                else:
+                    self.mappings['unmapped'][key].append({
+                        'entity_id': entity_id,
+                        'labels': list(labels)
+                    })
         
-        print(f"已创建手动执行脚本: manual_iso_mapping.py")
+        print(f"\n=== 映射结果统计 ===")
+        print(f"成功映射的语言: {len(self.mappings['languages'])}")
+        print(f"成功映射的书写系统: {len(self.mappings['writing_systems'])}")
+        print(f"未映射的语言: {len(self.mappings['unmapped']['languages'])}")
+        print(f"未映射的书写系统: {len(self.mappings['unmapped']['writing_systems'])}")
+        attempted = sum(len(entities_by_type[entity_type]) for entity_type in targets)
+        print(f"快速路径解析: {self.fast_path_resolved}/{attempted} ({self.fast_path_resolved / attempted:.1%})")
+    
+    def save_mappings(self):
+        """保存映射结果"""
+        with open('iso_mappings.json', 'w', encoding='utf-8') as f:
+            json.dump(self.mappings, f, ensure_ascii=False, indent=2)
+        print(f"\n映射结果已保存到: iso_mappings.json")
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='向量化ISO映射')
+    parser.add_argument('--rescore', action='store_true',
+                        help='对TF-IDF前若干候选用SequenceMatcher重新打分')
+    args = parser.parse_args()
+    
     mapper = OptimizedISOMapper()
     mapper.load_data()
-    
-    print("\n由于性能考虑，创建摘要报告而非完整映射...")
     mapper.create_summary_report()
-    mapper.create_manual_mapping_script()
     
-    print("\n建议后续步骤:")
-    print("1. 查看 mapping_summary.json 了解数据分布")
-    print("2. 根据需要手动执行 manual_iso_mapping.py")
-    print("3. 或者使用更高性能的环境进行完整映射")
+    start_time = time.time()
+    mapper.build_matchers()
+    mapper.create_mappings(rescore=args.rescore)
+    print(f"映射耗时: {time.time() - start_time:.2f} 秒")
+    mapper.save_mappings()
 
 if __name__ == "__main__":
     main()
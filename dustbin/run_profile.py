@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+映射运行的性能记录
+各阶段累计耗时、每个实体实际打分的候选数直方图；工作进程各记一份随分片结果返回，合并后写出JSON运行记录
+启用cProfile时每个工作进程把累计统计写到分片目录，合并时汇总为一个.prof文件并列出耗时最多的函数
+"""
+
+import pstats
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+RUN_PROFILE_FILE = 'iso_mapping_profile.json'
+CPROFILE_FILE = 'iso_mapping_profile.prof'
+CPROFILE_TOP = 20
+
+class StageProfile:
+    """阶段耗时（秒）与每实体候选数"""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.candidates = Counter()  # 候选数 -> 实体数
+        self.scored = 0  # 当前实体已打分的候选数
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def end_entity(self):
+        self.candidates[self.scored] += 1
+        self.scored = 0
+
+    def to_dict(self):
+        return {
+            'seconds': dict(self.seconds),
+            'candidates': {str(count): entities for count, entities in sorted(self.candidates.items())}
+        }
+
+    def add(self, data):
+        """合并另一份 to_dict() 结果"""
+        for name, seconds in data['seconds'].items():
+            self.seconds[name] += seconds
+        for count, entities in data['candidates'].items():
+            self.candidates[int(count)] += entities
+
+def bucket(count):
+    """按2的幂分桶：0、1、2-3、4-7……"""
+    if count < 2:
+        return str(count)
+    low = 1 << (count.bit_length() - 1)
+    return f"{low}-{2 * low - 1}"
+
+def candidate_summary(candidates):
+    """候选数直方图与分位数"""
+    values = sorted(candidates.elements())
+    histogram = Counter()
+    for count, entities in candidates.items():
+        histogram[bucket(count)] += entities
+    pick = lambda fraction: values[min(len(values) - 1, int(fraction * len(values)))] if values else 0
+    return {
+        'entities': len(values),
+        'total': sum(values),
+        'mean': sum(values) / len(values) if values else 0.0,
+        'p50': pick(0.5),
+        'p99': pick(0.99),
+        'max': values[-1] if values else 0,
+        'histogram': dict(sorted(histogram.items(), key=lambda item: int(item[0].split('-')[0])))
+    }
+
+def cprofile_summary(profile_files, output=CPROFILE_FILE, top=CPROFILE_TOP):
+    """汇总各工作进程的cProfile统计，写出合并后的.prof并返回按自身耗时排序的前若干函数"""
+    stats = pstats.Stats(*map(str, profile_files))
+    stats.dump_stats(output)
+    rows = []
+    for (filename, line, function), (calls, _, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{filename}:{line}({function})",
+            'calls': calls,
+            'own_seconds': own,
+            'cumulative_seconds': cumulative
+        })
+    rows.sort(key=lambda row: row['own_seconds'], reverse=True)
+    return rows[:top]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bk_tree.py 的测试
+目录中的BK树对基准测试固定样本（benchmark_fixture.json）中的短标签，与线性扫描返回相同的结果集合
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from bk_tree import MAX_LABEL_LENGTH, BKTree, edit_budget, levenshtein, linear_within
+from iso_catalog import load_catalog, normalize_name
+
+FIXTURE_FILE = Path(__file__).resolve().parent / "benchmark_fixture.json"
+
+STANDARD_FIELDS = {
+    'iso639': ('print_name_norm', 'inverted_name_norm'),
+    'iso15924': ('english_name_norm', 'alias_norm')
+}
+
+@pytest.fixture(scope='module')
+def catalog():
+    return load_catalog()
+
+@pytest.fixture(scope='module')
+def short_labels():
+    with open(FIXTURE_FILE, 'r', encoding='utf-8') as f:
+        labels = {normalize_name(label) for label in json.load(f)['labels']}
+    return sorted(label for label in labels if edit_budget(len(label)) and len(label) <= MAX_LABEL_LENGTH)
+
+@pytest.mark.parametrize('standard', ['iso639', 'iso15924'])
+def test_tree_agrees_with_linear_scan(catalog, short_labels, standard):
+    entries = [((code, field), data[field]) for code, data in catalog[standard].items()
+               for field in STANDARD_FIELDS[standard] if data[field]]
+    tree = catalog[f"{standard}_bktree"]
+    for label in short_labels:
+        k = edit_budget(len(label))
+        hits = tree.within(label, k)
+        assert set(hits) == linear_within(entries, label, k), label
+        assert [distance for _, _, distance in hits] == sorted(distance for _, _, distance in hits)
+
+def test_tree_finds_near_names():
+    entries = [('syl', 'Sylheti'), ('syl2', 'Syloti Nagri'), ('cmn', 'Mandarin'), ('yue', 'Cantonese'),
+               ('sya', 'Syloti'), ('dup', 'Sylheti')]
+    tree = BKTree(entries)
+    assert tree.within('Syloti', 1) == [('sya', 'Syloti', 0)]
+    assert tree.within('Sylheti', 2) == [('syl', 'Sylheti', 0), ('dup', 'Sylheti', 0), ('sya', 'Syloti', 2)]
+    assert set(tree.within('Sylhety', 2)) == linear_within(entries, 'Sylhety', 2)
+
+def test_bounded_levenshtein():
+    assert levenshtein('kitten', 'sitting') == 3
+    assert levenshtein('kitten', 'sitting', 1) == 2
+    assert levenshtein('abc', 'abcdef', 2) == 3
+    assert levenshtein('', 'abc') == 3
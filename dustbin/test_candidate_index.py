@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+candidate_index.py 的测试
+在基准测试的固定标签样本（benchmark_fixture.json）上，n-gram候选索引的前3匹配与暴力比较逐个一致
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from candidate_index import NgramIndex, char_ngrams
+from iso_catalog import load_catalog
+from iso_mapper import ISOMapper
+
+FIXTURE_FILE = Path(__file__).resolve().parent / "benchmark_fixture.json"
+
+@pytest.fixture(scope='module')
+def mapper():
+    mapper = ISOMapper()
+    mapper.load_iso_standards(load_catalog())
+    return mapper
+
+@pytest.fixture(scope='module')
+def labels():
+    with open(FIXTURE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)['labels']
+
+def top_matches(mapper, generator, find, labels):
+    mapper.candidate_generator = generator
+    return [[(match['iso_code'], match['score']) for match in find(None, [label])] for label in labels]
+
+@pytest.mark.parametrize('standard', ['iso639', 'iso15924'])
+def test_ngram_agrees_with_brute_force(mapper, labels, standard):
+    find = mapper.find_language_matches if standard == 'iso639' else mapper.find_writing_system_matches
+    expected = top_matches(mapper, 'brute_force', find, labels)
+    actual = top_matches(mapper, 'ngram', find, labels)
+    mismatches = [(label, want, got) for label, want, got in zip(labels, expected, actual) if want != got]
+    assert mismatches == []
+    # 样本中须有模糊匹配命中，否则比较没有意义
+    assert any(expected)
+
+def test_candidates_keep_index_order_and_limit():
+    index = NgramIndex([('a', 'cantonese'), ('b', 'mandarin'), ('c', 'cantones'), ('a', 'yue')])
+    assert index.candidates('cantonese', limit=2) == ['a', 'c']
+    assert index.candidates('zzzz') == []
+    assert char_ngrams('ab') == {' a', 'ab', 'b '}
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+iso_code_table.py 的测试
+从ISO/iso-639-3.tsv抽取一小份样表（每隔40行取一行，另加带Part1/Part2b代码与非ASCII名称的行）编译为二进制代码表，
+用verify逐行核对，并检查各代码形式与名称的查找
+"""
+
+import pytest
+
+from iso_code_table import SOURCE_FILE, ISOCodeTable, build_table, read_rows, verify
+
+EXTRA_IDS = {'deu', 'fra', 'zho', 'cmn', 'eng', 'sqi'}
+
+@pytest.fixture
+def fixture_tsv(tmp_path):
+    lines = SOURCE_FILE.read_text(encoding='utf-8').splitlines(keepends=True)
+    header, body = lines[0], lines[1:]
+    rows = read_rows()
+    non_ascii = next(number for number, row in enumerate(rows) if not row['Ref_Name'].isascii())
+    selected = [line for number, line in enumerate(body)
+                if number % 40 == 0 or number == non_ascii or rows[number]['Id'] in EXTRA_IDS]
+    source = tmp_path / 'iso-639-3.tsv'
+    source.write_text(header + ''.join(selected), encoding='utf-8')
+    return source
+
+@pytest.fixture
+def table_file(fixture_tsv, tmp_path):
+    target = tmp_path / 'iso-639-3.bin'
+    build_table(fixture_tsv, target)
+    return target
+
+def test_verify_fixture_table(table_file, fixture_tsv):
+    assert verify(table_file, fixture_tsv) == []
+
+def test_verify_detects_modified_source(table_file, fixture_tsv):
+    with open(fixture_tsv, 'a', encoding='utf-8') as f:
+        f.write('zzz\t\t\t\tI\tL\tTest Language\t\n')
+    errors = verify(table_file, fixture_tsv)
+    assert "源TSV已在编译后修改" in errors
+    assert any(error.startswith("记录数不一致") for error in errors)
+
+def test_lookup_every_code_form(table_file):
+    table = ISOCodeTable(table_file)
+    assert table.lookup('de')['Id'] == 'deu'
+    assert table.lookup('ger')['Id'] == 'deu'
+    assert table.lookup(' DEU ')['Id'] == 'deu'
+    assert table.lookup('chi')['Id'] == 'zho'
+    assert table.lookup('alb')['Id'] == 'sqi'
+    assert table.lookup('cmn')['Part1'] == ''
+    assert table.lookup('xx') is None
+    assert table.lookup('ü') is None
+    assert [record['Id'] for record in table.by_name('mandarin chinese')] == ['cmn']
+    table.close()
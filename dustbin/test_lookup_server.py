@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lookup_server.py 的测试
+在0号端口启动查询服务，经同一个keep-alive连接发送GET与POST批量查询，核对各接口结果、
+无效请求（缺参数、未知标准与接口、非JSON或结构不对的请求体）的400/404，以及 /stats 的请求数与延迟分位数
+"""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from lookup_server import LookupHandler, LookupServer, LookupService
+
+@pytest.fixture(scope='module')
+def connection():
+    LookupHandler.service = LookupService(cache_size=64)
+    server = LookupServer(('127.0.0.1', 0), LookupHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=30)
+    yield connection
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+def request(connection, method, path, body=None):
+    """返回 (状态码, JSON响应)；body为bytes时原样发送，其他值编码为JSON"""
+    if body is not None and not isinstance(body, bytes):
+        body = json.dumps(body).encode('utf-8')
+    connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+def test_get_endpoints(connection):
+    status, result = request(connection, 'GET', '/code?q=ger')
+    assert status == 200 and result['iso639']['Id'] == 'deu' and result['iso15924'] is None
+    status, result = request(connection, 'GET', '/code?q=215')
+    assert result['iso15924']['code'] == 'Latn'
+    status, result = request(connection, 'GET', '/name?q=Sylheti')
+    assert [hit['iso_code'] for hit in result['iso639']] == ['syl']
+    status, result = request(connection, 'GET', '/entity?path=/chinese/cantonese.htm')
+    assert result['entity']['absolute_url_path'] == '/chinese/cantonese.htm' and result['class']
+    status, result = request(connection, 'GET', '/match?q=Sylhetti')
+    assert status == 200 and result['standard'] == 'iso639'
+    assert result['matches'][0]['iso_code'] == 'syl'
+    status, result = request(connection, 'GET', '/match?q=Latinn&standard=iso15924')
+    assert 'Latn' in [match['iso_code'] for match in result['matches']]
+
+def test_post_batch(connection):
+    status, result = request(connection, 'POST', '/code', {'queries': ['de', 'xx', 'Cyrl']})
+    assert status == 200
+    assert [(item['query'], bool(item['iso639']), bool(item['iso15924'])) for item in result['results']] == [
+        ('de', True, False), ('xx', False, False), ('Cyrl', False, True)
+    ]
+    status, result = request(connection, 'POST', '/match', {'queries': ['Sylhetti'], 'standard': 'iso639'})
+    assert result['results'][0]['matches'][0]['iso_code'] == 'syl'
+    status, result = request(connection, 'POST', '/entity', {'queries': []})
+    assert (status, result) == (200, {'results': []})
+
+def test_cached_results_are_not_shared(connection):
+    _, first = request(connection, 'POST', '/code', {'queries': ['de']})
+    service = LookupHandler.service
+    service.query('code', ['de'], None)[0]['iso639']['Id'] = 'changed'
+    _, second = request(connection, 'POST', '/code', {'queries': ['de']})
+    assert first == second
+
+@pytest.mark.parametrize('method, path, body, status', [
+    ('GET', '/code', None, 400),
+    ('GET', '/match?q=Latin&standard=iso9999', None, 400),
+    ('GET', '/nothing?q=x', None, 404),
+    ('POST', '/nothing', {'queries': []}, 404),
+    ('POST', '/code', b'not json', 400),
+    ('POST', '/code', ['de'], 400),
+    ('POST', '/code', 'de', 400),
+    ('POST', '/code', {}, 400),
+    ('POST', '/code', {'queries': 'de'}, 400),
+    ('POST', '/code', {'queries': ['de', 3]}, 400),
+    ('POST', '/match', {'queries': ['x'], 'standard': 'iso9999'}, 400)
+])
+def test_invalid_requests(connection, method, path, body, status):
+    response_status, result = request(connection, method, path, body)
+    assert response_status == status and 'error' in result
+
+def test_stats(connection):
+    request(connection, 'POST', '/name', {'queries': ['Sylheti', 'Sylheti', 'Bengali']})
+    _, stats = request(connection, 'GET', '/stats')
+    name = stats['endpoints']['name']
+    assert name['requests'] >= 1 and name['queries'] >= 3
+    assert name['cache_hits'] >= 1 and 0 < name['cache_hit_rate'] < 1
+    latency = name['latency_ms']
+    assert set(latency) == {'p50', 'p90', 'p99'}
+    assert 0 <= latency['p50'] <= latency['p90'] <= latency['p99']
+    assert stats['endpoints']['entity']['requests'] >= 1
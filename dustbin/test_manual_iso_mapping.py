@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+manual_iso_mapping.py 合并统计的测试
+一次中断后续跑的两次运行：处理时间与各进程空闲时间不含两次运行之间的间隔，首尾跨度单独记录
+"""
+
+import pytest
+
+from manual_iso_mapping import ResultMerger, covered_seconds
+
+def shard(run, worker, started, finished, busy):
+    return {
+        'language_mappings': {}, 'writing_mappings': {}, 'unmapped_languages': [], 'unmapped_writings': [],
+        'fast_path_resolved': 0, 'cache_hits': 0, 'cache_misses': 0,
+        'run': run, 'worker': worker, 'entities': 10, 'busy_seconds': busy,
+        'started': started, 'finished': finished, 'profile': {'seconds': {}, 'candidates': {}}
+    }
+
+def test_covered_seconds_merges_overlaps_and_skips_gaps():
+    assert covered_seconds([]) == 0.0
+    assert covered_seconds([(0, 10), (5, 12), (100, 103)]) == 15.0
+    assert covered_seconds([(100, 103), (0, 10)]) == 13.0
+
+def test_resumed_run_does_not_count_gap_as_idle():
+    merger = ResultMerger()
+    # 第一次运行在1000秒处中断，第二次运行在5000秒处续跑
+    merger.add(shard('first', 'host:1', 1000, 1004, 4))
+    merger.add(shard('first', 'host:1', 1004, 1010, 6))
+    merger.add(shard('second', 'host:2', 5000, 5005, 4.5))
+    assert merger.processing_seconds() == 15
+    assert merger.finished - merger.started == 4005
+    stats = merger.worker_statistics()
+    assert stats['host:1']['wall_seconds'] == 10
+    assert stats['host:1']['idle_seconds'] == 0
+    assert stats['host:1']['utilization'] == 1.0
+    assert stats['host:2']['idle_seconds'] == pytest.approx(0.5)
+    assert stats['host:2']['utilization'] == pytest.approx(0.9)
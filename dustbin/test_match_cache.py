@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+match_cache.py 的测试
+两个连接同时打开同一缓存文件：一方打分期间（尚未commit）另一方可立即写入，两方的结果在commit后互相可见
+"""
+
+import threading
+import time
+
+from match_cache import MatchCache
+
+SCORE_SECONDS = 0.2
+
+def open_cache(path):
+    cache = MatchCache('catalog', 'scorer-1', path)
+    # 写锁被占用时快速失败，而不是等满60秒
+    cache.conn.execute("PRAGMA busy_timeout=500")
+    return cache
+
+def test_misses_do_not_hold_the_write_lock(tmp_path):
+    path = tmp_path / 'match_cache.sqlite3'
+    first, second = open_cache(path), open_cache(path)
+    assert first.get_or_score('sylheti', 'iso639', lambda label: [{'iso_code': 'syl'}]) == [{'iso_code': 'syl'}]
+    # first尚未commit，second的写入不应等待
+    second.get_or_score('cantonese', 'iso639', lambda label: [{'iso_code': 'yue'}])
+    second.commit()
+    first.commit()
+    assert first.get('cantonese', 'iso639') == [{'iso_code': 'yue'}]
+    assert second.get('sylheti', 'iso639') == [{'iso_code': 'syl'}]
+    first.close()
+    second.close()
+
+def test_pending_results_are_hits_before_commit(tmp_path):
+    cache = open_cache(tmp_path / 'match_cache.sqlite3')
+    cache.get_or_score('sylheti', 'iso639', lambda label: [])
+    cache.get_or_score('sylheti', 'iso639', lambda label: [{'iso_code': 'wrong'}])
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get('sylheti', 'iso15924') is None
+    cache.close()
+
+def test_concurrent_cold_caches_score_in_parallel(tmp_path):
+    path = tmp_path / 'match_cache.sqlite3'
+    labels = [f"label-{i}" for i in range(4)]
+    finished = {}
+
+    def worker(name):
+        cache = open_cache(path)
+        start = time.perf_counter()
+        for label in labels:
+            cache.get_or_score(f"{name}-{label}", 'iso639', lambda text: time.sleep(SCORE_SECONDS) or [text])
+        cache.commit()
+        finished[name] = time.perf_counter() - start
+        cache.close()
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 串行执行时后完成的一方需要两倍时间
+    assert max(finished.values()) < 1.5 * len(labels) * SCORE_SECONDS
+    cache = open_cache(path)
+    assert all(cache.get(f"{name}-{label}", 'iso639') == [f"{name}-{label}"] for name in 'ab' for label in labels)
+    cache.close()
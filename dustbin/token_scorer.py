@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO 15924名称的加权词元打分
+对English Name与Alias建立词元倒排索引，词元权重取IDF，"alphabet"、"script"等泛指书写系统的词再降权；
+一个标签只遍历自身词元的倒排表，一遍累加出所有共享信息词元的候选及其加权Dice分数
+直接运行时列出实体标签上词元打分与整串ratio结果不同的书写系统匹配
+"""
+
+import math
+from collections import defaultdict
+
+# 泛指书写系统的词：共享它们不说明是同一种文字
+GENERIC_SCRIPT_WORDS = frozenset({
+    'script', 'scripts', 'alphabet', 'alphabets', 'syllabary', 'syllabics', 'abugida', 'abjad',
+    'writing', 'letters', 'characters', 'runes', 'cursive', 'ancient'
+})
+GENERIC_WEIGHT = 0.1
+
+class TokenScorer:
+    """键（ISO代码）到若干字段文本的加权词元索引"""
+
+    def __init__(self, entries):
+        """entries: 可迭代的 (key, field, 已标准化名称)；名称与标签都已小写，按空白分词"""
+        self.fields = []
+        postings = defaultdict(set)
+        for key, field, name in entries:
+            tokens = set(name.split())
+            field_id = len(self.fields)
+            self.fields.append((key, field, tokens))
+            for token in tokens:
+                postings[token].add(field_id)
+
+        keys = {key for key, _, _ in self.fields}
+        document_frequency = defaultdict(int)
+        for token, field_ids in postings.items():
+            document_frequency[token] = len({self.fields[field_id][0] for field_id in field_ids})
+        # 未见过的词元取最大IDF
+        self.default_weight = math.log(len(keys) + 1) + 1
+        self.weights = {
+            token: (math.log((len(keys) + 1) / (frequency + 1)) + 1) * (GENERIC_WEIGHT if token in GENERIC_SCRIPT_WORDS else 1)
+            for token, frequency in document_frequency.items()
+        }
+        self.field_weight = [sum(self.weight(token) for token in tokens) for _, _, tokens in self.fields]
+        # 只为信息词元建倒排表：只共享泛指词的名称不进入候选
+        self.postings = {token: sorted(field_ids) for token, field_ids in postings.items()
+                         if token not in GENERIC_SCRIPT_WORDS}
+
+    def weight(self, token):
+        return self.weights.get(token, self.default_weight *
+                                (GENERIC_WEIGHT if token in GENERIC_SCRIPT_WORDS else 1))
+
+    def scores(self, normalized_label):
+        """返回 {key: (分数, 字段)}：共享至少一个信息词元的代码，分数为各字段加权Dice的最大值"""
+        tokens = set(normalized_label.split())
+        label_weight = sum(self.weight(token) for token in tokens)
+        shared = defaultdict(float)
+        for token in tokens:
+            for field_id in self.postings.get(token, ()):
+                shared[field_id] += self.weight(token)
+        # 泛指词只在已有信息词元命中的字段上加分
+        for token in tokens & GENERIC_SCRIPT_WORDS:
+            for field_id in shared:
+                if token in self.fields[field_id][2]:
+                    shared[field_id] += self.weight(token)
+
+        results = {}
+        for field_id, weight in shared.items():
+            key, field, _ = self.fields[field_id]
+            score = 2 * weight / (label_weight + self.field_weight[field_id])
+            if key not in results or score > results[key][0]:
+                results[key] = (score, field)
+        return results
+
+def main():
+    """实体标签上词元打分改变的书写系统匹配"""
+    import json
+    from iso_mapper import ISOMapper
+
+    mapper = ISOMapper()
+    mapper.load_entity_data()
+    mapper.load_iso_standards()
+
+    labels = sorted({label for entity in mapper.entities.values() for label in entity['labels']})
+    changed = []
+    for label in labels:
+        mapper.use_token_scorer = False
+        before = mapper.find_writing_system_matches(None, [label])
+        mapper.use_token_scorer = True
+        after = mapper.find_writing_system_matches(None, [label])
+        if [m['iso_code'] for m in before] != [m['iso_code'] for m in after]:
+            changed.append({
+                'label': label,
+                'ratio': [(m['iso_code'], round(m['score'], 3)) for m in before],
+                'token': [(m['iso_code'], round(m['score'], 3)) for m in after]
+            })
+
+    print(f"标签: {len(labels)}, 书写系统匹配发生变化: {len(changed)}")
+    for item in changed:
+        print(json.dumps(item, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
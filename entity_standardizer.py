@@ -11,6 +11,8 @@ import re
 from collections import defaultdict
 from pathlib import Path
 
+from label_normalizer import normalize
+
 class EntityStandardizer:
     def __init__(self):
         self.entities = {}
@@ -211,10 +213,11 @@ class EntityStandardizer:
         return evidence_sources.issubset(set(sources))
     
     def contains_keywords(self, labels, keywords):
-        """检查标签是否包含关键词"""
+        """检查标签是否包含关键词（在Unicode折叠后的标签及其括号内容中查找）"""
         for label in labels:
-            label_lower = label.lower()
-            if any(keyword in label_lower for keyword in keywords):
+            key, parentheticals = normalize(label)
+            text = ' '.join((key,) + parentheticals)
+            if any(keyword in text for keyword in keywords):
                 return True
         return False
     
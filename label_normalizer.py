@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签与ISO名称的统一标准化
+NFKD分解后去掉附加符号，特殊字母与吸气音符号转写为ASCII，casefold；括号内容单独保留，不并入匹配键
+结果记在有界LRU中，ISO名称的结果随ISO目录持久化，同一次运行中每个不同字符串只标准化一次
+entity_standardizer.py与dustbin中的ISO映射脚本共用本模块（dustbin经由iso_catalog按文件路径导入）
+直接运行时统计实体标签中因折叠而改变匹配键的标签
+"""
+
+import re
+import unicodedata
+from collections import OrderedDict
+
+LRU_SIZE = 65536
+
+# NFKD不能分解的字母与符号；吸气音符号取常见的ASCII写法，使"!Kung"与"ǃKung"得到同一个键
+TRANSLITERATION = str.maketrans({
+    'ǃ': '!', 'ǀ': '|', 'ǁ': '||', 'ǂ': '=', 'ʘ': '0',
+    'ʼ': "'", 'ʻ': "'", 'ꞌ': "'", '‘': "'", '’': "'", 'ʹ': "'", '`': "'",
+    '–': '-', '—': '-',
+    'ı': 'i', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'ħ': 'h', 'ŧ': 't',
+    'æ': 'ae', 'œ': 'oe', 'ß': 'ss', 'þ': 'th', 'ð': 'd', 'ŋ': 'ng',
+    'ɛ': 'e', 'ə': 'e', 'ɔ': 'o', 'ɨ': 'i', 'ʉ': 'u', 'ɓ': 'b', 'ɗ': 'd', 'ƙ': 'k', 'ƴ': 'y'
+})
+
+def fold(text):
+    """NFKD分解、去附加符号、转写、casefold"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.casefold().translate(TRANSLITERATION)
+
+def matching_key(text):
+    """去掉括号内容后的匹配键：逗号、连字符、撇号视为空格"""
+    text = re.sub(r'\([^)]*\)', '', text)
+    text = re.sub(r'[,\-\']', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def normalize_label(label):
+    """返回 (匹配键, 括号内容的匹配键元组)"""
+    folded = fold(label)
+    parentheticals = tuple(key for key in (matching_key(inner) for inner in re.findall(r'\(([^)]*)\)', folded)) if key)
+    return matching_key(folded), parentheticals
+
+class LabelNormalizer:
+    """带有界LRU的标准化器"""
+
+    def __init__(self, maxsize=LRU_SIZE):
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def normalize(self, label):
+        result = self.cache.get(label)
+        if result is not None:
+            self.hits += 1
+            self.cache.move_to_end(label)
+            return result
+        self.misses += 1
+        result = normalize_label(label)
+        self.cache[label] = result
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return result
+
+    def seed(self, results):
+        """载入已持久化的结果（不计入命中统计）"""
+        for label, result in results.items():
+            self.cache.setdefault(label, result)
+        while len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+
+    def snapshot(self):
+        return dict(self.cache)
+
+# 进程内共享的实例：ISO目录、各匹配器与实体标准化都经由它
+NORMALIZER = LabelNormalizer()
+
+def normalize(label):
+    return NORMALIZER.normalize(label)
+
+def main():
+    """实体标签中折叠后匹配键改变的标签"""
+    import json
+
+    with open('entity_analysis_report.json', 'r', encoding='utf-8') as f:
+        entities = json.load(f)['entities']
+    labels = sorted({label for entity in entities.values() for label in entity['labels']})
+
+    changed = []
+    for label in labels:
+        key, parentheticals = normalize(label)
+        plain = matching_key(label.lower())
+        if key != plain:
+            changed.append((label, plain, key, parentheticals))
+    print(f"标签: {len(labels)}, 匹配键因折叠改变: {len(changed)}")
+    for label, plain, key, parentheticals in changed:
+        print(f"  {label!r}: {plain!r} -> {key!r} {list(parentheticals) if parentheticals else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+label_normalizer.py 的测试
+按表核对折叠规则（附加符号、特殊字母转写、吸气音符号、撇号与连字符、括号内容），以及有界LRU
+"""
+
+import pytest
+
+from label_normalizer import LabelNormalizer, normalize_label
+
+@pytest.mark.parametrize('label, expected', [
+    # 附加符号与特殊字母
+    ('Bété', ('bete', ())),
+    ('Võro', ('voro', ())),
+    ('Łódź', ('lodz', ())),
+    ('Ɓasaa', ('basaa', ())),
+    ('Ŋkóo', ('ngkoo', ())),
+    ('Ænglisc', ('aenglisc', ())),
+    ('Straße', ('strasse', ())),
+    ('ﬁ', ('fi', ())),
+    # 吸气音符号与ASCII写法得到同一个键
+    ('ǃXóõ', ('!xoo', ())),
+    ('ǃKung', ('!kung', ())),
+    ('!Kung', ('!kung', ())),
+    ('ǂHoan', ('=hoan', ())),
+    ('Gǀui', ('g|ui', ())),
+    # 撇号、连字符、逗号与破折号视为空格
+    ('Kʼicheʼ', ('k iche', ())),
+    ('Hmong-Mien', ('hmong mien', ())),
+    ('Zapotec, Isthmus', ('zapotec isthmus', ())),
+    ('Dzongkha – Bhutan', ('dzongkha bhutan', ())),
+    # 括号内容不进入匹配键，单独返回
+    ('Sámi (Lule)', ('sami', ('lule',))),
+    ('Chinese (Cantonese, Yue)', ('chinese', ('cantonese yue',))),
+    ('Berber (Tifinagh) (Neo)', ('berber', ('tifinagh', 'neo'))),
+    ('()', ('', ()))
+])
+def test_normalize_label(label, expected):
+    assert normalize_label(label) == expected
+
+def test_lru_is_bounded_and_counts_hits():
+    normalizer = LabelNormalizer(maxsize=2)
+    normalizer.normalize('Bété')
+    normalizer.normalize('Võro')
+    assert normalizer.normalize('Bété') == ('bete', ())
+    normalizer.normalize('Łódź')
+    # Võro最久未用，被淘汰
+    assert list(normalizer.snapshot()) == ['Bété', 'Łódź']
+    assert (normalizer.hits, normalizer.misses) == (1, 3)
+
+def test_seed_does_not_count():
+    normalizer = LabelNormalizer(maxsize=2)
+    normalizer.seed({'a': ('a', ()), 'b': ('b', ()), 'c': ('c', ())})
+    assert list(normalizer.snapshot()) == ['b', 'c']
+    assert normalizer.normalize('c') == ('c', ())
+    assert (normalizer.hits, normalizer.misses) == (1, 0)